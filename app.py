@@ -384,6 +384,8 @@ if __name__ == "__main__":
     application = create_app()
     application.run(debug=True, host="0.0.0.0", port=5000)
 
-# Create app instance for gunicorn (app:app)
-app = create_app()
+# Create app instance for gunicorn (app:app). Skipped in the worker processes the plagiarism
+# service spawns, which re-import the main module as __mp_main__
+if __name__ != "__mp_main__":
+    app = create_app()
 
@@ -8,14 +8,32 @@ detailed metrics, charts, and trend analysis.
 from datetime import datetime
 from functools import wraps
 
-from flask import Blueprint, jsonify, request, session
+from flask import Blueprint, current_app, jsonify, request, session
 
 from services.progress_tracker_service import ProgressTrackerService
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 progress_tracker_bp = Blueprint("progress_tracker", __name__)
 progress_service = ProgressTrackerService()
 
 
+def _json_response(payload):
+    """Serialize an analytics payload with orjson when available, else fall back to jsonify"""
+    if orjson is None:
+        return jsonify(payload)
+
+    option = orjson.OPT_SERIALIZE_NUMPY
+    if current_app.json.sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    return current_app.response_class(
+        orjson.dumps(payload, option=option), mimetype="application/json"
+    )
+
+
 def require_auth(f):
     """Decorator to require authentication"""
 
@@ -38,7 +56,7 @@ def get_student_overview(student_id):
     """Get comprehensive student performance overview"""
     try:
         overview_data = progress_service.get_student_overview(student_id)
-        return jsonify({"success": True, "data": overview_data})
+        return _json_response({"success": True, "data": overview_data})
     except (ValueError, KeyError, AttributeError) as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -50,7 +68,7 @@ def get_performance_timeline(student_id):
     try:
         period = request.args.get("period", "6months")
         timeline_data = progress_service.get_performance_timeline(student_id, period)
-        return jsonify({"success": True, "data": timeline_data})
+        return _json_response({"success": True, "data": timeline_data})
     except (ValueError, KeyError, AttributeError) as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -61,7 +79,7 @@ def get_skill_analysis(student_id):
     """Get detailed skill-wise performance analysis"""
     try:
         skills_data = progress_service.get_skill_analysis(student_id)
-        return jsonify({"success": True, "data": skills_data})
+        return _json_response({"success": True, "data": skills_data})
     except (ValueError, KeyError, AttributeError) as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -72,7 +90,7 @@ def get_comparative_analysis(student_id):
     """Get comparative analysis against class averages"""
     try:
         comparison_data = progress_service.get_comparative_analysis(student_id)
-        return jsonify({"success": True, "data": comparison_data})
+        return _json_response({"success": True, "data": comparison_data})
     except (ValueError, KeyError, AttributeError) as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -83,7 +101,7 @@ def get_achievement_progress(student_id):
     """Get achievement and milestone progress"""
     try:
         achievements_data = progress_service.get_achievement_progress(student_id)
-        return jsonify({"success": True, "data": achievements_data})
+        return _json_response({"success": True, "data": achievements_data})
     except (ValueError, KeyError, AttributeError) as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -94,7 +112,7 @@ def get_detailed_recommendations(student_id):
     """Get personalized recommendations for improvement"""
     try:
         recommendations_data = progress_service.get_detailed_recommendations(student_id)
-        return jsonify({"success": True, "data": recommendations_data})
+        return _json_response({"success": True, "data": recommendations_data})
     except (ValueError, KeyError, AttributeError) as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -111,7 +129,7 @@ def get_dashboard_data(student_id):
             "achievements": progress_service.get_achievement_progress(student_id),
             "recommendations": progress_service.get_detailed_recommendations(student_id),
         }
-        return jsonify({"success": True, "data": dashboard_data})
+        return _json_response({"success": True, "data": dashboard_data})
     except (ValueError, KeyError, AttributeError) as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -136,10 +154,10 @@ def export_progress_report(student_id):
         }
 
         if format_type == "json":
-            return jsonify({"success": True, "data": export_data, "format": "json"})
+            return _json_response({"success": True, "data": export_data, "format": "json"})
         else:
             # For other formats, return JSON with format info
-            return jsonify(
+            return _json_response(
                 {
                     "success": True,
                     "data": export_data,
@@ -158,7 +176,7 @@ def get_all_students():
     """Get all students with their basic progress info for teacher dashboard"""
     try:
         all_students_data = progress_service.get_all_students_overview()
-        return jsonify({"success": True, "data": all_students_data})
+        return _json_response({"success": True, "data": all_students_data})
     except (ValueError, KeyError, AttributeError) as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
@@ -169,7 +187,7 @@ def get_class_statistics():
     """Get overall class statistics for teacher dashboard"""
     try:
         class_stats = progress_service.get_class_statistics()
-        return jsonify({"success": True, "data": class_stats})
+        return _json_response({"success": True, "data": class_stats})
     except (ValueError, KeyError, AttributeError) as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
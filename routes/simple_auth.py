@@ -9,7 +9,7 @@ from flask import Blueprint, jsonify, request
 from flask_jwt_extended import create_access_token
 
 import simple_auth
-from services.otp_service import OTPService
+from services import otp_service
 
 simple_auth_bp = Blueprint("simple_auth", __name__)
 
@@ -74,7 +74,7 @@ def simple_login():
             if not otp_code:
                 return jsonify({"error": "2FA required", "require_2fa": True}), 401
 
-            if not OTPService.verify_otp(user.get("otp_secret"), otp_code):
+            if not otp_service.verify_otp(user.get("otp_secret"), otp_code):
                 return jsonify({"error": "Invalid OTP code"}), 401
 
         # Create access token
@@ -195,9 +195,8 @@ def setup_2fa():
             return jsonify({"error": "User not found"}), 404
 
         # Generate secret
-        secret = OTPService.generate_secret()
-        uri = OTPService.get_provisioning_uri(secret, email)
-        qr_code = OTPService.generate_qr_code(uri)
+        secret = otp_service.generate_secret()
+        _, qr_code = otp_service.get_setup_payload(secret, email)
 
         # Save secret temporarily (or permanently but disabled)
         user["otp_secret"] = secret
@@ -233,7 +232,7 @@ def enable_2fa():
         if not secret:
             return jsonify({"error": "2FA not set up"}), 400
 
-        if OTPService.verify_otp(secret, otp_code):
+        if otp_service.verify_otp(secret, otp_code):
             user["is_2fa_enabled"] = True
             return jsonify({"message": "2FA enabled successfully"}), 200
         else:
@@ -4,14 +4,65 @@ This module handles GitHub integration, IDE plugins, Slack notifications,
 and external platform connections for the AI Grading System.
 """
 
+import asyncio
 import base64
+import contextlib
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Dict, List, Optional
 
 import requests
 
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+try:
+    import aiohttp
+
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    aiohttp = None
+    AIOHTTP_AVAILABLE = False
+
+# Strips the separators from ISO timestamps for iCal DTSTART/DTEND values
+_ICAL_STRIP = str.maketrans("", "", "-:")
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# (connect, read) timeout in seconds for every outbound HTTP call
+_HTTP_TIMEOUT = (3.05, 10)
+
+# Webhook response codes treated as a successful delivery
+_WEBHOOK_OK_STATUSES = {"slack": (200,), "discord": (200, 204)}
+
+# Extra delivery attempts for queued notifications before they are dead-lettered
+_NOTIFICATION_RETRIES = 2
+_NOTIFICATION_RETRY_BACKOFF = 0.5
+
+
+def _send_json(send, url: str, payload: Dict, headers: Optional[Dict] = None):
+    """Send a JSON body with the given requests function, using orjson when available"""
+    if not ORJSON_AVAILABLE:
+        return send(url, json=payload, headers=headers, timeout=_HTTP_TIMEOUT)
+
+    return send(
+        url,
+        data=orjson.dumps(payload),
+        headers={**(headers or {}), **_JSON_HEADERS},
+        timeout=_HTTP_TIMEOUT,
+    )
+
 
 class IntegrationType(Enum):
     """Types of integrations supported"""
@@ -32,65 +83,79 @@ class IntegrationConfig:
     api_key: str
     webhook_url: Optional[str] = None
     settings: Dict = None
+    # Outcome of the credential check: None if none was run, False while one is pending
+    validated: Optional[bool] = None
+
+
+# Notification templates for different platforms
+_NOTIFICATION_TEMPLATES = MappingProxyType(
+    {
+        "slack": {
+            "assignment_graded": {
+                "text": "Assignment '{title}' has been graded",
+                "attachments": [
+                    {
+                        "color": "good",
+                        "fields": [
+                            {"title": "Score", "value": "{score}/{max_score}", "short": True},
+                            {"title": "Grade", "value": "{percentage}%", "short": True},
+                        ],
+                    }
+                ],
+            },
+            "new_assignment": {
+                "text": "New assignment available: '{title}'",
+                "attachments": [
+                    {
+                        "color": "warning",
+                        "fields": [
+                            {"title": "Due Date", "value": "{due_date}", "short": True},
+                            {"title": "Difficulty", "value": "{difficulty}", "short": True},
+                        ],
+                    }
+                ],
+            },
+        },
+        "discord": {
+            "assignment_graded": {
+                "embeds": [
+                    {
+                        "title": "Assignment Graded 📊",
+                        "description": "Your assignment '{title}' has been evaluated",
+                        "color": 3447003,
+                        "fields": [
+                            {"name": "Score", "value": "{score}/{max_score}", "inline": True},
+                            {"name": "Percentage", "value": "{percentage}%", "inline": True},
+                        ],
+                    }
+                ]
+            }
+        },
+    }
+)
 
 
 class IntegrationService:
     def __init__(self):
         self.active_integrations = {}
-        self.notification_templates = self._load_notification_templates()
-
-    def _load_notification_templates(self) -> Dict:
-        """Load notification templates for different platforms"""
-        return {
-            "slack": {
-                "assignment_graded": {
-                    "text": "Assignment '{title}' has been graded",
-                    "attachments": [
-                        {
-                            "color": "good",
-                            "fields": [
-                                {"title": "Score", "value": "{score}/{max_score}", "short": True},
-                                {"title": "Grade", "value": "{percentage}%", "short": True},
-                            ],
-                        }
-                    ],
-                },
-                "new_assignment": {
-                    "text": "New assignment available: '{title}'",
-                    "attachments": [
-                        {
-                            "color": "warning",
-                            "fields": [
-                                {"title": "Due Date", "value": "{due_date}", "short": True},
-                                {"title": "Difficulty", "value": "{difficulty}", "short": True},
-                            ],
-                        }
-                    ],
-                },
-            },
-            "discord": {
-                "assignment_graded": {
-                    "embeds": [
-                        {
-                            "title": "Assignment Graded 📊",
-                            "description": "Your assignment '{title}' has been evaluated",
-                            "color": 3447003,
-                            "fields": [
-                                {"name": "Score", "value": "{score}/{max_score}", "inline": True},
-                                {"name": "Percentage", "value": "{percentage}%", "inline": True},
-                            ],
-                        }
-                    ]
-                }
-            },
-        }
+        # Per-user index of active integration types, kept in sync with active_integrations
+        self._by_user = defaultdict(set)
+        self.notification_templates = _NOTIFICATION_TEMPLATES
+        # Background workers for webhook validation pings and queued notifications
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="integrations")
+        # Formatted notification messages keyed by (platform, notification_type, data)
+        self._cached_message = lru_cache(maxsize=1024)(self._build_message)
+        # Queued notifications that failed every delivery attempt
+        self.failed_notifications = deque(maxlen=500)
 
     def setup_github_integration(self, user_id: str, github_token: str, repo_url: str) -> Dict:
         """Setup GitHub integration for code submission"""
         try:
             # Validate GitHub token
             headers = {"Authorization": f"token {github_token}"}
-            response = requests.get("https://api.github.com/user", headers=headers)
+            response = requests.get(
+                "https://api.github.com/user", headers=headers, timeout=_HTTP_TIMEOUT
+            )
 
             if response.status_code != 200:
                 return {"status": "error", "message": "Invalid GitHub token"}
@@ -106,9 +171,11 @@ class IntegrationService:
                     "username": github_user["login"],
                     "user_id": github_user["id"],
                 },
+                validated=True,
             )
 
             self.active_integrations[f"{user_id}_github"] = integration_config
+            self._by_user[user_id].add("github")
 
             return {
                 "status": "success",
@@ -116,7 +183,7 @@ class IntegrationService:
                 "github_username": github_user["login"],
             }
 
-        except (ValueError, KeyError, AttributeError) as e:
+        except (requests.RequestException, ValueError, KeyError, AttributeError) as e:
             return {"status": "error", "message": f"GitHub integration failed: {str(e)}"}
 
     def submit_to_github(self, user_id: str, assignment_id: str, code: str, filename: str) -> Dict:
@@ -136,8 +203,8 @@ class IntegrationService:
             parts = repo_url.replace("https://github.com/", "").split("/")
             owner, repo = parts[0], parts[1]
 
-            # Create file content
-            file_content = base64.b64encode(code.encode()).decode()
+            # Create file content (base64 output is pure ASCII)
+            file_content = base64.b64encode(code.encode("utf-8")).decode("ascii")
 
             # Prepare commit data
             commit_data = {
@@ -148,7 +215,7 @@ class IntegrationService:
 
             # Check if file exists
             file_url = f"https://api.github.com/repos/{owner}/{repo}/contents/{filename}"
-            existing_file = requests.get(file_url, headers=headers)
+            existing_file = requests.get(file_url, headers=headers, timeout=_HTTP_TIMEOUT)
 
             if existing_file.status_code == 200:
                 # File exists, update it
@@ -156,7 +223,7 @@ class IntegrationService:
                 commit_data["message"] = f"Update assignment {assignment_id}"
 
             # Create or update file
-            response = requests.put(file_url, headers=headers, json=commit_data)
+            response = _send_json(requests.put, file_url, commit_data, headers=headers)
 
             if response.status_code in [200, 201]:
                 return {
@@ -167,33 +234,29 @@ class IntegrationService:
             else:
                 return {"status": "error", "message": f"GitHub submission failed: {response.text}"}
 
-        except (ValueError, KeyError, AttributeError) as e:
+        except (requests.RequestException, ValueError, KeyError, AttributeError) as e:
             return {"status": "error", "message": f"GitHub submission error: {str(e)}"}
 
-    def setup_slack_integration(self, user_id: str, webhook_url: str) -> Dict:
-        """Setup Slack integration for notifications"""
-        try:
-            # Test webhook
-            test_message = {
-                "text": "AI Grading System connected successfully! 🎉",
-                "username": "AI Grading Bot",
-            }
-
-            response = requests.post(webhook_url, json=test_message)
-
-            if response.status_code == 200:
-                integration_config = IntegrationConfig(
-                    integration_type=IntegrationType.SLACK, api_key="", webhook_url=webhook_url
-                )
-
-                self.active_integrations[f"{user_id}_slack"] = integration_config
+    def setup_slack_integration(
+        self, user_id: str, webhook_url: str, validate: bool = False
+    ) -> Dict:
+        """Setup Slack integration for notifications.
 
-                return {"status": "success", "message": "Slack integration configured successfully"}
-            else:
-                return {"status": "error", "message": "Invalid Slack webhook URL"}
+        Args:
+            user_id: User identifier
+            webhook_url: Slack incoming webhook URL
+            validate: Send a test message to the webhook in the background
 
-        except (ValueError, KeyError, AttributeError) as e:
-            return {"status": "error", "message": f"Slack integration failed: {str(e)}"}
+        Returns:
+            Setup status; "pending_validation" when a background check was started
+        """
+        test_message = {
+            "text": "AI Grading System connected successfully! 🎉",
+            "username": "AI Grading Bot",
+        }
+        return self._setup_webhook_integration(
+            user_id, IntegrationType.SLACK, webhook_url, test_message, validate
+        )
 
     def send_slack_notification(self, user_id: str, notification_type: str, data: Dict) -> bool:
         """Send notification to Slack"""
@@ -209,61 +272,144 @@ class IntegrationService:
             return False
 
         try:
-            # Format message with data
-            message = {
-                "text": template["text"].format(**data),
-                "username": "AI Grading Bot",
-                "icon_emoji": ":robot_face:",
-            }
+            message = self._format_message("slack", notification_type, data)
+            response = _send_json(requests.post, config.webhook_url, message)
+            return response.status_code in _WEBHOOK_OK_STATUSES["slack"]
 
-            if "attachments" in template:
-                attachments = []
-                for attachment in template["attachments"]:
-                    formatted_attachment = attachment.copy()
-                    if "fields" in attachment:
-                        formatted_fields = []
-                        for field in attachment["fields"]:
-                            formatted_field = field.copy()
-                            formatted_field["value"] = field["value"].format(**data)
-                            formatted_fields.append(formatted_field)
-                        formatted_attachment["fields"] = formatted_fields
-                    attachments.append(formatted_attachment)
-                message["attachments"] = attachments
-
-            response = requests.post(config.webhook_url, json=message)
-            return response.status_code == 200
-
-        except (ValueError, KeyError, AttributeError) as e:
+        except (requests.RequestException, ValueError, KeyError, AttributeError) as e:
             print(f"Slack notification failed: {e}")
             return False
 
-    def setup_discord_integration(self, user_id: str, webhook_url: str) -> Dict:
-        """Setup Discord integration for notifications"""
+    def _format_message(self, platform: str, notification_type: str, data: Dict) -> Dict:
+        """Build a platform message, reusing the cached copy for repeated data.
+
+        The returned dict may be shared between calls and must not be mutated.
+        """
+        # The value's type is part of the key: 95 and 95.0, or 1 and True, are equal
+        # and hash alike but format differently
+        frozen_data = tuple((key, type(value), value) for key, value in data.items())
         try:
-            # Test webhook
-            test_message = {
-                "content": "AI Grading System connected successfully! 🎉",
-                "username": "AI Grading Bot",
-            }
+            frozen_data = tuple(sorted(frozen_data, key=lambda item: item[0]))
+            hash(frozen_data)
+        except TypeError:
+            # Unhashable or unorderable data can't be used as a cache key
+            return self._build_message(platform, notification_type, frozen_data)
+
+        return self._cached_message(platform, notification_type, frozen_data)
+
+    def _build_message(self, platform: str, notification_type: str, frozen_data: tuple) -> Dict:
+        """Format the platform template for a notification type with frozen data"""
+        template = self.notification_templates[platform][notification_type]
+        data = {key: value for key, _, value in frozen_data}
+
+        if platform == "slack":
+            return self._build_slack_message(template, data)
+        return self._build_discord_message(template, data)
+
+    def _build_slack_message(self, template: Dict, data: Dict) -> Dict:
+        """Format a Slack message template with notification data"""
+        message = {
+            "text": template["text"].format_map(data),
+            "username": "AI Grading Bot",
+            "icon_emoji": ":robot_face:",
+        }
 
-            response = requests.post(webhook_url, json=test_message)
+        if "attachments" in template:
+            message["attachments"] = [
+                {
+                    **attachment,
+                    "fields": [
+                        {**field, "value": field["value"].format_map(data)}
+                        for field in attachment["fields"]
+                    ],
+                }
+                if "fields" in attachment
+                else attachment
+                for attachment in template["attachments"]
+            ]
 
-            if response.status_code in [200, 204]:
-                integration_config = IntegrationConfig(
-                    integration_type=IntegrationType.DISCORD, api_key="", webhook_url=webhook_url
-                )
+        return message
 
-                self.active_integrations[f"{user_id}_discord"] = integration_config
+    def setup_discord_integration(
+        self, user_id: str, webhook_url: str, validate: bool = False
+    ) -> Dict:
+        """Setup Discord integration for notifications.
 
-                return {
-                    "status": "success",
-                    "message": "Discord integration configured successfully",
-                }
-            else:
-                return {"status": "error", "message": "Invalid Discord webhook URL"}
+        Args:
+            user_id: User identifier
+            webhook_url: Discord webhook URL
+            validate: Send a test message to the webhook in the background
 
-        except (ValueError, KeyError, AttributeError) as e:
-            return {"status": "error", "message": f"Discord integration failed: {str(e)}"}
+        Returns:
+            Setup status; "pending_validation" when a background check was started
+        """
+        test_message = {
+            "content": "AI Grading System connected successfully! 🎉",
+            "username": "AI Grading Bot",
+        }
+        return self._setup_webhook_integration(
+            user_id, IntegrationType.DISCORD, webhook_url, test_message, validate
+        )
+
+    def _setup_webhook_integration(
+        self,
+        user_id: str,
+        integration_type: IntegrationType,
+        webhook_url: str,
+        test_message: Dict,
+        validate: bool,
+    ) -> Dict:
+        """Store a webhook integration and optionally validate it in the background"""
+        platform = integration_type.value
+        integration_key = f"{user_id}_{platform}"
+
+        integration_config = IntegrationConfig(
+            integration_type=integration_type,
+            api_key="",
+            webhook_url=webhook_url,
+            validated=False if validate else None,
+        )
+        self.active_integrations[integration_key] = integration_config
+        self._by_user[user_id].add(platform)
+
+        if not validate:
+            return {
+                "status": "success",
+                "message": f"{platform.title()} integration configured successfully",
+            }
+
+        future = self._executor.submit(_send_json, requests.post, webhook_url, test_message)
+        future.add_done_callback(
+            lambda done: self._finish_webhook_validation(
+                user_id, integration_key, integration_config, done
+            )
+        )
+
+        return {
+            "status": "pending_validation",
+            "message": f"{platform.title()} integration saved, webhook validation in progress",
+        }
+
+    def _finish_webhook_validation(
+        self,
+        user_id: str,
+        integration_key: str,
+        integration_config: IntegrationConfig,
+        future: Future,
+    ) -> None:
+        """Mark a webhook integration as validated, or drop it if the test message failed"""
+        ok_statuses = _WEBHOOK_OK_STATUSES[integration_config.integration_type.value]
+        try:
+            valid = future.result().status_code in ok_statuses
+        except (requests.RequestException, ValueError, AttributeError):
+            valid = False
+
+        if valid:
+            integration_config.validated = True
+        elif self.active_integrations.get(integration_key) is integration_config:
+            # Only drop the integration this check was started for
+            del self.active_integrations[integration_key]
+            self._by_user[user_id].discard(integration_config.integration_type.value)
 
     def generate_vscode_extension_config(self, user_id: str, api_endpoint: str) -> Dict:
         """Generate VS Code extension configuration"""
@@ -347,29 +493,24 @@ class IntegrationService:
     def _generate_ical(self, events: List[Dict]) -> str:
         """Generate iCal format for calendar events"""
 
-        ical_lines = [
-            "BEGIN:VCALENDAR",
-            "VERSION:2.0",
-            "PRODID:-//AI Grading System//Assignment Calendar//EN",
-        ]
-
-        for event in events:
-            ical_lines.extend(
-                [
-                    "BEGIN:VEVENT",
-                    f"UID:{event['title'].replace(' ', '_')}_{event['start']}",
-                    f"DTSTART:{event['start'].replace('-', '').replace(':', '')}",
-                    f"DTEND:{event['end'].replace('-', '').replace(':', '')}",
-                    f"SUMMARY:{event['title']}",
-                    f"DESCRIPTION:{event['description']}",
-                    f"LOCATION:{event['location']}",
-                    "END:VEVENT",
-                ]
-            )
-
-        ical_lines.append("END:VCALENDAR")
-
-        return "\n".join(ical_lines)
+        header = (
+            "BEGIN:VCALENDAR\n"
+            "VERSION:2.0\n"
+            "PRODID:-//AI Grading System//Assignment Calendar//EN"
+        )
+        vevents = (
+            "BEGIN:VEVENT\n"
+            f"UID:{event['title'].replace(' ', '_')}_{event['start']}\n"
+            f"DTSTART:{event['start'].translate(_ICAL_STRIP)}\n"
+            f"DTEND:{event['end'].translate(_ICAL_STRIP)}\n"
+            f"SUMMARY:{event['title']}\n"
+            f"DESCRIPTION:{event['description']}\n"
+            f"LOCATION:{event['location']}\n"
+            "END:VEVENT"
+            for event in events
+        )
+
+        return "\n".join((header, *vevents, "END:VCALENDAR"))
 
     def get_integration_status(self, user_id: str) -> Dict:
         """Get status of all integrations for a user"""
@@ -384,11 +525,9 @@ class IntegrationService:
         }
 
         # Check active integrations
-        for key in self.active_integrations:
-            if key.startswith(user_id):
-                integration_type = key.split("_")[1]
-                if integration_type in status:
-                    status[integration_type] = True
+        for integration_type in self._by_user.get(user_id, ()):
+            if integration_type in status:
+                status[integration_type] = True
 
         return {
             "user_id": user_id,
@@ -404,6 +543,7 @@ class IntegrationService:
 
         if integration_key in self.active_integrations:
             del self.active_integrations[integration_key]
+            self._by_user[user_id].discard(integration_type)
             return {
                 "status": "success",
                 "message": f"{integration_type.title()} integration removed successfully",
@@ -415,25 +555,80 @@ class IntegrationService:
             }
 
     def notify_assignment_graded(self, user_id: str, assignment_data: Dict) -> Dict:
-        """Send notifications across all configured platforms"""
+        """Queue assignment graded notifications for every configured platform.
 
-        results = {}
-
-        # Slack notification
-        if f"{user_id}_slack" in self.active_integrations:
-            slack_success = self.send_slack_notification(
-                user_id, "assignment_graded", assignment_data
+        Returns as soon as the notifications are queued; delivery is retried on
+        the service's worker pool and failures end up in failed_notifications.
+        """
+        platforms = self._notification_platforms(user_id)
+
+        for platform in platforms:
+            self._executor.submit(
+                self._deliver_notification,
+                platform,
+                user_id,
+                "assignment_graded",
+                dict(assignment_data),
             )
-            results["slack"] = "success" if slack_success else "failed"
 
-        # Discord notification
-        if f"{user_id}_discord" in self.active_integrations:
-            discord_success = self.send_discord_notification(
-                user_id, "assignment_graded", assignment_data
-            )
-            results["discord"] = "success" if discord_success else "failed"
+        return {"status": "queued", "notifications_queued": len(platforms), "platforms": platforms}
 
-        return {"notifications_sent": len(results), "results": results}
+    def _notification_platforms(self, user_id: str) -> List[str]:
+        """Notification platforms configured for a user"""
+        return [
+            platform
+            for platform in ("slack", "discord")
+            if f"{user_id}_{platform}" in self.active_integrations
+        ]
+
+    def _deliver_notification(
+        self, platform: str, user_id: str, notification_type: str, data: Dict
+    ) -> bool:
+        """Send a queued notification, retrying transient failures before dead-lettering it.
+
+        Only connection errors, timeouts, rate limiting and server errors are retried.
+        A removed integration or unknown template drops the notification, and any
+        other failure is dead-lettered straight away.
+        """
+        if notification_type not in self.notification_templates[platform]:
+            return False
+
+        error = None
+        for attempt in range(_NOTIFICATION_RETRIES + 1):
+            config = self.active_integrations.get(f"{user_id}_{platform}")
+            if config is None:
+                return False
+
+            try:
+                message = self._format_message(platform, notification_type, data)
+                status = _send_json(requests.post, config.webhook_url, message).status_code
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = str(e)
+            except (requests.RequestException, ValueError, KeyError, AttributeError) as e:
+                # Bad URLs and data that doesn't fit the template fail the same way every time
+                error = str(e)
+                break
+            else:
+                if status in _WEBHOOK_OK_STATUSES[platform]:
+                    return True
+                error = f"HTTP {status}"
+                if status != 429 and status < 500:
+                    break
+
+            if attempt < _NOTIFICATION_RETRIES:
+                time.sleep(_NOTIFICATION_RETRY_BACKOFF * 2**attempt)
+
+        self.failed_notifications.append(
+            {
+                "platform": platform,
+                "user_id": user_id,
+                "notification_type": notification_type,
+                "data": data,
+                "error": error,
+                "failed_at": datetime.now().isoformat(),
+            }
+        )
+        return False
 
     def send_discord_notification(self, user_id: str, notification_type: str, data: Dict) -> bool:
         """Send notification to Discord"""
@@ -449,42 +644,147 @@ class IntegrationService:
             return False
 
         try:
-            message = {
-                "username": "AI Grading Bot",
-                "avatar_url": "https://example.com/bot-avatar.png",
-            }
+            message = self._format_message("discord", notification_type, data)
+            response = _send_json(requests.post, config.webhook_url, message)
+            return response.status_code in _WEBHOOK_OK_STATUSES["discord"]
 
-            if "embeds" in template:
-                embeds = []
-                for embed in template["embeds"]:
-                    formatted_embed = {
-                        "title": embed["title"],
-                        "description": embed["description"].format(**data),
-                        "color": embed["color"],
-                    }
+        except (requests.RequestException, ValueError, KeyError, AttributeError) as e:
+            print(f"Discord notification failed: {e}")
+            return False
 
-                    if "fields" in embed:
-                        formatted_fields = []
-                        for field in embed["fields"]:
-                            formatted_field = {
-                                "name": field["name"],
-                                "value": field["value"].format(**data),
-                                "inline": field.get("inline", False),
-                            }
-                            formatted_fields.append(formatted_field)
-                        formatted_embed["fields"] = formatted_fields
+    def _build_discord_message(self, template: Dict, data: Dict) -> Dict:
+        """Format a Discord message template with notification data"""
+        message = {
+            "username": "AI Grading Bot",
+            "avatar_url": "https://example.com/bot-avatar.png",
+        }
 
-                    embeds.append(formatted_embed)
+        if "embeds" in template:
+            message["embeds"] = [
+                self._format_discord_embed(embed, data) for embed in template["embeds"]
+            ]
 
-                message["embeds"] = embeds
+        return message
 
-            response = requests.post(config.webhook_url, json=message)
-            return response.status_code in [200, 204]
+    def _format_discord_embed(self, embed: Dict, data: Dict) -> Dict:
+        """Fill a Discord embed template with notification data"""
+        formatted_embed = {
+            "title": embed["title"],
+            "description": embed["description"].format_map(data),
+            "color": embed["color"],
+        }
 
-        except (ValueError, KeyError, AttributeError) as e:
-            print(f"Discord notification failed: {e}")
+        if "fields" in embed:
+            formatted_embed["fields"] = [
+                {
+                    "name": field["name"],
+                    "value": field["value"].format_map(data),
+                    "inline": field.get("inline", False),
+                }
+                for field in embed["fields"]
+            ]
+
+        return formatted_embed
+
+    async def send_slack_notification_async(
+        self, user_id: str, notification_type: str, data: Dict
+    ) -> bool:
+        """Send notification to Slack without blocking the event loop"""
+        return await self._send_notification_async("slack", user_id, notification_type, data)
+
+    async def send_discord_notification_async(
+        self, user_id: str, notification_type: str, data: Dict
+    ) -> bool:
+        """Send notification to Discord without blocking the event loop"""
+        return await self._send_notification_async("discord", user_id, notification_type, data)
+
+    async def notify_assignment_graded_async(self, user_id: str, assignment_data: Dict) -> Dict:
+        """Send notifications to all configured platforms concurrently over one session"""
+        platforms = self._notification_platforms(user_id)
+
+        async with self._open_aio_session() as session:
+            outcomes = await asyncio.gather(
+                *(
+                    self._send_notification_async(
+                        platform, user_id, "assignment_graded", assignment_data, session
+                    )
+                    for platform in platforms
+                )
+            )
+
+        results = {
+            platform: "success" if success else "failed"
+            for platform, success in zip(platforms, outcomes)
+        }
+        return {"notifications_sent": len(results), "results": results}
+
+    async def _send_notification_async(
+        self,
+        platform: str,
+        user_id: str,
+        notification_type: str,
+        data: Dict,
+        session: Optional["aiohttp.ClientSession"] = None,
+    ) -> bool:
+        """Format and post a notification, over session or else a session of its own"""
+        if not AIOHTTP_AVAILABLE:
+            # Fall back to the requests-based sender in a worker thread
+            send = getattr(self, f"send_{platform}_notification")
+            return await asyncio.to_thread(send, user_id, notification_type, data)
+
+        if session is None:
+            async with self._open_aio_session() as session:
+                return await self._send_notification_async(
+                    platform, user_id, notification_type, data, session
+                )
+
+        config = self.active_integrations.get(f"{user_id}_{platform}")
+        template = self.notification_templates[platform].get(notification_type)
+
+        if config is None or not template:
             return False
 
+        try:
+            message = self._format_message(platform, notification_type, data)
+            status = await self._post_json_async(session, config.webhook_url, message)
+            return status in _WEBHOOK_OK_STATUSES[platform]
+
+        except (
+            aiohttp.ClientError,
+            asyncio.TimeoutError,
+            ValueError,
+            KeyError,
+            AttributeError,
+        ) as e:
+            print(f"{platform.title()} notification failed: {e}")
+            return False
+
+    def _open_aio_session(self):
+        """Open an aiohttp session for one round of notifications, or a placeholder
+        context when aiohttp is not installed. Callers close it with async with.
+        """
+        if not AIOHTTP_AVAILABLE:
+            return contextlib.nullcontext()
+
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=100, limit_per_host=20, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(
+                sock_connect=_HTTP_TIMEOUT[0], sock_read=_HTTP_TIMEOUT[1]
+            ),
+        )
+
+    async def _post_json_async(
+        self, session: "aiohttp.ClientSession", url: str, payload: Dict
+    ) -> int:
+        """POST a JSON body over session and return the response status"""
+        if ORJSON_AVAILABLE:
+            request = session.post(url, data=orjson.dumps(payload), headers=_JSON_HEADERS)
+        else:
+            request = session.post(url, json=payload)
+
+        async with request as response:
+            return response.status
+
 
 # Global instance
 integration_service = IntegrationService()
@@ -4,8 +4,10 @@ This module provides specialized AI-powered evaluation for engineering
 curriculum exercises including algorithms, data structures, and systems programming.
 """
 
+import asyncio
 from dataclasses import dataclass
 from enum import Enum
+from types import MappingProxyType
 from typing import Dict, List
 
 try:
@@ -24,6 +26,10 @@ except ImportError:
     enhanced_plagiarism_detector = None
 
 
+# Efficiency score awarded for each detected time complexity
+_EFFICIENCY_MAP = MappingProxyType({"O(1)": 100, "O(log n)": 90, "O(n)": 80, "O(n²)": 50})
+
+
 class LabType(Enum):
     ALGORITHMS = "algorithms"
     DATA_STRUCTURES = "data_structures"
@@ -53,52 +59,51 @@ class CustomizedFeedback:
     plagiarism_report: Dict
 
 
-class EngineeringLabGradingService:
-    def __init__(self):
-        self.lab_templates = self._load_lab_templates()
-        self.feedback_templates = self._load_feedback_templates()
-
-    def _load_lab_templates(self) -> Dict:
-        """Load lab assignment templates for engineering topics.
+# Lab assignment templates for engineering topics, organized by type
+_LAB_TEMPLATES = MappingProxyType(
+    {
+        LabType.ALGORITHMS: {
+            "sorting": {
+                "test_cases": [
+                    {"input": "[64, 34, 25, 12]", "expected": "[12, 25, 34, 64]"},
+                    {"input": "[]", "expected": "[]"},
+                    {"input": "[1]", "expected": "[1]"},
+                ],
+                "criteria": {
+                    "correctness": 40,
+                    "efficiency": 30,
+                    "quality": 20,
+                    "edge_cases": 10,
+                },
+            }
+        },
+        LabType.DATA_STRUCTURES: {
+            "linked_list": {
+                "test_cases": [
+                    {"operation": "insert", "value": 1, "expected": "success"},
+                    {"operation": "search", "value": 1, "expected": "found"},
+                ],
+                "criteria": {"implementation": 40, "memory": 30, "operations": 30},
+            }
+        },
+    }
+)
+
+# Feedback templates for different scenarios
+_FEEDBACK_TEMPLATES = MappingProxyType(
+    {
+        "excellent": "Outstanding implementation! Shows mastery of {concept}.",
+        "good": "Good solution with solid understanding of {topic}.",
+        "needs_improvement": "Consider optimizing {section} using {suggestion}.",
+        "error_handling": "Add error handling for {scenario} to improve robustness.",
+    }
+)
 
-        Returns:
-            Dictionary of lab templates organized by type
-        """
-        return {
-            LabType.ALGORITHMS: {
-                "sorting": {
-                    "test_cases": [
-                        {"input": "[64, 34, 25, 12]", "expected": "[12, 25, 34, 64]"},
-                        {"input": "[]", "expected": "[]"},
-                        {"input": "[1]", "expected": "[1]"},
-                    ],
-                    "criteria": {
-                        "correctness": 40,
-                        "efficiency": 30,
-                        "quality": 20,
-                        "edge_cases": 10,
-                    },
-                }
-            },
-            LabType.DATA_STRUCTURES: {
-                "linked_list": {
-                    "test_cases": [
-                        {"operation": "insert", "value": 1, "expected": "success"},
-                        {"operation": "search", "value": 1, "expected": "found"},
-                    ],
-                    "criteria": {"implementation": 40, "memory": 30, "operations": 30},
-                }
-            },
-        }
 
-    def _load_feedback_templates(self) -> Dict:
-        """Load feedback templates for different scenarios"""
-        return {
-            "excellent": "Outstanding implementation! Shows mastery of {concept}.",
-            "good": "Good solution with solid understanding of {topic}.",
-            "needs_improvement": "Consider optimizing {section} using {suggestion}.",
-            "error_handling": "Add error handling for {scenario} to improve robustness.",
-        }
+class EngineeringLabGradingService:
+    def __init__(self):
+        self.lab_templates = _LAB_TEMPLATES
+        self.feedback_templates = _FEEDBACK_TEMPLATES
 
     async def evaluate_lab_submission(
         self, code: str, assignment: LabAssignment, student_id: str, language: str = "python"
@@ -138,27 +143,38 @@ class EngineeringLabGradingService:
         """Execute test cases and return detailed results"""
         results = {"passed": 0, "total": len(test_cases), "details": []}
 
+        # Grade every test case in one call so execution setup is paid once;
+        # grade_submission is synchronous, so run it off the event loop
+        try:
+            grade_result = await asyncio.to_thread(grade_submission, code, test_cases, language)
+        except (ValueError, KeyError, AttributeError) as e:
+            # Nothing was graded, so every test case is reported as an error
+            results["details"] = [{"test": i + 1, "error": str(e)} for i in range(len(test_cases))]
+            results["success_rate"] = 0
+            return results
+
+        test_results = grade_result.get("test_results", [])
+
         for i, test in enumerate(test_cases):
-            try:
-                grade_result = grade_submission(code, [test], language)
-                passed = grade_result.get("test_results", [{}])[0].get("passed", False)
-
-                if passed:
-                    results["passed"] += 1
-
-                results["details"].append(
-                    {
-                        "test": i + 1,
-                        "passed": passed,
-                        "input": test.get("input", ""),
-                        "expected": test.get("expected", ""),
-                        "actual": grade_result.get("test_results", [{}])[0].get(
-                            "actual_output", ""
-                        ),
-                    }
-                )
-            except (ValueError, KeyError, AttributeError) as e:
-                results["details"].append({"test": i + 1, "error": str(e)})
+            test_result = (
+                test_results[i] if i < len(test_results) else {"error": "No result returned"}
+            )
+            passed = test_result.get("passed", False)
+
+            if passed:
+                results["passed"] += 1
+
+            detail = {
+                "test": i + 1,
+                "passed": passed,
+                "input": test.get("input", ""),
+                "expected": test.get("expected", ""),
+                "actual": test_result.get("actual_output", ""),
+            }
+            # Code that fails to run is still a failed test, with the error alongside
+            if test_result.get("error"):
+                detail["error"] = test_result["error"]
+            results["details"].append(detail)
 
         results["success_rate"] = (
             results["passed"] / results["total"] if results["total"] > 0 else 0
@@ -183,8 +199,7 @@ class EngineeringLabGradingService:
         efficiency = 80  # Default good score
         if hasattr(analysis, "big_o_analysis"):
             complexity = analysis.big_o_analysis.get("time_complexity", "O(n)")
-            efficiency_map = {"O(1)": 100, "O(log n)": 90, "O(n)": 80, "O(n²)": 50}
-            efficiency = efficiency_map.get(complexity, 60)
+            efficiency = _EFFICIENCY_MAP.get(complexity, 60)
         efficiency_points = (efficiency * criteria.get("efficiency", 30)) / 100
 
         total = correctness_points + quality_points + efficiency_points
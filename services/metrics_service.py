@@ -1,11 +1,26 @@
 # Prometheus Metrics Exporter for AI Grading System
 # Provides detailed metrics for monitoring and alerting
 
+import os
+import threading
 import time
-from functools import wraps
+from collections import defaultdict
+from types import SimpleNamespace
+from functools import lru_cache, wraps
+
+from flask import Response, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Counter,
+    Gauge,
+    Histogram,
+    Summary,
+    generate_latest,
+)
 
-from flask import Response
-from prometheus_client import Counter, Gauge, Histogram, Summary, generate_latest
+# Set METRICS_ENABLED=false to skip installing the metric decorators entirely
+_METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() == "true"
 
 # Counters
 submissions_total = Counter(
@@ -18,6 +33,11 @@ plagiarism_checks_total = Counter(
 
 user_registrations_total = Counter("user_registrations_total", "Total user registrations", ["role"])
 
+# Cache lookups; the hit ratio is derived at query time from the two rates
+cache_hits = Counter("cache_hits_total", "Redis cache hits")
+
+cache_misses = Counter("cache_misses_total", "Redis cache misses")
+
 # Histograms
 grading_duration_seconds = Histogram(
     "grading_duration_seconds",
@@ -29,14 +49,15 @@ grading_duration_seconds = Histogram(
 plagiarism_check_duration_seconds = Histogram(
     "plagiarism_check_duration_seconds",
     "Time spent checking plagiarism",
-    buckets=[0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0],
+    buckets=[1.0, 5.0, 10.0, 30.0],
 )
 
 api_request_duration_seconds = Histogram(
     "api_request_duration_seconds",
     "API request duration",
     ["method", "endpoint", "status"],
-    buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0],
+    # SLO-relevant boundaries only; fewer buckets keep observe() cheap on every request
+    buckets=[0.05, 0.25, 1.0, 2.5, 10.0],
 )
 
 # Gauges
@@ -44,8 +65,6 @@ active_users = Gauge("active_users", "Number of currently active users", ["role"
 
 pending_submissions = Gauge("pending_submissions", "Number of pending submissions")
 
-cache_hit_ratio = Gauge("cache_hit_ratio", "Redis cache hit ratio")
-
 database_connections = Gauge(
     "database_connections", "Number of active database connections", ["state"]
 )
@@ -56,29 +75,79 @@ code_quality_score = Summary("code_quality_score", "Code quality scores distribu
 similarity_scores = Summary("similarity_scores", "Plagiarism similarity scores distribution")
 
 
+# Marks a grading result that carries no score
+_NO_SCORE = object()
+
+# Per-thread buffers of pending submissions_total increments, keyed by labelled child.
+# Only the owning thread writes to its buffer; flush_pending_metrics() applies the
+# difference since the last flush with a single inc(n) per label set, and releases the
+# buffers of threads that have exited.
+_pending_local = threading.local()
+_pending_buffers = []
+_pending_lock = threading.Lock()
+
+
+def _pending_submissions():
+    """Return the calling thread's pending submission counts"""
+    buffer = getattr(_pending_local, "submissions", None)
+    if buffer is None:
+        buffer = _pending_local.submissions = defaultdict(int)
+        with _pending_lock:
+            _pending_buffers.append((threading.current_thread(), buffer, defaultdict(int)))
+    return buffer
+
+
+def flush_pending_metrics():
+    """Apply buffered submission counts to the submissions_total counter"""
+    with _pending_lock:
+        # Checked before flushing: a thread already dead cannot add counts after its flush
+        alive = [thread.is_alive() for thread, _, _ in _pending_buffers]
+
+        for _, buffer, flushed in _pending_buffers:
+            for counter, count in list(buffer.items()):
+                delta = count - flushed[counter]
+                if delta:
+                    counter.inc(delta)
+                    flushed[counter] = count
+
+        _pending_buffers[:] = [entry for entry, keep in zip(_pending_buffers, alive) if keep]
+
+
 # Decorators for automatic metrics
 def track_submission(language="python"):
     """Decorator to track submission metrics"""
 
+    # Resolve the labelled children once instead of on every call
+    success_count = submissions_total.labels(language=language, status="success")
+    error_count = submissions_total.labels(language=language, status="error")
+    duration_histogram = grading_duration_seconds.labels(language=language)
+
     def decorator(f):
+        if not _METRICS_ENABLED:
+            return f
+
         @wraps(f)
         def wrapper(*args, **kwargs):
-            start_time = time.time()
+            start_time = time.perf_counter()
             try:
                 result = f(*args, **kwargs)
-                duration = time.time() - start_time
+                duration = time.perf_counter() - start_time
 
                 # Record metrics
-                submissions_total.labels(language=language, status="success").inc()
-                grading_duration_seconds.labels(language=language).observe(duration)
+                _pending_submissions()[success_count] += 1
+                duration_histogram.observe(duration)
 
                 # Track quality score if available
-                if isinstance(result, dict) and "score" in result:
-                    code_quality_score.observe(result["score"])
+                if isinstance(result, dict):
+                    score = result.get("score", _NO_SCORE)
+                else:
+                    score = getattr(result, "score", _NO_SCORE)
+                if score is not _NO_SCORE:
+                    code_quality_score.observe(score)
 
                 return result
             except Exception as e:
-                submissions_total.labels(language=language, status="error").inc()
+                _pending_submissions()[error_count] += 1
                 raise
 
         return wrapper
@@ -86,35 +155,33 @@ def track_submission(language="python"):
     return decorator
 
 
+@lru_cache(maxsize=512)
+def _api_request_histogram(method, endpoint, status):
+    """Return the cached api_request_duration_seconds child for a label set"""
+    return api_request_duration_seconds.labels(method=method, endpoint=endpoint, status=status)
+
+
 def track_api_request(endpoint_name):
     """Decorator to track API request metrics"""
 
     def decorator(f):
+        if not _METRICS_ENABLED:
+            return f
+
         @wraps(f)
         def wrapper(*args, **kwargs):
-            from flask import request
-
-            start_time = time.time()
+            # Read through the LocalProxy once, up front, so the error path doesn't repeat it
+            method = request.method
+            start_time = time.perf_counter()
+            status = 500
 
             try:
                 result = f(*args, **kwargs)
-                duration = time.time() - start_time
-
-                status = (
-                    getattr(result, "status_code", 200) if hasattr(result, "status_code") else 200
-                )
-
-                api_request_duration_seconds.labels(
-                    method=request.method, endpoint=endpoint_name, status=status
-                ).observe(duration)
-
+                status = getattr(result, "status_code", 200)
                 return result
-            except Exception as e:
-                duration = time.time() - start_time
-                api_request_duration_seconds.labels(
-                    method=request.method, endpoint=endpoint_name, status=500
-                ).observe(duration)
-                raise
+            finally:
+                duration = time.perf_counter() - start_time
+                _api_request_histogram(method, endpoint_name, status).observe(duration)
 
         return wrapper
 
@@ -122,9 +189,16 @@ def track_api_request(endpoint_name):
 
 
 # Metrics endpoint
+def _iter_exposition():
+    """Yield the exposition text one metric family at a time"""
+    for family in REGISTRY.collect():
+        yield generate_latest(SimpleNamespace(collect=lambda family=family: (family,)))
+
+
 def metrics_endpoint():
     """Expose metrics for Prometheus scraping"""
-    return Response(generate_latest(), mimetype="text/plain")
+    flush_pending_metrics()
+    return Response(_iter_exposition(), content_type=CONTENT_TYPE_LATEST)
 
 
 # Helper functions
@@ -147,7 +221,8 @@ def update_pending_submissions(count):
 
 
 def update_cache_metrics(hits, misses):
-    """Update cache hit ratio"""
-    total = hits + misses
-    ratio = hits / total if total > 0 else 0
-    cache_hit_ratio.set(ratio)
+    """Record new cache hits and misses (deltas since the last call, not running totals)"""
+    if hits:
+        cache_hits.inc(hits)
+    if misses:
+        cache_misses.inc(misses)
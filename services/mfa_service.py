@@ -3,19 +3,47 @@ Multi-Factor Authentication (MFA) Service
 Implements TOTP-based two-factor authentication
 """
 import pyotp
-import qrcode
-import io
-import base64
+import hmac
+import os
 from datetime import datetime
 from typing import Dict, Optional, Tuple
 
+from cachetools import TTLCache
+
+from services.otp_service import _render_qr_png_b64
+
+# TOTP objects are cached per user for this many seconds. Other worker processes only
+# see a secret change once their entry expires, so keep this short.
+_TOTP_CACHE_TTL = 60
+
+
+def _backup_code_key() -> bytes:
+    """
+    Server-side pepper for backup-code digests; never stored alongside the codes
+
+    Raises:
+        RuntimeError: If neither MFA_BACKUP_CODE_KEY nor SECRET_KEY is configured
+    """
+    key = os.environ.get('MFA_BACKUP_CODE_KEY') or os.environ.get('SECRET_KEY')
+    if not key:
+        raise RuntimeError('MFA_BACKUP_CODE_KEY or SECRET_KEY must be set to use backup codes')
+    return key.encode()
+
+
+def _backup_code_digest(user_id: str, code: str) -> str:
+    """HMAC-SHA256 of a backup code, keyed with the pepper and the owning user"""
+    return hmac.new(_backup_code_key() + str(user_id).encode(), code.encode(), 'sha256').hexdigest()
+
 
 class MFAService:
     """Service for handling Multi-Factor Authentication"""
 
+    __slots__ = ('db', 'users_collection', '_totp_cache')
+
     def __init__(self, db):
         self.db = db
         self.users_collection = db['users']
+        self._totp_cache = TTLCache(maxsize=10_000, ttl=_TOTP_CACHE_TTL)
 
     def generate_secret(self, user_id: str) -> str:
         """
@@ -28,6 +56,7 @@ class MFAService:
             Base32 encoded secret
         """
         secret = pyotp.random_base32()
+        self._totp_cache.pop(user_id, None)
 
         # Store secret in database
         self.users_collection.update_one(
@@ -62,19 +91,7 @@ class MFAService:
             issuer_name=issuer
         )
 
-        # Generate QR code
-        qr = qrcode.QRCode(version=1, box_size=10, border=5)
-        qr.add_data(provisioning_uri)
-        qr.make(fit=True)
-
-        img = qr.make_image(fill_color="black", back_color="white")
-
-        # Convert to base64
-        buffer = io.BytesIO()
-        img.save(buffer, format='PNG')
-        img_str = base64.b64encode(buffer.getvalue()).decode()
-
-        return f"data:image/png;base64,{img_str}"
+        return f"data:image/png;base64,{_render_qr_png_b64(provisioning_uri)}"
 
     def verify_token(self, user_id: str, token: str) -> bool:
         """
@@ -87,13 +104,16 @@ class MFAService:
         Returns:
             True if token is valid, False otherwise
         """
-        user = self.users_collection.find_one({'_id': user_id})
+        totp = self._totp_cache.get(user_id)
 
-        if not user or 'mfa_secret' not in user:
-            return False
+        if totp is None:
+            user = self.users_collection.find_one({'_id': user_id}, {'mfa_secret': 1})
 
-        secret = user['mfa_secret']
-        totp = pyotp.TOTP(secret)
+            if not user or 'mfa_secret' not in user:
+                return False
+
+            totp = pyotp.TOTP(user['mfa_secret'])
+            self._totp_cache[user_id] = totp
 
         # Verify token (allows 1 time step before/after for clock skew)
         return totp.verify(token, valid_window=1)
@@ -141,6 +161,7 @@ class MFAService:
         """
         # Verify password (implement password verification)
         # For now, just disable
+        self._totp_cache.pop(user_id, None)
 
         self.users_collection.update_one(
             {'_id': user_id},
@@ -171,14 +192,16 @@ class MFAService:
         """
         import secrets
 
+        # One draw of random material, 4 bytes per half of each code
+        raw = secrets.token_bytes(8 * count)
         backup_codes = [
-            f"{secrets.randbelow(10000):04d}-{secrets.randbelow(10000):04d}"
-            for _ in range(count)
+            f"{int.from_bytes(raw[i:i + 4], 'big') % 10000:04d}-"
+            f"{int.from_bytes(raw[i + 4:i + 8], 'big') % 10000:04d}"
+            for i in range(0, 8 * count, 8)
         ]
 
-        # Store hashed backup codes
-        from passlib.hash import bcrypt
-        hashed_codes = [bcrypt.hash(code) for code in backup_codes]
+        # Store peppered digests of the backup codes
+        hashed_codes = [{'i': _backup_code_digest(user_id, code)} for code in backup_codes]
 
         self.users_collection.update_one(
             {'_id': user_id},
@@ -203,22 +226,40 @@ class MFAService:
         Returns:
             True if code is valid, False otherwise
         """
+        digest = _backup_code_digest(user_id, code)
+
+        # Match on the digest and consume the entry in a single round trip
+        user = self.users_collection.find_one_and_update(
+            {'_id': user_id, 'backup_codes.i': digest},
+            {'$pull': {'backup_codes': {'i': digest}}},
+            projection={'backup_codes': {'$elemMatch': {'i': digest}}}
+        )
+
+        if user:
+            return hmac.compare_digest(user['backup_codes'][0]['i'], digest)
+
+        return self._verify_legacy_backup_code(user_id, code)
+
+    def _verify_legacy_backup_code(self, user_id: str, code: str) -> bool:
+        """Check codes stored as bare bcrypt hashes, from before the HMAC digests"""
         from passlib.hash import bcrypt
 
-        user = self.users_collection.find_one({'_id': user_id})
+        user = self.users_collection.find_one({'_id': user_id}, {'backup_codes': 1})
 
         if not user or 'backup_codes' not in user:
             return False
 
-        # Check each backup code
-        for i, hashed_code in enumerate(user['backup_codes']):
-            if bcrypt.verify(code, hashed_code):
-                # Remove used backup code
-                self.users_collection.update_one(
-                    {'_id': user_id},
-                    {'$pull': {'backup_codes': hashed_code}}
-                )
-                return True
+        for hashed_code in user['backup_codes']:
+            # Digest entries were already matched by verify_backup_code's query
+            if not isinstance(hashed_code, str) or not bcrypt.verify(code, hashed_code):
+                continue
+
+            # Remove used backup code
+            self.users_collection.update_one(
+                {'_id': user_id},
+                {'$pull': {'backup_codes': hashed_code}}
+            )
+            return True
 
         return False
 
@@ -232,7 +273,7 @@ class MFAService:
         Returns:
             True if MFA is enabled, False otherwise
         """
-        user = self.users_collection.find_one({'_id': user_id})
+        user = self.users_collection.find_one({'_id': user_id}, {'mfa_enabled': 1})
         return user and user.get('mfa_enabled', False)
 
     def get_mfa_status(self, user_id: str) -> Dict:
@@ -245,15 +286,71 @@ class MFAService:
         Returns:
             Dictionary with MFA status information
         """
-        user = self.users_collection.find_one({'_id': user_id})
+        # Let Mongo count the backup codes instead of shipping the hashed array back
+        user = next(self.users_collection.aggregate([
+            {'$match': {'_id': user_id}},
+            {'$project': {
+                'mfa_enabled': 1,
+                'mfa_setup_date': 1,
+                'mfa_enabled_date': 1,
+                'configured': {'$cond': [{'$ifNull': ['$mfa_secret', False]}, True, False]},
+                'backup_codes_remaining': {'$size': {'$ifNull': ['$backup_codes', []]}}
+            }}
+        ]), None)
 
         if not user:
             return {'enabled': False, 'configured': False}
 
         return {
             'enabled': user.get('mfa_enabled', False),
-            'configured': 'mfa_secret' in user,
+            'configured': user['configured'],
             'setup_date': user.get('mfa_setup_date'),
             'enabled_date': user.get('mfa_enabled_date'),
-            'backup_codes_remaining': len(user.get('backup_codes', []))
+            'backup_codes_remaining': user['backup_codes_remaining']
         }
+
+    def bulk_is_mfa_enabled(self, user_ids: list) -> Dict[str, bool]:
+        """
+        Check MFA status for many users with a single query
+
+        Args:
+            user_ids: User identifiers
+
+        Returns:
+            Dictionary mapping each user identifier to whether MFA is enabled
+        """
+        enabled = {user_id: False for user_id in user_ids}
+
+        for user in self.users_collection.find({'_id': {'$in': list(enabled)}}, {'mfa_enabled': 1}):
+            enabled[user['_id']] = bool(user.get('mfa_enabled', False))
+
+        return enabled
+
+    def bulk_disable_mfa(self, user_ids: list) -> int:
+        """
+        Disable MFA for many users with a single update (admin use, no password check)
+
+        Args:
+            user_ids: User identifiers
+
+        Returns:
+            Number of user records modified
+        """
+        for user_id in user_ids:
+            self._totp_cache.pop(user_id, None)
+
+        result = self.users_collection.update_many(
+            {'_id': {'$in': list(user_ids)}},
+            {
+                '$set': {
+                    'mfa_enabled': False,
+                    'mfa_disabled_date': datetime.utcnow()
+                },
+                '$unset': {
+                    'mfa_secret': '',
+                    'backup_codes': ''
+                }
+            }
+        )
+
+        return result.modified_count
@@ -3,33 +3,57 @@ import io
 
 import pyotp
 import qrcode
+from qrcode.image.pure import PyPNGImage
+
+
+def _render_qr_png_b64(provisioning_uri):
+    """Render a provisioning URI as a base64 PNG QR code"""
+    # pypng writes the 1-bit matrix directly instead of going through a PIL RGB buffer
+    qr = qrcode.QRCode(version=1, box_size=10, border=5, image_factory=PyPNGImage)
+    qr.add_data(provisioning_uri)
+    qr.make(fit=True)
+
+    img = qr.make_image()
+    buffered = io.BytesIO()
+    img.save(buffered)
+    return base64.b64encode(buffered.getvalue()).decode("utf-8")
+
+
+def generate_secret():
+    """Generate a random base32 secret"""
+    return pyotp.random_base32()
+
+
+def get_provisioning_uri(secret, username, issuer_name="AI Grading System"):
+    """Generate the provisioning URI for QR code"""
+    return pyotp.totp.TOTP(secret).provisioning_uri(name=username, issuer_name=issuer_name)
+
+
+def get_setup_payload(secret, username, issuer_name="AI Grading System"):
+    """Build the provisioning URI and its QR code together; returns (uri, qr_code_b64)
+
+    Prefer this over calling get_provisioning_uri and generate_qr_code separately.
+    """
+    uri = pyotp.TOTP(secret).provisioning_uri(name=username, issuer_name=issuer_name)
+    return uri, _render_qr_png_b64(uri)
+
+
+def verify_otp(secret, otp_code):
+    """Verify the provided OTP code"""
+    totp = pyotp.totp.TOTP(secret)
+    return totp.verify(otp_code)
+
+
+def generate_qr_code(provisioning_uri):
+    """Generate a QR code image as base64 string"""
+    return _render_qr_png_b64(provisioning_uri)
 
 
 class OTPService:
-    @staticmethod
-    def generate_secret():
-        """Generate a random base32 secret"""
-        return pyotp.random_base32()
-
-    @staticmethod
-    def get_provisioning_uri(secret, username, issuer_name="AI Grading System"):
-        """Generate the provisioning URI for QR code"""
-        return pyotp.totp.TOTP(secret).provisioning_uri(name=username, issuer_name=issuer_name)
-
-    @staticmethod
-    def verify_otp(secret, otp_code):
-        """Verify the provided OTP code"""
-        totp = pyotp.totp.TOTP(secret)
-        return totp.verify(otp_code)
-
-    @staticmethod
-    def generate_qr_code(provisioning_uri):
-        """Generate a QR code image as base64 string"""
-        qr = qrcode.QRCode(version=1, box_size=10, border=5)
-        qr.add_data(provisioning_uri)
-        qr.make(fit=True)
-
-        img = qr.make_image(fill_color="black", back_color="white")
-        buffered = io.BytesIO()
-        img.save(buffered, format="PNG")
-        return base64.b64encode(buffered.getvalue()).decode("utf-8")
+    """Namespace kept for existing callers; new code should use the module functions"""
+
+    generate_secret = staticmethod(generate_secret)
+    get_provisioning_uri = staticmethod(get_provisioning_uri)
+    get_setup_payload = staticmethod(get_setup_payload)
+    verify_otp = staticmethod(verify_otp)
+    generate_qr_code = staticmethod(generate_qr_code)
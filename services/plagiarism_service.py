@@ -3,32 +3,201 @@
 This module provides functionality for the AI Grading System.
 """
 
-from flask import current_app
-
-try:
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.metrics.pairwise import cosine_similarity
-
-    SKLEARN_AVAILABLE = True
-except ImportError:
-    SKLEARN_AVAILABLE = False
-    TfidfVectorizer = None
-    cosine_similarity = None
-    print("Warning: scikit-learn not available. Using fallback similarity methods.")
 import ast
+import atexit
 import difflib
 import hashlib
+import heapq
+import itertools
 import json
+import multiprocessing
+import os
 import re
+import string
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import asdict, dataclass
 from datetime import datetime
 from enum import Enum
-
-# import numpy as np  # Optional dependency
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
 
+from cachetools import LRUCache
+from flask import current_app
+
 from settings import Config
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+# Flags shared by every detector pattern; none anchor on ^/$ so MULTILINE is harmless
+_PATTERN_FLAGS = re.IGNORECASE | re.MULTILINE
+
+# Normalization and tokenization patterns, compiled once at import
+_PY_COMMENT = re.compile(r"#.*")
+_SLASH_COMMENT = re.compile(r"//.*")
+_BLOCK_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+_PY_DOCSTRING = re.compile(r'""".*?"""', re.DOTALL)
+_PY_SINGLE_DOCSTRING = re.compile(r"'''.*?'''", re.DOTALL)
+_CODE_TOKEN = re.compile(
+    r"(?P<op>[+\-*/=<>!&|]+)|(?P<punct>[(){}\[\],;])|(?P<ws>\s+)"
+    r"|(?P<word>[^\s+\-*/=<>!&|(){}\[\],;]+)"
+)
+_IDENTIFIER = re.compile(r"\b[a-zA-Z_]\w*\b")
+_WORD = re.compile(r"\b\w+\b")
+_SKELETON_TOKEN = re.compile(r"\w+|\S")
+_IDENTIFIER_START = frozenset(string.ascii_letters + "_")
+
+# ASCII punctuation other than "_" becomes a space, so split() yields the same words as
+# _WORD for pure-ASCII code without running the regex engine
+_WORD_TRANSLATION = str.maketrans(dict.fromkeys(string.punctuation.replace("_", ""), " "))
+
+# Submissions sharing fewer distinct word tokens than this (or than the checked code has,
+# if fewer) with the checked code are not scored at all, unless the code is identical
+_MIN_SHARED_TOKENS = 3
+
+# Submission fields the plagiarism checks read; grades, feedback and test output stay in Mongo
+_SUBMISSION_PROJECTION = {"code": 1, "language": 1, "student_id": 1, "submitted_at": 1}
+
+# Same-language submissions whose structural SimHash differs from the checked code's in
+# this many of its 64 bits or more are not scored at all
+_SIMHASH_MAX_DISTANCE = 20
+
+# Decimal places kept on heat-map floats; the client renders 8-bit colour, so anything past
+# this only adds bytes to the JSON response
+_HEAT_PRECISION = 3
+
+# Uncached submissions analyzed per check before the work is spread over worker processes
+_PARALLEL_MIN_SUBMISSIONS = 32
+
+# Batch pairs left after TF-IDF pruning before their scoring is spread over worker processes
+_PARALLEL_MIN_PAIRS = 2048
+
+# Worker processes shared by every detector instance; capped so that each web worker on a
+# many-core host does not start one process per core
+_PROCESS_POOL_WORKERS = min(4, os.cpu_count() or 1)
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+# Width of the character shingles compared by calculate_sequence_similarity
+_SHINGLE_SIZE = 3
+
+# Combined length of a code pair up to which sequence similarity is a SequenceMatcher
+# ratio; longer pairs are scored from character shingles, since the alignment is quadratic
+_SEQUENCE_MATCHER_MAX_CHARS = 4000
+
+# Width of the token shingles compared by the rename-obfuscation check
+_SKELETON_SHINGLE_SIZE = 3
+
+# Node types per k-gram in the AST fingerprints compared by batch structural similarity
+_AST_SHINGLE_SIZE = 4
+
+# AST node types counted by extract_structural_features, keyed to their feature
+_AST_FEATURE_NAMES = (
+    "functions",
+    "classes",
+    "loops",
+    "conditionals",
+    "imports",
+    "assignments",
+    "function_calls",
+    "depth",
+)
+_AST_FEATURE_BUCKETS = {
+    "FunctionDef": "functions",
+    "ClassDef": "classes",
+    "For": "loops",
+    "While": "loops",
+    "If": "conditionals",
+    "Import": "imports",
+    "ImportFrom": "imports",
+    "Assign": "assignments",
+    "Call": "function_calls",
+}
+
+# Structural patterns used by calculate_pattern_similarity for non-Python code
+_STRUCTURE_PATTERNS = [
+    re.compile(r"\bdef\s+\w+", re.IGNORECASE),  # Python functions
+    re.compile(r"\bpublic\s+\w+", re.IGNORECASE),  # Java methods
+    re.compile(r"\bfor\s*\(", re.IGNORECASE),  # for loops
+    re.compile(r"\bwhile\s*\(", re.IGNORECASE),  # while loops
+    re.compile(r"\bif\s*\(", re.IGNORECASE),  # if statements
+    re.compile(r"\breturn\s+", re.IGNORECASE),  # return statements
+    re.compile(r"\bclass\s+\w+", re.IGNORECASE),  # class definitions
+]
+
+# Literal each _STRUCTURE_PATTERNS entry starts with; a pattern cannot match code that
+# lacks it, which a substring check finds far faster than the regex engine
+_STRUCTURE_KEYWORDS = ("def", "public", "for", "while", "if", "return", "class")
+
+# _STRUCTURE_PATTERNS on the linear-time RE2 engine when it is installed. RE2's \b and \w
+# are ASCII-only, so these are only ever run on ASCII code
+_ASCII_STRUCTURE_PATTERNS = (
+    [re2.compile("(?i)" + pattern.pattern) for pattern in _STRUCTURE_PATTERNS]
+    if re2 is not None
+    else _STRUCTURE_PATTERNS
+)
+
+
+def _rx(pattern: str) -> re.Pattern:
+    """Compile a detector pattern with the shared flags"""
+    return re.compile(pattern, _PATTERN_FLAGS)
+
+
+def _normalize_tokens(code: str) -> str:
+    """Lowercase code and respace it in one scan: operators get a space either side,
+    punctuation none, other whitespace collapses to one space and blank lines are dropped.
+    """
+    lines = []
+    line = []
+    prev = None
+
+    for match in _CODE_TOKEN.finditer(code.lower()):
+        kind = match.lastgroup
+        text = match.group()
+
+        if kind == "ws":
+            if "\n" in text:
+                if line:
+                    lines.append("".join(line).strip())
+                    line = []
+                prev = None
+            elif prev == "word":
+                prev = "space"
+            continue
+
+        if kind == "op":
+            line.append(f"{text} " if prev == "punct" else f" {text} ")
+        elif kind == "punct":
+            if prev == "op":
+                line[-1] = line[-1].rstrip(" ")
+            line.append(text)
+        else:
+            if prev == "space":
+                line.append(" ")
+            line.append(text)
+
+        prev = kind
+
+    if line:
+        lines.append("".join(line).strip())
+
+    return "\n".join(line for line in lines if line)
+
 
 class LanguageType(Enum):
     """Supported programming languages for cross-language detection"""
@@ -40,6 +209,32 @@ class LanguageType(Enum):
     C = "c"
 
 
+@dataclass(frozen=True)
+class SubmissionFeatures:
+    """Per-submission analysis reused by every pairwise comparison it takes part in"""
+
+    blank: bool
+    ast_features: Optional[Dict]  # None when the code is not valid Python
+    ast_error: bool  # parsing failed with something other than SyntaxError
+    pattern_counts: Dict
+    algorithm_matches: Dict
+    identifiers: frozenset
+    skeleton_shingles: frozenset
+    tokens: frozenset  # lowercased word tokens, for the shared-token prefilter
+    shingles: frozenset
+    fingerprint: int  # 64-bit SimHash of skeleton_shingles
+
+
+@dataclass(frozen=True)
+class CodeScan:
+    """Single pass over one code string shared by the module-level comparison helpers"""
+
+    pattern_counts: Tuple[int, ...]  # matches per _STRUCTURE_PATTERNS entry, in order
+    identifiers: frozenset
+    line_counts: Counter  # stripped non-blank lines; read-only
+    line_total: int
+
+
 @dataclass
 class SimilarityMatch:
     """Enhanced similarity match with visualization data"""
@@ -55,89 +250,159 @@ class SimilarityMatch:
     heat_map_data: Optional[Dict] = None
 
 
+# Constructs that look alike across programming languages, per category and language
+_CROSS_LANGUAGE_PATTERNS = {
+    "control_structures": {
+        "for_loop": {
+            "python": _rx(r"for\s+\w+\s+in\s+range\("),
+            "java": _rx(r"for\s*\(.*\)\s*\{"),
+            "cpp": _rx(r"for\s*\(.*\)\s*\{"),
+            "javascript": _rx(r"for\s*\(.*\)\s*\{"),
+        },
+        "while_loop": {
+            "python": _rx(r"while\s+.*:"),
+            "java": _rx(r"while\s*\(.*\)\s*\{"),
+            "cpp": _rx(r"while\s*\(.*\)\s*\{"),
+            "javascript": _rx(r"while\s*\(.*\)\s*\{"),
+        },
+        "if_statement": {
+            "python": _rx(r"if\s+.*:"),
+            "java": _rx(r"if\s*\(.*\)\s*\{"),
+            "cpp": _rx(r"if\s*\(.*\)\s*\{"),
+            "javascript": _rx(r"if\s*\(.*\)\s*\{"),
+        },
+    },
+    "function_definitions": {
+        "python": _rx(r"def\s+\w+\s*\("),
+        "java": _rx(r"(public|private|protected)?\s*(static)?\s*\w+\s+\w+\s*\("),
+        "cpp": _rx(r"\w+\s+\w+\s*\("),
+        "javascript": _rx(r"function\s+\w+\s*\("),
+    },
+    "variable_declarations": {
+        "python": _rx(r"\w+\s*=\s*"),
+        "java": _rx(r"\w+\s+\w+\s*=\s*"),
+        "cpp": _rx(r"\w+\s+\w+\s*=\s*"),
+        "javascript": _rx(r"(var|let|const)\s+\w+\s*=\s*"),
+    },
+}
+
+
+# Pattern signatures of common algorithm implementations across languages
+_ALGORITHM_MAPPINGS = {
+    "fibonacci": {
+        "patterns": [
+            _rx(r"fibonacci|fib"),
+            _rx(r"n\s*<=\s*1"),
+            _rx(r"n\s*-\s*1.*n\s*-\s*2"),
+            _rx(r"return.*\+.*"),
+        ],
+        "description": "Fibonacci sequence implementation",
+    },
+    "factorial": {
+        "patterns": [
+            _rx(r"factorial|fact"),
+            _rx(r"n\s*<=\s*1"),
+            _rx(r"n\s*\*.*factorial"),
+            _rx(r"return.*n.*\*"),
+        ],
+        "description": "Factorial calculation",
+    },
+    "bubble_sort": {
+        "patterns": [
+            _rx(r"bubble.*sort|sort.*bubble"),
+            _rx(r"for.*for.*"),
+            _rx(r"if.*>.*swap|if.*<.*swap"),
+            _rx(r"temp\s*=|swap"),
+        ],
+        "description": "Bubble sort algorithm",
+    },
+    "binary_search": {
+        "patterns": [
+            _rx(r"binary.*search|search.*binary"),
+            _rx(r"low.*high|left.*right"),
+            _rx(r"mid.*=.*(low.*high|left.*right)"),
+            _rx(r"target.*mid"),
+        ],
+        "description": "Binary search algorithm",
+    },
+}
+
+
+def _pair_cross_language_patterns(patterns):
+    """
+    Flatten the nested cross-language table into (pattern_lang1, pattern_lang2) lists keyed
+    by ordered language pair, covering every construct both languages define
+    """
+    leaves = []
+    for group in patterns.values():
+        if all(isinstance(value, re.Pattern) for value in group.values()):
+            leaves.append(group)
+        else:
+            leaves.extend(group.values())
+
+    pairs = {}
+    for leaf in leaves:
+        for lang1, pattern1 in leaf.items():
+            for lang2, pattern2 in leaf.items():
+                if lang1 != lang2:
+                    pairs.setdefault((lang1, lang2), []).append((pattern1, pattern2))
+    return pairs
+
+
+# Comparable pattern pairs for each ordered language pair, built once from the table above
+_CROSS_LANGUAGE_PAIRS = _pair_cross_language_patterns(_CROSS_LANGUAGE_PATTERNS)
+
+
+def _mean_count_ratio(counts1, counts2):
+    """
+    Mean of min/max over paired pattern match counts; a pattern missing from either side
+    contributes 0. Written as a plain index loop so Numba can compile it unchanged
+    """
+    n = len(counts1)
+    if n == 0:
+        return 0.0
+
+    total = 0.0
+    for i in range(n):
+        m1 = counts1[i]
+        m2 = counts2[i]
+        if m1 > 0 and m2 > 0:
+            total += min(m1, m2) / max(m1, m2)
+
+    return total / n
+
+
+# Compiled reducer used when Numba is installed; it takes int64 arrays rather than lists
+_mean_count_ratio_jit = njit(cache=True)(_mean_count_ratio) if njit and np is not None else None
+
+
+def _count_ratio_similarity(counts1, counts2):
+    """_mean_count_ratio, dispatched to the compiled kernel when one is available"""
+    if _mean_count_ratio_jit is None:
+        return _mean_count_ratio(counts1, counts2)
+
+    return float(
+        _mean_count_ratio_jit(
+            np.asarray(counts1, dtype=np.int64), np.asarray(counts2, dtype=np.int64)
+        )
+    )
+
+
 class CrossLanguagePlagiarismDetector:
     def __init__(self):
         self.threshold = Config.PLAGIARISM_THRESHOLD
         self.cross_language_patterns = self._load_cross_language_patterns()
         self.algorithm_mappings = self._load_algorithm_mappings()
+        # Submissions never change, so their features are cached by content hash
+        self._feature_cache = LRUCache(maxsize=4096)
 
     def _load_cross_language_patterns(self) -> Dict:
         """Load patterns that are similar across programming languages"""
-        return {
-            "control_structures": {
-                "for_loop": {
-                    "python": r"for\s+\w+\s+in\s+range\(",
-                    "java": r"for\s*\(.*\)\s*\{",
-                    "cpp": r"for\s*\(.*\)\s*\{",
-                    "javascript": r"for\s*\(.*\)\s*\{",
-                },
-                "while_loop": {
-                    "python": r"while\s+.*:",
-                    "java": r"while\s*\(.*\)\s*\{",
-                    "cpp": r"while\s*\(.*\)\s*\{",
-                    "javascript": r"while\s*\(.*\)\s*\{",
-                },
-                "if_statement": {
-                    "python": r"if\s+.*:",
-                    "java": r"if\s*\(.*\)\s*\{",
-                    "cpp": r"if\s*\(.*\)\s*\{",
-                    "javascript": r"if\s*\(.*\)\s*\{",
-                },
-            },
-            "function_definitions": {
-                "python": r"def\s+\w+\s*\(",
-                "java": r"(public|private|protected)?\s*(static)?\s*\w+\s+\w+\s*\(",
-                "cpp": r"\w+\s+\w+\s*\(",
-                "javascript": r"function\s+\w+\s*\(",
-            },
-            "variable_declarations": {
-                "python": r"\w+\s*=\s*",
-                "java": r"\w+\s+\w+\s*=\s*",
-                "cpp": r"\w+\s+\w+\s*=\s*",
-                "javascript": r"(var|let|const)\s+\w+\s*=\s*",
-            },
-        }
+        return _CROSS_LANGUAGE_PATTERNS
 
     def _load_algorithm_mappings(self) -> Dict:
         """Load common algorithm implementations across languages"""
-        return {
-            "fibonacci": {
-                "patterns": [
-                    r"fibonacci|fib",
-                    r"n\s*<=\s*1",
-                    r"n\s*-\s*1.*n\s*-\s*2",
-                    r"return.*\+.*",
-                ],
-                "description": "Fibonacci sequence implementation",
-            },
-            "factorial": {
-                "patterns": [
-                    r"factorial|fact",
-                    r"n\s*<=\s*1",
-                    r"n\s*\*.*factorial",
-                    r"return.*n.*\*",
-                ],
-                "description": "Factorial calculation",
-            },
-            "bubble_sort": {
-                "patterns": [
-                    r"bubble.*sort|sort.*bubble",
-                    r"for.*for.*",
-                    r"if.*>.*swap|if.*<.*swap",
-                    r"temp\s*=|swap",
-                ],
-                "description": "Bubble sort algorithm",
-            },
-            "binary_search": {
-                "patterns": [
-                    r"binary.*search|search.*binary",
-                    r"low.*high|left.*right",
-                    r"mid.*=.*(low.*high|left.*right)",
-                    r"target.*mid",
-                ],
-                "description": "Binary search algorithm",
-            },
-        }
+        return _ALGORITHM_MAPPINGS
 
     def check_enhanced_plagiarism(
         self, code: str, assignment_id: str, student_id: str, language: str = "python"
@@ -152,20 +417,63 @@ class CrossLanguagePlagiarismDetector:
 
             # Normalize and analyze the submitted code
             normalized_code = self._advanced_normalize_code(code, language)
-            code_patterns = self._extract_algorithm_patterns(code, language)
+            features = self._featurize(code, language)
+            code_patterns = self._detected_algorithms(features)
+
+            # One TF-IDF fit over every submission instead of one per pair. It runs before
+            # the prefilter so that IDF weights come from the whole assignment: fitted on
+            # near-duplicates alone, their shared tokens would weigh almost nothing
+            tfidf_sims = calculate_tfidf_similarities(
+                code, [submission.get("code", "") for submission in other_submissions]
+            )
+
+            # Only score submissions that share enough vocabulary, and for the same
+            # language a close enough structural fingerprint, to be worth comparing
+            self._featurize_many(other_submissions)
+            candidates = [
+                (submission, tfidf_sim)
+                for submission, tfidf_sim in zip(other_submissions, tfidf_sims)
+                if self._is_candidate(features, language, submission)
+            ]
+            other_submissions = [submission for submission, _ in candidates]
+            tfidf_sims = [tfidf_sim for _, tfidf_sim in candidates]
+
+            # One structural pass over the candidates
+            structure_sims = _feature_structure_similarities(
+                features,
+                language,
+                [
+                    (
+                        self._featurize(
+                            submission.get("code", ""), submission.get("language", "python")
+                        ),
+                        submission.get("language", "python"),
+                    )
+                    for submission in other_submissions
+                ],
+            )
 
             similarities = []
 
-            for submission in other_submissions:
+            for submission, tfidf_sim, structure_sim in zip(
+                other_submissions, tfidf_sims, structure_sims
+            ):
                 other_code = submission.get("code", "")
                 other_language = submission.get("language", "python")
 
                 # Multi-algorithm similarity analysis
                 similarity_result = self._calculate_comprehensive_similarity(
-                    code, other_code, language, other_language, code_patterns
+                    code,
+                    other_code,
+                    language,
+                    other_language,
+                    code_patterns,
+                    tfidf_sim,
+                    structure_sim,
+                    min_similarity=0.2,
                 )
 
-                if similarity_result["overall_similarity"] > 0.2:
+                if similarity_result is not None and similarity_result["overall_similarity"] > 0.2:
                     similarities.append(
                         {
                             **similarity_result,
@@ -204,26 +512,68 @@ class CrossLanguagePlagiarismDetector:
             return self._create_error_result(str(e))
 
     def _calculate_comprehensive_similarity(
-        self, code1: str, code2: str, lang1: str, lang2: str, patterns1: Dict
-    ) -> Dict:
-        """Calculate comprehensive similarity across multiple dimensions"""
+        self,
+        code1: str,
+        code2: str,
+        lang1: str,
+        lang2: str,
+        patterns1: Dict,
+        tfidf_sim: Optional[float] = None,
+        structure_sim: Optional[float] = None,
+        min_similarity: Optional[float] = None,
+    ) -> Optional[Dict]:
+        """Calculate comprehensive similarity across multiple dimensions
+
+        tfidf_sim and structure_sim may be passed in when they were already computed for a
+        batch of submissions. With min_similarity set, None is returned as soon as the
+        overall similarity can no longer exceed it, skipping the remaining measures.
+        """
         is_cross_language = lang1 != lang2
+        features1 = self._featurize(code1, lang1)
+        features2 = self._featurize(code2, lang2)
+
+        # Measures read off the cached features come first; every measure is at most 1,
+        # so the weights of the ones not yet computed bound what is left to gain
+        sequence_sim = _sequence_similarity(
+            code1, code2, features1.shingles, features2.shingles
+        )
+        if structure_sim is None:
+            structure_sim = _feature_structure_similarity(features1, features2, lang1, lang2)
+
+        # Algorithm-specific similarity
+        algorithm_sim = self._feature_algorithm_similarity(features1, features2)
+
+        if min_similarity is not None:
+            if is_cross_language:
+                upper_bound = sequence_sim * 0.1 + structure_sim * 0.3 + algorithm_sim * 0.1 + 0.3
+                upper_bound += 0.2 if tfidf_sim is None else tfidf_sim * 0.2
+            else:
+                upper_bound = sequence_sim * 0.3 + structure_sim * 0.3 + algorithm_sim * 0.1
+                upper_bound += 0.3 if tfidf_sim is None else tfidf_sim * 0.3
+            if upper_bound < min_similarity:
+                return None
 
         # Standard similarity measures
-        tfidf_sim = self._calculate_tfidf_similarity(code1, code2)
-        sequence_sim = self._calculate_sequence_similarity(code1, code2)
-        structure_sim = self._calculate_structure_similarity(code1, code2, lang1, lang2)
+        if tfidf_sim is None:
+            tfidf_sim = self._calculate_tfidf_similarity(code1, code2)
 
         # Cross-language pattern matching
         pattern_sim = 0.0
         if is_cross_language:
+            if min_similarity is not None:
+                upper_bound = (
+                    tfidf_sim * 0.2
+                    + sequence_sim * 0.1
+                    + structure_sim * 0.3
+                    + algorithm_sim * 0.1
+                    + 0.3
+                )
+                if upper_bound < min_similarity:
+                    return None
             pattern_sim = self._calculate_cross_language_similarity(code1, code2, lang1, lang2)
 
-        # Algorithm-specific similarity
-        algorithm_sim = self._calculate_algorithm_similarity(code1, code2, patterns1)
-
         # Obfuscation detection
-        obfuscation_detected = self._detect_advanced_obfuscation(code1, code2)
+        obfuscation_detected = _feature_obfuscation(features1, features2)
 
         # Weighted combination
         if is_cross_language:
@@ -256,55 +606,103 @@ class CrossLanguagePlagiarismDetector:
     ) -> float:
         """Calculate similarity between different programming languages"""
         try:
-            pattern_matches = 0
-            total_patterns = 0
-
-            for category, patterns in self.cross_language_patterns.items():
-                if isinstance(patterns, dict) and lang1 in patterns and lang2 in patterns:
-                    # Control structures comparison
-                    for pattern_name, lang_patterns in patterns.items():
-                        if (
-                            isinstance(lang_patterns, dict)
-                            and lang1 in lang_patterns
-                            and lang2 in lang_patterns
-                        ):
-                            pattern1 = lang_patterns[lang1]
-                            pattern2 = lang_patterns[lang2]
-
-                            matches1 = len(
-                                re.findall(pattern1, code1, re.IGNORECASE | re.MULTILINE)
-                            )
-                            matches2 = len(
-                                re.findall(pattern2, code2, re.IGNORECASE | re.MULTILINE)
-                            )
-
-                            if matches1 > 0 and matches2 > 0:
-                                # Similarity based on count of pattern matches
-                                similarity = min(matches1, matches2) / max(matches1, matches2)
-                                pattern_matches += similarity
-
-                            total_patterns += 1
-
-                elif lang1 in patterns and lang2 in patterns:
-                    # Direct pattern comparison
-                    pattern1 = patterns[lang1]
-                    pattern2 = patterns[lang2]
-
-                    matches1 = len(re.findall(pattern1, code1, re.IGNORECASE | re.MULTILINE))
-                    matches2 = len(re.findall(pattern2, code2, re.IGNORECASE | re.MULTILINE))
-
-                    if matches1 > 0 and matches2 > 0:
-                        similarity = min(matches1, matches2) / max(matches1, matches2)
-                        pattern_matches += similarity
-
-                    total_patterns += 1
-
-            return pattern_matches / total_patterns if total_patterns > 0 else 0.0
+            pairs = _CROSS_LANGUAGE_PAIRS.get((lang1, lang2), ())
+
+            # Regex counting stays in Python; only the count reducer is compiled
+            counts1 = [len(pattern1.findall(code1)) for pattern1, _ in pairs]
+            counts2 = [len(pattern2.findall(code2)) for _, pattern2 in pairs]
+
+            return _count_ratio_similarity(counts1, counts2)
 
         except (ValueError, KeyError, AttributeError) as e:
             print(f"Cross-language similarity calculation failed: {str(e)}")
             return 0.0
 
+    def _featurize(self, code: str, language: str) -> SubmissionFeatures:
+        """Analyze a submission once and cache the result by content hash"""
+        key = _feature_key(code, language)
+        features = self._feature_cache.get(key)
+
+        if features is None:
+            features = _extract_submission_features(code, self.algorithm_mappings)
+            self._feature_cache[key] = features
+
+        return features
+
+    def _is_candidate(self, features: SubmissionFeatures, language: str, submission: Dict) -> bool:
+        """Cheap prefilter deciding whether a submission goes through full scoring"""
+        other_language = submission.get("language", "python")
+        other = self._featurize(submission.get("code", ""), other_language)
+
+        # Verbatim and skeleton-identical copies are always scored, however short
+        if other.fingerprint == features.fingerprint:
+            return True
+
+        min_shared = min(_MIN_SHARED_TOKENS, len(features.tokens))
+        if len(features.tokens & other.tokens) < min_shared:
+            return False
+
+        # Skeletons of different languages never line up, so only same-language pairs
+        # can be rejected on fingerprint distance
+        if other_language == language:
+            distance = (features.fingerprint ^ other.fingerprint).bit_count()
+            return distance < _SIMHASH_MAX_DISTANCE
+
+        return True
+
+    def _featurize_many(self, submissions: List[Dict]) -> None:
+        """Warm the feature cache for a batch of submissions, using worker processes
+        when enough of them are uncached to outweigh the cost of shipping the work out
+        """
+        missing = {}
+        for submission in submissions:
+            code = submission.get("code", "")
+            key = _feature_key(code, submission.get("language", "python"))
+            if key not in self._feature_cache:
+                missing[key] = code
+
+        if len(missing) < _PARALLEL_MIN_SUBMISSIONS:
+            return
+
+        features = _pool_map(_extract_feature_batch, list(missing.values()))
+        if features is None:
+            # Leave the misses to the sequential path in _featurize
+            return
+
+        for key, item in zip(missing, features):
+            self._feature_cache[key] = item
+
+    def _feature_algorithm_similarity(
+        self, features1: SubmissionFeatures, features2: SubmissionFeatures
+    ) -> float:
+        """_calculate_algorithm_similarity over precomputed pattern match counts"""
+        algorithm_scores = []
+
+        for algorithm_name, algorithm_info in self.algorithm_mappings.items():
+            matches1 = features1.algorithm_matches[algorithm_name]
+            matches2 = features2.algorithm_matches[algorithm_name]
+
+            if matches1 > 0 and matches2 > 0:
+                algorithm_scores.append(min(matches1, matches2) / len(algorithm_info["patterns"]))
+
+        return max(algorithm_scores) if algorithm_scores else 0.0
+
+    def _detected_algorithms(self, features: SubmissionFeatures) -> Dict:
+        """_extract_algorithm_patterns over precomputed pattern match counts"""
+        detected_patterns = {}
+
+        for algorithm_name, algorithm_info in self.algorithm_mappings.items():
+            patterns = algorithm_info["patterns"]
+            matches = features.algorithm_matches[algorithm_name]
+
+            if matches >= len(patterns) * 0.6:  # 60% of patterns must match
+                detected_patterns[algorithm_name] = {
+                    "confidence": matches / len(patterns),
+                    "description": algorithm_info["description"],
+                }
+
+        return detected_patterns
+
     def _calculate_algorithm_similarity(self, code1: str, code2: str, patterns1: Dict) -> float:
         """Calculate similarity based on algorithmic patterns"""
         try:
@@ -314,12 +712,8 @@ class CrossLanguagePlagiarismDetector:
                 patterns = algorithm_info["patterns"]
 
                 # Check how many patterns match in both codes
-                matches1 = sum(
-                    1 for pattern in patterns if re.search(pattern, code1, re.IGNORECASE)
-                )
-                matches2 = sum(
-                    1 for pattern in patterns if re.search(pattern, code2, re.IGNORECASE)
-                )
+                matches1 = sum(1 for pattern in patterns if pattern.search(code1))
+                matches2 = sum(1 for pattern in patterns if pattern.search(code2))
 
                 if matches1 > 0 and matches2 > 0:
                     # Both codes implement similar algorithm
@@ -335,23 +729,26 @@ class CrossLanguagePlagiarismDetector:
         """Generate data for similarity heat map visualization"""
         try:
             lines = original_code.split("\n")
-            heat_map = [[0.0 for _ in range(len(line))] for line in lines]
 
-            for similarity in similarities:
-                if similarity["overall_similarity"] > 0.3:
-                    # Mark similar regions with heat intensity
-                    intensity = min(1.0, similarity["overall_similarity"])
+            # For now the heat is uniform (in real implementation, this would be based
+            # on actual line-by-line matching), so one intensity plus the line widths is
+            # enough for the client to fill the per-character grid
+            uniform_intensity = max(
+                (
+                    min(1.0, similarity["overall_similarity"]) * 0.7
+                    for similarity in similarities
+                    if similarity["overall_similarity"] > 0.3
+                ),
+                default=0.0,
+            )
 
-                    # For now, apply uniform heat (in real implementation,
-                    # this would be based on actual line-by-line matching)
-                    for i in range(len(heat_map)):
-                        for j in range(len(heat_map[i])):
-                            heat_map[i][j] = max(heat_map[i][j], intensity * 0.7)
+            max_similarity = max((s["overall_similarity"] for s in similarities), default=0.0)
 
             return {
-                "heat_map": heat_map,
+                "uniform_intensity": round(uniform_intensity, _HEAT_PRECISION),
+                "line_widths": [len(line) for line in lines],
                 "line_count": len(lines),
-                "max_similarity": max((s["overall_similarity"] for s in similarities), default=0.0),
+                "max_similarity": round(max_similarity, _HEAT_PRECISION),
                 "similar_regions": self._identify_similar_regions(similarities),
             }
 
@@ -384,7 +781,7 @@ class CrossLanguagePlagiarismDetector:
 
         for algorithm_name, algorithm_info in self.algorithm_mappings.items():
             patterns = algorithm_info["patterns"]
-            matches = sum(1 for pattern in patterns if re.search(pattern, code, re.IGNORECASE))
+            matches = sum(1 for pattern in patterns if pattern.search(code))
 
             if matches >= len(patterns) * 0.6:  # 60% of patterns must match
                 detected_patterns[algorithm_name] = {
@@ -399,23 +796,14 @@ class CrossLanguagePlagiarismDetector:
         try:
             # Language-specific comment removal
             if language in ["python"]:
-                code = re.sub(r"#.*", "", code)
-                code = re.sub(r'""".*?"""', "", code, flags=re.DOTALL)
+                code = _PY_COMMENT.sub("", code)
+                code = _PY_DOCSTRING.sub("", code)
             elif language in ["java", "cpp", "javascript", "c"]:
-                code = re.sub(r"//.*", "", code)
-                code = re.sub(r"/\*.*?\*/", "", code, flags=re.DOTALL)
-
-            # Remove extra whitespace and normalize
-            lines = []
-            for line in code.split("\n"):
-                line = line.strip()
-                if line:
-                    # Normalize operators and delimiters
-                    line = re.sub(r"\s*([+\-*/=<>!&|]+)\s*", r" \1 ", line)
-                    line = re.sub(r"\s*([(){}\[\],;])\s*", r"\1", line)
-                    lines.append(line.lower())
+                code = _SLASH_COMMENT.sub("", code)
+                code = _BLOCK_COMMENT.sub("", code)
 
-            return "\n".join(lines)
+            # Remove extra whitespace and normalize operators and delimiters
+            return _normalize_tokens(code)
 
         except (ValueError, KeyError, AttributeError) as e:
             return code.lower().strip()
@@ -424,17 +812,16 @@ class CrossLanguagePlagiarismDetector:
         """Detect sophisticated obfuscation techniques"""
         try:
             # Variable name systematic changes
-            vars1 = set(re.findall(r"\b[a-zA-Z_]\w*\b", code1))
-            vars2 = set(re.findall(r"\b[a-zA-Z_]\w*\b", code2))
+            vars1 = _identifier_set(code1)
+            vars2 = _identifier_set(code2)
 
             # Check for systematic variable renaming
             var_overlap = len(vars1.intersection(vars2)) / max(len(vars1), len(vars2), 1)
 
             # Check for code structure preservation with different naming
-            structure1 = re.sub(r"\b[a-zA-Z_]\w*\b", "VAR", code1)
-            structure2 = re.sub(r"\b[a-zA-Z_]\w*\b", "VAR", code2)
-
-            structure_similarity = difflib.SequenceMatcher(None, structure1, structure2).ratio()
+            structure_similarity = _shingle_similarity(
+                _skeleton_shingles(code1), _skeleton_shingles(code2)
+            )
 
             # Obfuscation detected if structure is very similar but variables are different
             return structure_similarity > 0.8 and var_overlap < 0.3
@@ -457,7 +844,8 @@ class CrossLanguagePlagiarismDetector:
         try:
             return list(
                 current_app.mongo.db.submissions.find(
-                    {"assignment_id": assignment_id, "student_id": {"$ne": student_id}}
+                    {"assignment_id": assignment_id, "student_id": {"$ne": student_id}},
+                    _SUBMISSION_PROJECTION,
                 )
             )
         except:
@@ -471,7 +859,11 @@ class CrossLanguagePlagiarismDetector:
             "similar_submissions": [],
             "threshold": self.threshold,
             "cross_language_detected": False,
-            "visualization_data": {"heat_map": [], "similar_regions": []},
+            "visualization_data": {
+                "uniform_intensity": 0.0,
+                "line_widths": [],
+                "similar_regions": [],
+            },
             "algorithm_patterns_detected": {},
             "enhanced_analysis": True,
         }
@@ -589,7 +981,8 @@ def check_plagiarism(code, assignment_id, student_id):
         # Get all other submissions for this assignment
         other_submissions = list(
             current_app.mongo.db.submissions.find(
-                {"assignment_id": assignment_id, "student_id": {"$ne": student_id}}
+                {"assignment_id": assignment_id, "student_id": {"$ne": student_id}},
+                _SUBMISSION_PROJECTION,
             )
         )
 
@@ -603,16 +996,32 @@ def check_plagiarism(code, assignment_id, student_id):
 
         # Normalize the submitted code
         normalized_code = normalize_code(code)
+        query_tokens = set(_word_tokens(normalized_code))
+
+        normalized_others = [
+            normalize_code(submission.get("code", "")) for submission in other_submissions
+        ]
+
+        # One TF-IDF fit over every submission instead of one per pair, made before the
+        # prefilter so that IDF weights come from the whole assignment
+        tfidf_sims = calculate_tfidf_similarities(normalized_code, normalized_others)
 
         # Check similarity with each existing submission
         similarities = []
+        min_shared = min(_MIN_SHARED_TOKENS, len(query_tokens))
+
+        for submission, normalized_other_code, tfidf_similarity in zip(
+            other_submissions, normalized_others, tfidf_sims
+        ):
+            # Only score submissions that share enough vocabulary to be worth comparing;
+            # identical normalized code is always scored, however short
+            shared = query_tokens.intersection(_word_tokens(normalized_other_code))
+            if normalized_other_code != normalized_code and len(shared) < min_shared:
+                continue
 
-        for submission in other_submissions:
             other_code = submission.get("code", "")
-            normalized_other_code = normalize_code(other_code)
 
             # Calculate multiple similarity metrics
-            tfidf_similarity = calculate_tfidf_similarity(normalized_code, normalized_other_code)
             sequence_similarity = calculate_sequence_similarity(
                 normalized_code, normalized_other_code
             )
@@ -662,46 +1071,63 @@ def check_plagiarism(code, assignment_id, student_id):
         }
 
 
+# Submissions never change and are re-normalized on every check against them
+@lru_cache(maxsize=4096)
 def normalize_code(code):
     """
     Normalize code by removing comments, extra whitespace, and standardizing formatting
     """
     try:
         # Remove single-line comments
-        code = re.sub(r"//.*", "", code)
-        code = re.sub(r"#.*", "", code)
+        code = _SLASH_COMMENT.sub("", code)
+        code = _PY_COMMENT.sub("", code)
 
         # Remove multi-line comments
-        code = re.sub(r"/\*.*?\*/", "", code, flags=re.DOTALL)
-        code = re.sub(r'""".*?"""', "", code, flags=re.DOTALL)
-        code = re.sub(r"'''.*?'''", "", code, flags=re.DOTALL)
-
-        # Remove extra whitespace and standardize
-        lines = []
-        for line in code.split("\n"):
-            line = line.strip()
-            if line:
-                # Standardize spacing around operators
-                line = re.sub(r"\s*([+\-*/=<>!&|]+)\s*", r" \1 ", line)
-                # Standardize spacing around parentheses and brackets
-                line = re.sub(r"\s*([(){}[\],;])\s*", r"\1", line)
-                lines.append(line.lower())
-
-        return "\n".join(lines)
+        code = _BLOCK_COMMENT.sub("", code)
+        code = _PY_DOCSTRING.sub("", code)
+        code = _PY_SINGLE_DOCSTRING.sub("", code)
+
+        # Remove extra whitespace and standardize spacing around operators and brackets
+        return _normalize_tokens(code)
 
     except (ValueError, KeyError, AttributeError) as e:
         print(f"Code normalization failed: {str(e)}")
         return code.lower().strip()
 
 
+@lru_cache(maxsize=1)
+def _get_sklearn():
+    """
+    Import scikit-learn on first TF-IDF use rather than at module load, since it pulls in
+    scipy. Returns (TfidfVectorizer, linear_kernel), or None when it is not installed
+    """
+    try:
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.metrics.pairwise import linear_kernel
+    except ImportError:
+        print("Warning: scikit-learn not available. Using fallback similarity methods.")
+        return None
+
+    return TfidfVectorizer, linear_kernel
+
+
+def __getattr__(name):
+    # SKLEARN_AVAILABLE is probed lazily so reading it does not force the import at load
+    if name == "SKLEARN_AVAILABLE":
+        return _get_sklearn() is not None
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def calculate_tfidf_similarity(code1, code2):
     """
     Calculate TF-IDF based similarity between two code snippets
     """
     try:
-        if not SKLEARN_AVAILABLE:
+        sklearn = _get_sklearn()
+        if sklearn is None:
             # Fallback to simple similarity if sklearn not available
             return calculate_sequence_similarity(code1, code2)
+        TfidfVectorizer, linear_kernel = sklearn
 
         if not code1.strip() or not code2.strip():
             return 0.0
@@ -715,8 +1141,7 @@ def calculate_tfidf_similarity(code1, code2):
             """
 
             # Split by common delimiters and keep alphanumeric tokens
-            tokens = re.findall(r"\b\w+\b", code)
-            return " ".join(tokens)
+            return " ".join(_word_tokens(code))
 
         doc1 = tokenize(code1)
         doc2 = tokenize(code2)
@@ -728,28 +1153,198 @@ def calculate_tfidf_similarity(code1, code2):
         vectorizer = TfidfVectorizer(stop_words=None, lowercase=True)
         tfidf_matrix = vectorizer.fit_transform([doc1, doc2])
 
-        # Calculate cosine similarity
-        similarity = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
+        # Rows are already L2-normalized, so their dot product is the cosine similarity
+        similarity = linear_kernel(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
 
-        return float(similarity)
+        return min(float(similarity), 1.0)
 
     except (ValueError, KeyError, AttributeError) as e:
         print(f"TF-IDF similarity calculation failed: {str(e)}")
         return 0.0
 
 
+def calculate_tfidf_similarities(code, other_codes):
+    """
+    Calculate TF-IDF similarity of code against each of other_codes with a single fit
+    """
+    try:
+        sklearn = _get_sklearn()
+        if sklearn is None:
+            return [calculate_sequence_similarity(code, other) for other in other_codes]
+        TfidfVectorizer, linear_kernel = sklearn
+
+        if not other_codes:
+            return []
+
+        if not code.strip():
+            return [0.0] * len(other_codes)
+
+        vectorizer = TfidfVectorizer(
+            tokenizer=_tfidf_tokens, token_pattern=None, lowercase=True, dtype=np.float32
+        )
+        tfidf_matrix = vectorizer.fit_transform([code] + list(other_codes))
+
+        # Row 0 against every other row in one sparse product; rows are already
+        # L2-normalized so no cosine re-normalization is needed, and empty rows score 0
+        similarities = linear_kernel(tfidf_matrix[0:1], tfidf_matrix[1:]).ravel()
+
+        return [float(similarity) for similarity in np.clip(similarities, 0.0, 1.0)]
+
+    except (ValueError, KeyError, AttributeError) as e:
+        print(f"TF-IDF similarity calculation failed: {str(e)}")
+        return [0.0] * len(other_codes)
+
+
+def calculate_tfidf_similarity_matrix(codes, dense_output=True):
+    """
+    Pairwise TF-IDF similarity of every code against every other from a single fit, as an
+    (n, n) array, or as a sparse matrix holding only pairs that share vocabulary when
+    dense_output is False. Returns None when scikit-learn is not available
+    """
+    sklearn = _get_sklearn()
+    if sklearn is None:
+        return None
+    TfidfVectorizer, linear_kernel = sklearn
+
+    vectorizer = TfidfVectorizer(
+        tokenizer=_tfidf_tokens, token_pattern=None, lowercase=True, dtype=np.float32
+    )
+    try:
+        tfidf_matrix = vectorizer.fit_transform(codes)
+    except ValueError:
+        # No code has any tokens, so no pair shares vocabulary
+        if dense_output:
+            return np.zeros((len(codes), len(codes)), dtype=np.float32)
+        from scipy.sparse import csr_matrix
+
+        return csr_matrix((len(codes), len(codes)), dtype=np.float32)
+
+    # One sparse X @ X.T; rows are L2-normalized so the products are cosine similarities
+    similarities = linear_kernel(tfidf_matrix, dense_output=dense_output)
+    if dense_output:
+        return np.clip(similarities, 0.0, 1.0)
+    return similarities
+
+
+def _word_tokens(code):
+    """
+    Word tokens of code, equivalent to _WORD.findall
+    """
+    if code.isascii():
+        return code.translate(_WORD_TRANSLATION).split()
+    return _WORD.findall(code)
+
+
+def _tfidf_tokens(code):
+    """
+    Word tokens of two or more characters, the same vocabulary calculate_tfidf_similarity
+    gets from TfidfVectorizer's default token_pattern
+    """
+    return [token for token in _word_tokens(code) if len(token) > 1]
+
+
+def _identifier_set(code):
+    """
+    Distinct identifiers in code, equivalent to set(_IDENTIFIER.findall(code))
+    """
+    if code.isascii():
+        return {
+            token
+            for token in code.translate(_WORD_TRANSLATION).split()
+            if token[0] in _IDENTIFIER_START
+        }
+    return set(_IDENTIFIER.findall(code))
+
+
+def _kgrams(seq, k):
+    """
+    Distinct length-k slices of a string or tuple; shorter inputs form a single gram
+    """
+    if len(seq) <= k:
+        return frozenset((seq,)) if seq else frozenset()
+    return frozenset(seq[i : i + k] for i in range(len(seq) - k + 1))
+
+
+def _shingle_set(code):
+    """
+    Distinct character k-grams of code with whitespace removed
+    """
+    return _kgrams("".join(code.split()), _SHINGLE_SIZE)
+
+
+def _skeleton_shingles(code):
+    """
+    Token k-grams of code with every identifier replaced by VAR, tokenized in one pass
+    """
+    tokens = tuple(
+        "VAR" if token[0] in _IDENTIFIER_START else token
+        for token in _SKELETON_TOKEN.findall(code)
+    )
+    return _kgrams(tokens, _SKELETON_SHINGLE_SIZE)
+
+
+def _simhash(shingles):
+    """
+    64-bit SimHash of a shingle set, from process-independent blake2b hashes of each shingle
+    """
+    if not shingles:
+        return 0
+
+    hashes = [
+        hashlib.blake2b(
+            "\x1f".join(shingle).encode("utf-8", "surrogatepass"), digest_size=8
+        ).digest()
+        for shingle in shingles
+    ]
+
+    if np is not None:
+        # One row of 64 bits per shingle; a bit is set where most shingles set it
+        bits = np.unpackbits(np.frombuffer(b"".join(hashes), dtype=np.uint8).reshape(-1, 8), axis=1)
+        return int.from_bytes(np.packbits(bits.sum(axis=0) * 2 > len(hashes)).tobytes(), "big")
+
+    totals = [0] * 64
+    for digest in hashes:
+        value = int.from_bytes(digest, "big")
+        for bit in range(64):
+            totals[bit] += (value >> (63 - bit)) & 1
+    return sum(1 << (63 - bit) for bit, total in enumerate(totals) if total * 2 > len(hashes))
+
+
+def _shingle_similarity(shingles1, shingles2):
+    """
+    Dice coefficient of two shingle sets, on the same 2*M/T scale as SequenceMatcher.ratio()
+    """
+    if not shingles1 or not shingles2:
+        return 0.0
+    return 2.0 * len(shingles1 & shingles2) / (len(shingles1) + len(shingles2))
+
+
+def _sequence_similarity(code1, code2, shingles1=None, shingles2=None):
+    """
+    SequenceMatcher ratio of a short code pair, or the Dice coefficient of the codes'
+    character shingles (computed unless given) once the pair is too long to align
+    """
+    if len(code1) + len(code2) <= _SEQUENCE_MATCHER_MAX_CHARS:
+        # ratio() depends on argument order, so compare the pair in a fixed order
+        first, second = sorted((code1, code2))
+        return difflib.SequenceMatcher(None, first, second).ratio()
+
+    if shingles1 is None:
+        shingles1 = _shingle_set(code1)
+    if shingles2 is None:
+        shingles2 = _shingle_set(code2)
+    return _shingle_similarity(shingles1, shingles2)
+
+
 def calculate_sequence_similarity(code1, code2):
     """
-    Calculate sequence similarity using difflib
+    Calculate sequence similarity using difflib, or character shingles for long code
     """
     try:
         if not code1.strip() or not code2.strip():
             return 0.0
 
-        # Calculate sequence similarity
-        similarity = difflib.SequenceMatcher(None, code1, code2).ratio()
-
-        return float(similarity)
+        return float(_sequence_similarity(code1, code2))
 
     except (ValueError, KeyError, AttributeError) as e:
         print(f"Sequence similarity calculation failed: {str(e)}")
@@ -789,130 +1384,181 @@ def extract_structural_features(tree):
     """
     Extract structural features from AST
     """
-    features = {
-        "functions": 0,
-        "classes": 0,
-        "loops": 0,
-        "conditionals": 0,
-        "imports": 0,
-        "assignments": 0,
-        "function_calls": 0,
-        "depth": 0,
-    }
-
-    class FeatureExtractor(ast.NodeVisitor):
-        def __init__(self):
-            self.depth = 0
-            self.max_depth = 0
-
-        def visit(self, node):
-            """visit function - dispatches to specific visit_* methods.
-
-            Returns:
-                Response data
-            """
-            self.depth += 1
-            self.max_depth = max(self.max_depth, self.depth)
-            # Call the parent visit method to dispatch to specific visit_* methods
-            result = super().visit(node)
-            self.depth -= 1
-            return result
-
-        def visit_FunctionDef(self, node):
-            """visit_FunctionDef function.
-
-            Returns:
-                Response data
-            """
-
-            features["functions"] += 1
-            self.generic_visit(node)
-
-        def visit_ClassDef(self, node):
-            """visit_ClassDef function.
-
-            Returns:
-                Response data
-            """
-
-            features["classes"] += 1
-            self.generic_visit(node)
-
-        def visit_For(self, node):
-            """visit_For function.
-
-            Returns:
-                Response data
-            """
+    features = dict.fromkeys(_AST_FEATURE_NAMES, 0)
+
+    # One iterative walk collects node types and nesting depth (the root is depth 1)
+    node_types = []
+    max_depth = 0
+    stack = [(tree, 1)]
+    while stack:
+        node, depth = stack.pop()
+        node_types.append(type(node).__name__)
+        if depth > max_depth:
+            max_depth = depth
+        stack.extend((child, depth + 1) for child in ast.iter_child_nodes(node))
+
+    for node_type, count in Counter(node_types).items():
+        bucket = _AST_FEATURE_BUCKETS.get(node_type)
+        if bucket is not None:
+            features[bucket] += count
+    features["depth"] = max_depth
 
-            features["loops"] += 1
-            self.generic_visit(node)
+    return features
 
-        def visit_While(self, node):
-            """visit_While function.
 
-            Returns:
-                Response data
-            """
-
-            features["loops"] += 1
-            self.generic_visit(node)
+def _feature_key(code, language):
+    """
+    Content hash identifying a submission in the feature cache
+    """
+    return hashlib.sha1(f"{language}\0{code}".encode("utf-8", "surrogatepass")).hexdigest()
 
-        def visit_If(self, node):
-            """visit_If function.
 
-            Returns:
-                Response data
-            """
+def _get_process_pool():
+    """
+    Return the shared worker process pool, creating it on first use. Its workers are only
+    spawned when the first batch is submitted
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # Spawned workers, since forking a threaded server process can copy held locks
+            _process_pool = ProcessPoolExecutor(
+                max_workers=_PROCESS_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _process_pool
 
-            features["conditionals"] += 1
-            self.generic_visit(node)
 
-        def visit_Import(self, node):
-            """visit_Import function.
+@atexit.register
+def _shutdown_process_pool():
+    """
+    Stop the shared worker processes when the interpreter exits
+    """
+    global _process_pool
+    with _process_pool_lock:
+        pool, _process_pool = _process_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
 
-            Returns:
-                Response data
-            """
 
-            features["imports"] += 1
-            self.generic_visit(node)
+def _pool_map(batch_worker, items):
+    """
+    Run batch_worker over chunks of items in the shared process pool and return the
+    flattened results in order, or None if the pool is unusable
+    """
+    chunk_size = max(1, len(items) // (4 * _PROCESS_POOL_WORKERS))
+    chunks = [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
 
-        def visit_ImportFrom(self, node):
-            """visit_ImportFrom function.
+    try:
+        results = _get_process_pool().map(batch_worker, chunks)
+        return [item for batch in results for item in batch]
+    except (BrokenProcessPool, OSError) as e:
+        print(f"Parallel {batch_worker.__name__} failed: {str(e)}")
+        return None
 
-            Returns:
-                Response data
-            """
 
-            features["imports"] += 1
-            self.generic_visit(node)
+def _extract_feature_batch(codes):
+    """
+    Process-pool worker: features for a chunk of submissions, matched against the
+    module-level algorithm table so no patterns need pickling
+    """
+    return [_extract_submission_features(code, _ALGORITHM_MAPPINGS) for code in codes]
 
-        def visit_Assign(self, node):
-            """visit_Assign function.
 
-            Returns:
-                Response data
-            """
-
-            features["assignments"] += 1
-            self.generic_visit(node)
+def _extract_submission_features(code, algorithm_mappings):
+    """
+    Compute everything the pairwise comparisons need from a single submission
+    """
+    ast_features = None
+    ast_error = False
+    try:
+        ast_features = extract_structural_features(ast.parse(code))
+    except SyntaxError:
+        pass
+    except (ValueError, KeyError, AttributeError):
+        ast_error = True
+
+    pattern_counts = dict(
+        zip((pattern.pattern for pattern in _STRUCTURE_PATTERNS), _structure_counts(code))
+    )
+    algorithm_matches = {
+        name: sum(1 for pattern in info["patterns"] if pattern.search(code))
+        for name, info in algorithm_mappings.items()
+    }
+    skeleton_shingles = _skeleton_shingles(code)
+
+    return SubmissionFeatures(
+        blank=not code.strip(),
+        ast_features=ast_features,
+        ast_error=ast_error,
+        pattern_counts=pattern_counts,
+        algorithm_matches=algorithm_matches,
+        identifiers=frozenset(_identifier_set(code)),
+        skeleton_shingles=skeleton_shingles,
+        tokens=frozenset(_word_tokens(code.lower())),
+        shingles=_shingle_set(code),
+        fingerprint=_simhash(skeleton_shingles),
+    )
+
+
+def _feature_structure_similarity(features1, features2, lang1, lang2):
+    """
+    Structural similarity from precomputed features, matching _calculate_structure_similarity
+    """
+    if lang1 == lang2 == "python":
+        if features1.blank or features2.blank:
+            return 0.0
+        if features1.ast_error or features2.ast_error:
+            return 0.0
+        if features1.ast_features is not None and features2.ast_features is not None:
+            return calculate_feature_similarity(features1.ast_features, features2.ast_features)
 
-        def visit_Call(self, node):
-            """visit_Call function.
+    return calculate_feature_similarity(features1.pattern_counts, features2.pattern_counts)
 
-            Returns:
-                Response data
-            """
 
-            features["function_calls"] += 1
-            self.generic_visit(node)
+def _feature_structure_similarities(features, language, others):
+    """
+    _feature_structure_similarity of one submission against many (features, language)
+    pairs, with each kind of feature vector scored in a single batch
+    """
+    similarities = [0.0] * len(others)
+    ast_rows = {}
+    pattern_rows = {}
+
+    for index, (other, other_language) in enumerate(others):
+        if language == other_language == "python":
+            if features.blank or other.blank or features.ast_error or other.ast_error:
+                continue
+            if features.ast_features is not None and other.ast_features is not None:
+                ast_rows[index] = tuple(other.ast_features.values())
+                continue
+        pattern_rows[index] = tuple(other.pattern_counts.values())
+
+    for rows, query in (
+        (ast_rows, features.ast_features),
+        (pattern_rows, features.pattern_counts),
+    ):
+        if rows:
+            scores = calculate_feature_similarities(tuple(query.values()), list(rows.values()))
+            for index, score in zip(rows, scores):
+                similarities[index] = score
+
+    return similarities
+
+
+def _feature_obfuscation(features1, features2):
+    """
+    Obfuscation check from precomputed features, matching _detect_advanced_obfuscation
+    """
+    vars1 = features1.identifiers
+    vars2 = features2.identifiers
+    var_overlap = len(vars1 & vars2) / max(len(vars1), len(vars2), 1)
 
-    extractor = FeatureExtractor()
-    extractor.visit(tree)
-    features["depth"] = extractor.max_depth
+    structure_similarity = _shingle_similarity(
+        features1.skeleton_shingles, features2.skeleton_shingles
+    )
 
-    return features
+    return structure_similarity > 0.8 and var_overlap < 0.3
 
 
 def calculate_feature_similarity(features1, features2):
@@ -943,35 +1589,88 @@ def calculate_feature_similarity(features1, features2):
         return 0.0
 
 
+def _count_vector_similarity(counts1, counts2):
+    """
+    calculate_feature_similarity over two equal-length count sequences, without keying
+    each position by name
+    """
+    total_similarity = 0.0
+
+    for val1, val2 in zip(counts1, counts2):
+        if val1 == 0 and val2 == 0:
+            total_similarity += 1.0
+        elif val1 != 0 and val2 != 0:
+            total_similarity += min(val1, val2) / max(val1, val2)
+
+    return total_similarity / len(counts1) if counts1 else 0.0
+
+
+def calculate_feature_similarities(query, rows):
+    """
+    calculate_feature_similarity of one feature vector against many, as one array operation
+    """
+    if np is None:
+        return [_count_vector_similarity(query, row) for row in rows]
+
+    matrix = np.asarray(rows, dtype=np.float64)
+    if matrix.size == 0:
+        return [0.0] * len(rows)
+
+    vector = np.asarray(query, dtype=np.float64)
+    smaller = np.minimum(matrix, vector)
+    larger = np.maximum(matrix, vector)
+    ratios = np.where(larger == 0, 1.0, smaller / np.where(larger == 0, 1.0, larger))
+
+    return ratios.mean(axis=1).tolist()
+
+
 def calculate_pattern_similarity(code1, code2):
     """
     Calculate similarity based on code patterns (fallback for non-Python code)
     """
     try:
-        # Extract patterns like function definitions, loops, conditionals
-        patterns = [
-            r"\bdef\s+\w+",  # Python functions
-            r"\bpublic\s+\w+",  # Java methods
-            r"\bfor\s*\(",  # for loops
-            r"\bwhile\s*\(",  # while loops
-            r"\bif\s*\(",  # if statements
-            r"\breturn\s+",  # return statements
-            r"\bclass\s+\w+",  # class definitions
-        ]
+        # Count patterns like function definitions, loops, conditionals
+        return _count_vector_similarity(
+            _scan_code(code1).pattern_counts, _scan_code(code2).pattern_counts
+        )
+
+    except (ValueError, KeyError, AttributeError) as e:
+        return 0.0
 
-        pattern_counts1 = {}
-        pattern_counts2 = {}
 
-        for pattern in patterns:
-            pattern_counts1[pattern] = len(re.findall(pattern, code1, re.IGNORECASE))
-            pattern_counts2[pattern] = len(re.findall(pattern, code2, re.IGNORECASE))
+def _structure_counts(code):
+    """
+    Matches of each _STRUCTURE_PATTERNS entry in code, skipping the regex for keywords
+    that do not occur at all
+    """
+    if not code.isascii():
+        # Case-insensitive matching of non-ASCII text has folds lower() does not mirror
+        return tuple(len(pattern.findall(code)) for pattern in _STRUCTURE_PATTERNS)
 
-        return calculate_feature_similarity(pattern_counts1, pattern_counts2)
+    lowered = code.lower()
+    return tuple(
+        len(pattern.findall(code)) if keyword in lowered else 0
+        for pattern, keyword in zip(_ASCII_STRUCTURE_PATTERNS, _STRUCTURE_KEYWORDS)
+    )
 
-    except (ValueError, KeyError, AttributeError) as e:
-        return 0.0
 
+@lru_cache(maxsize=4096)
+def _scan_code(code):
+    """
+    Structure pattern counts, identifiers and line multiset of code, computed once per
+    distinct string however many pairs it is compared in
+    """
+    lines = [line for line in map(str.strip, code.split("\n")) if line]
+
+    return CodeScan(
+        pattern_counts=_structure_counts(code),
+        identifiers=frozenset(_identifier_set(code)),
+        line_counts=Counter(lines),
+        line_total=len(lines),
+    )
 
+
+@lru_cache(maxsize=4096)
 def generate_code_fingerprint(code):
     """
     Generate a fingerprint for code to enable fast similarity checks
@@ -979,8 +1678,8 @@ def generate_code_fingerprint(code):
     try:
         normalized = normalize_code(code)
 
-        # Create hash of normalized code
-        fingerprint = hashlib.md5(normalized.encode()).hexdigest()
+        # Non-cryptographic use, so the faster blake2b at MD5's 128-bit digest size
+        fingerprint = hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
 
         return fingerprint
 
@@ -993,23 +1692,30 @@ def detect_code_obfuscation(code1, code2):
     Detect if code has been obfuscated to avoid plagiarism detection
     """
     try:
+        # Nothing was disguised if either side is empty or the code was copied verbatim
+        if not code1 or not code2 or code1 == code2:
+            return []
+
         # Check for suspicious patterns
         obfuscation_indicators = []
 
+        scan1 = _scan_code(code1)
+        scan2 = _scan_code(code2)
+
         # Variable name changes
-        vars1 = set(re.findall(r"\b[a-zA-Z_]\w*\b", code1))
-        vars2 = set(re.findall(r"\b[a-zA-Z_]\w*\b", code2))
+        vars1 = scan1.identifiers
+        vars2 = scan2.identifiers
 
         common_vars = vars1.intersection(vars2)
         if len(common_vars) / max(len(vars1), len(vars2), 1) < 0.3:
             obfuscation_indicators.append("Significant variable name changes")
 
         # Line reordering (for languages where order doesn't matter)
-        lines1 = [line.strip() for line in code1.split("\n") if line.strip()]
-        lines2 = [line.strip() for line in code2.split("\n") if line.strip()]
-
-        if len(set(lines1).intersection(set(lines2))) / max(len(lines1), len(lines2), 1) > 0.7:
-            obfuscation_indicators.append("Possible line reordering")
+        if scan1.line_total and scan2.line_total:
+            # Multiset overlap, so repeated lines such as "}" count as often as they occur
+            common = sum((scan1.line_counts & scan2.line_counts).values())
+            if common / max(scan1.line_total, scan2.line_total) > 0.7:
+                obfuscation_indicators.append("Possible line reordering")
 
         return obfuscation_indicators
 
@@ -1017,31 +1723,99 @@ def detect_code_obfuscation(code1, code2):
         return []
 
 
-def batch_detect_plagiarism(submissions, threshold=0.7, algorithms=["tfidf", "structural"]):
-    """Batch detect plagiarism across multiple submissions"""
-    results = []
+def batch_detect_plagiarism(
+    submissions, threshold=0.7, algorithms=["tfidf", "structural"], top_k=None
+):
+    """
+    Batch detect plagiarism across multiple submissions, reporting only the top_k
+    strongest matches when top_k is given
+    """
+    codes = [submission.get("code", "") for submission in submissions]
+    # Index pairs (i < j) to score, in row order, and their TF-IDF similarity if known
+    pairs = None
+    tfidf_sims = None
+
+    weights = Counter(algorithm for algorithm in algorithms if algorithm in _SIMILARITY_ALGORITHMS)
+    if weights["tfidf"]:
+        # Every other algorithm scores at most 1, so a pair's mean can only reach the
+        # threshold when its TF-IDF similarity is at least this
+        total = sum(weights.values())
+        min_tfidf = (threshold * total - (total - weights["tfidf"])) / weights["tfidf"]
+
+        tfidf = calculate_tfidf_similarity_matrix(codes, dense_output=min_tfidf <= 0)
+        if tfidf is not None and min_tfidf <= 0:
+            rows, cols = np.triu_indices(len(submissions), 1)
+            pairs = list(zip(rows.tolist(), cols.tolist()))
+            tfidf_sims = tfidf[rows, cols].tolist()
+        elif tfidf is not None:
+            # The sparse product only stores pairs sharing vocabulary; of those, keep the
+            # upper triangle at or above the bound (with float32 slack), in row order
+            upper = tfidf.tocoo()
+            keep = (upper.row < upper.col) & (upper.data >= min_tfidf - 1e-6)
+            rows, cols, data = upper.row[keep], upper.col[keep], upper.data[keep]
+            order = np.lexsort((cols, rows))
+            pairs = [(int(rows[k]), int(cols[k])) for k in order]
+            tfidf_sims = [min(float(data[k]), 1.0) for k in order]
+
+    if pairs is None:
+        # Only materialized when no TF-IDF matrix narrowed the pairs down
+        pairs = list(itertools.combinations(range(len(submissions)), 2))
+        tfidf_sims = [None] * len(pairs)
+
+    items = [
+        (submissions[i], submissions[j], algorithms, tfidf_sim)
+        for (i, j), tfidf_sim in zip(pairs, tfidf_sims)
+    ]
 
-    for i, submission1 in enumerate(submissions):
-        for j, submission2 in enumerate(submissions[i + 1 :], i + 1):
-            similarity = _calculate_similarity(submission1, submission2, algorithms)
-            if similarity >= threshold:
-                results.append(
-                    {
-                        "submission1_id": submission1.get("id", f"sub_{i}"),
-                        "submission2_id": submission2.get("id", f"sub_{j}"),
-                        "similarity_score": similarity,
-                        "algorithms_used": algorithms,
-                        "confidence": min(similarity * 1.2, 1.0),
-                    }
-                )
+    scores = None
+    if len(items) >= _PARALLEL_MIN_PAIRS:
+        scores = _pool_map(_score_pair_batch, items)
+    if scores is None:
+        scores = _score_pair_batch(items)
+
+    # (similarity, -position, i, j) per match; a min-heap capped at top_k when one is given,
+    # so the weakest kept match is evicted first and ties keep pair order
+    matches_found = 0
+    flagged = []
+    for position, ((i, j), similarity) in enumerate(zip(pairs, scores)):
+        if similarity < threshold:
+            continue
+        matches_found += 1
+        entry = (similarity, -position, i, j)
+        if top_k is None:
+            flagged.append(entry)
+        elif len(flagged) < top_k:
+            heapq.heappush(flagged, entry)
+        elif top_k:
+            heapq.heappushpop(flagged, entry)
+    flagged.sort(reverse=True)
+
+    matches = [
+        {
+            "submission1_id": submissions[i].get("id", f"sub_{i}"),
+            "submission2_id": submissions[j].get("id", f"sub_{j}"),
+            "similarity_score": similarity,
+            "algorithms_used": algorithms,
+            "confidence": min(similarity * 1.2, 1.0),
+        }
+        for similarity, _, i, j in flagged
+    ]
 
     return {
         "total_comparisons": len(submissions) * (len(submissions) - 1) // 2,
-        "matches_found": len(results),
-        "matches": sorted(results, key=lambda x: x["similarity_score"], reverse=True),
+        "matches_found": matches_found,
+        "matches": matches,
     }
 
 
+def _score_pair_batch(items):
+    """
+    Process-pool worker: _calculate_similarity for a chunk of
+    (submission1, submission2, algorithms, tfidf_sim) tuples
+    """
+    return [_calculate_similarity(*item) for item in items]
+
+
 def get_assignment_results(assignment_id, threshold=0.7, sort_by="similarity_score", order="desc"):
     """Get plagiarism results for a specific assignment"""
     # Mock data for now
@@ -1078,23 +1852,21 @@ def get_assignment_results(assignment_id, threshold=0.7, sort_by="similarity_sco
 
 
 def detailed_comparison(submission1, submission2, algorithms=["all"]):
-    """Perform detailed comparison between two submissions"""
+    """Perform detailed comparison between two submissions.
+
+    Every algorithm scores the pair on its own, so the TF-IDF result need not match
+    batch_detect_plagiarism's (see _tfidf_similarity).
+    """
     if algorithms == ["all"]:
         algorithms = ["tfidf", "structural", "cross_language", "fingerprint"]
 
     comparison_results = {}
 
     for algorithm in algorithms:
-        if algorithm == "tfidf":
-            comparison_results["tfidf"] = _tfidf_similarity(submission1, submission2)
-        elif algorithm == "structural":
-            comparison_results["structural"] = _structural_similarity(submission1, submission2)
-        elif algorithm == "cross_language":
-            comparison_results["cross_language"] = _cross_language_similarity(
+        if algorithm in _SIMILARITY_ALGORITHMS:
+            comparison_results[algorithm] = _SIMILARITY_ALGORITHMS[algorithm](
                 submission1, submission2
             )
-        elif algorithm == "fingerprint":
-            comparison_results["fingerprint"] = _fingerprint_similarity(submission1, submission2)
 
     # Calculate overall similarity
     overall_similarity = sum(comparison_results.values()) / len(comparison_results)
@@ -1169,11 +1941,18 @@ def get_plagiarism_trends(time_period="6months", assignment_id=None):
     }
 
 
+def _now_iso():
+    """
+    Current local time as an ISO-8601 string, for report and export timestamps
+    """
+    return datetime.now().isoformat()
+
+
 def generate_comprehensive_report(assignment_id, format="json", include_details=True):
     """Generate comprehensive plagiarism report"""
     report_data = {
         "assignment_id": assignment_id,
-        "generated_at": datetime.now().isoformat(),
+        "generated_at": _now_iso(),
         "summary": {
             "total_submissions": 25,
             "flagged_submissions": 6,
@@ -1320,7 +2099,7 @@ def export_plagiarism_data(assignment_id, format="json", include_code=False):
     """Export plagiarism detection data"""
     export_data = {
         "assignment_id": assignment_id,
-        "exported_at": datetime.now().isoformat(),
+        "exported_at": _now_iso(),
         "format": format,
         "data": get_assignment_results(assignment_id),
     }
@@ -1333,31 +2112,43 @@ def export_plagiarism_data(assignment_id, format="json", include_code=False):
     return export_data
 
 
-def _calculate_similarity(submission1, submission2, algorithms):
+def _calculate_similarity(submission1, submission2, algorithms, tfidf_sim=None):
     """Calculate similarity between two submissions using specified algorithms"""
     similarities = []
 
     for algorithm in algorithms:
-        if algorithm == "tfidf":
-            similarities.append(_tfidf_similarity(submission1, submission2))
-        elif algorithm == "structural":
-            similarities.append(_structural_similarity(submission1, submission2))
-        elif algorithm == "cross_language":
-            similarities.append(_cross_language_similarity(submission1, submission2))
+        if algorithm == "tfidf" and tfidf_sim is not None:
+            similarities.append(tfidf_sim)
+        elif algorithm in _SIMILARITY_ALGORITHMS:
+            similarities.append(_SIMILARITY_ALGORITHMS[algorithm](submission1, submission2))
 
     return sum(similarities) / len(similarities) if similarities else 0.0
 
 
 def _tfidf_similarity(submission1, submission2):
-    """Calculate TF-IDF similarity"""
-    # Mock implementation
-    return 0.75
+    """Calculate TF-IDF similarity with IDF weights fitted on just this pair.
+
+    batch_detect_plagiarism fits one vectorizer over the whole batch, so its TF-IDF
+    score for the same pair is weighted by corpus-wide IDF and generally differs from
+    the per-pair score detailed_comparison reports.
+    """
+    return calculate_tfidf_similarities(
+        submission1.get("code", ""), [submission2.get("code", "")]
+    )[0]
 
 
 def _structural_similarity(submission1, submission2):
     """Calculate structural similarity"""
-    # Mock implementation
-    return 0.82
+    code1 = submission1.get("code", "")
+    code2 = submission2.get("code", "")
+    fingerprints1 = _ast_fingerprints(code1)
+    fingerprints2 = _ast_fingerprints(code2)
+
+    if fingerprints1 is None or fingerprints2 is None:
+        # Not Python, so fall back to the language-agnostic structure patterns
+        return calculate_pattern_similarity(code1, code2)
+
+    return _jaccard_similarity(fingerprints1, fingerprints2)
 
 
 def _cross_language_similarity(submission1, submission2):
@@ -1368,5 +2159,40 @@ def _cross_language_similarity(submission1, submission2):
 
 def _fingerprint_similarity(submission1, submission2):
     """Calculate fingerprint-based similarity"""
-    # Mock implementation
-    return 0.71
+    code1 = normalize_code(submission1.get("code", ""))
+    code2 = normalize_code(submission2.get("code", ""))
+
+    return _jaccard_similarity(_shingle_set(code1), _shingle_set(code2))
+
+
+@lru_cache(maxsize=4096)
+def _ast_fingerprints(code):
+    """
+    Hashes of node-type k-grams in ast.walk order, so renamed identifiers and literals do
+    not change them. None when code is not valid Python
+    """
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return None
+
+    kinds = tuple(type(node).__name__ for node in ast.walk(tree))
+    return frozenset(hash(gram) for gram in _kgrams(kinds, _AST_SHINGLE_SIZE))
+
+
+def _jaccard_similarity(set1, set2):
+    """
+    Jaccard index of two hash sets; empty sets share nothing
+    """
+    if not set1 or not set2:
+        return 0.0
+    return len(set1 & set2) / len(set1 | set2)
+
+
+# Pairwise scorers by algorithm name; names not listed here are ignored when averaging
+_SIMILARITY_ALGORITHMS = {
+    "tfidf": _tfidf_similarity,
+    "structural": _structural_similarity,
+    "cross_language": _cross_language_similarity,
+    "fingerprint": _fingerprint_similarity,
+}
@@ -5,96 +5,288 @@ Provides comprehensive analytics and tracking for individual student performance
 including detailed metrics, trends, skill progression, and comparative analysis.
 """
 
+import heapq
 import json
 import os
-import random
+from bisect import bisect_right
+from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import Any, Dict, List
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_SUBMISSIONS_FILE = os.path.join(os.path.dirname(__file__), "..", "submissions_data.json")
+
+
+@lru_cache(maxsize=1)
+def _read_submissions_file(path: str, mtime_ns: int) -> List[Dict[str, Any]]:
+    """Parse the submissions file once per modification time"""
+    if orjson is not None:
+        # orjson parses the whole file from one bytes buffer
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _parse_submitted_at(date_str: Any) -> Optional[datetime]:
+    """Parse an ISO submission timestamp, returning None when missing or malformed"""
+    if not date_str:
+        return None
+    try:
+        return datetime.fromisoformat(date_str.replace("Z", "+00:00"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+# Per-instance cap on cached student overview summaries
+_OVERVIEW_CACHE_SIZE = 1024
+
+# Skills assignment titles are classified into; a submission's skill id indexes this tuple
+_SKILL_LABELS = (
+    "Python",
+    "Sorting Algorithms",
+    "Search Algorithms",
+    "Recursion",
+    "Basic Programming",
+)
+
+# Below this many submissions the per-skill grouping stays in plain Python, where NumPy's
+# per-call overhead outweighs the vectorised reductions
+_NUMPY_MIN_SUBMISSIONS = 512
+
+
+@lru_cache(maxsize=1024)
+def _skill_for_title(assignment_title: str) -> str:
+    """Classify an assignment title into a skill; titles repeat, so results are cached"""
+    assignment_title = assignment_title.lower()
+
+    if "sort" in assignment_title or "bubble" in assignment_title:
+        return "Sorting Algorithms"
+    elif "search" in assignment_title or "binary" in assignment_title:
+        return "Search Algorithms"
+    elif "factorial" in assignment_title or "fibonacci" in assignment_title:
+        return "Recursion"
+    elif "calculator" in assignment_title:
+        return "Basic Programming"
+    return "Python"  # Default skill
+
+
+# Skill id per label, for the per-submission skill arrays
+_SKILL_IDS = {label: skill_id for skill_id, label in enumerate(_SKILL_LABELS)}
+
+
+def _score_trend(scores: List[float], threshold: float) -> str:
+    """Compare the mean of the last two scores against the mean of the earlier ones"""
+    recent_avg = sum(scores[-2:]) / 2
+    earlier_avg = sum(scores[:-2]) / len(scores[:-2]) if len(scores) > 2 else scores[0]
+
+    diff = recent_avg - earlier_avg
+    if diff > threshold:
+        return "improving"
+    elif diff < -threshold:
+        return "declining"
+    else:
+        return "stable"
+
+
+def _month_bucket(date: datetime) -> str:
+    """Timeline bucket label for the month of ``date``"""
+    return date.strftime("%Y-%m")
+
+
+def _week_bucket(date: datetime) -> str:
+    """Timeline bucket label for the week (starting Monday) of ``date``"""
+    return (date - timedelta(days=date.weekday())).strftime("%Y-W%W")
+
+
+def _day_bucket(date: datetime) -> str:
+    """Timeline bucket label for the day of ``date``"""
+    return date.strftime("%Y-%m-%d")
 
 
 class ProgressTrackerService:
     def __init__(self):
         self.submissions_data = self._load_real_submissions()
+        self._index_submissions()
 
     def _load_real_submissions(self) -> List[Dict[str, Any]]:
         """Load real student submissions from JSON file"""
         try:
-            submissions_file = os.path.join(
-                os.path.dirname(__file__), "..", "submissions_data.json"
-            )
-            with open(submissions_file, "r") as f:
-                submissions = json.load(f)
-            return submissions
+            mtime_ns = os.stat(_SUBMISSIONS_FILE).st_mtime_ns
+            # Copy the cached list so instances can replace entries without touching the cache
+            return list(_read_submissions_file(_SUBMISSIONS_FILE, mtime_ns))
         except Exception as e:
             print(f"Error loading submissions: {e}")
             return []
 
+    def _index_submissions(self) -> None:
+        """Sort submissions oldest first, then index them by lowercased name/email and by student"""
+        # The sort is stable and the file is appended in time order, so this is usually linear
+        self.submissions_data = sorted(
+            self.submissions_data, key=lambda x: x.get("submitted_at") or ""
+        )
+        self._by_name_lower: Dict[str, List[int]] = {}
+        self._by_email_lower: Dict[str, List[int]] = {}
+        self._student_indices: Dict[str, List[int]] = {}
+
+        for index, submission in enumerate(self.submissions_data):
+            student_name = submission.get("student_name", "")
+            self._by_name_lower.setdefault(student_name.lower(), []).append(index)
+            self._by_email_lower.setdefault(
+                submission.get("student_email", "").lower(), []
+            ).append(index)
+            if student_name:
+                self._student_indices.setdefault(student_name, []).append(index)
+
+        self._scores = [s.get("score", 0) for s in self.submissions_data]
+        self._skill_ids = [
+            _SKILL_IDS[_skill_for_title(s.get("assignment_title") or "")]
+            for s in self.submissions_data
+        ]
+        self._submitted_dates = [
+            _parse_submitted_at(s.get("submitted_at", "")) for s in self.submissions_data
+        ]
+        # Only numeric scores go through NumPy; anything else keeps the plain Python reductions
+        self._scores_np = None
+        self._skill_ids_np = None
+        if np is not None:
+            scores_np = np.asarray(self._scores)
+            if scores_np.dtype.kind in "iuf":
+                self._scores_np = scores_np
+                self._skill_ids_np = np.asarray(self._skill_ids, dtype=np.intp)
+
+        # Averages are filled on first use so a file with unscored submissions still loads
+        self._student_avg: Optional[Dict[str, float]] = None
+        self._sorted_student_avg: Optional[List[float]] = None
+        self._class_avg: Optional[float] = None
+        self._overview_cache: Dict[str, Dict[str, Any]] = {}
+
+    def _get_student_indices(self, student_identifier: str) -> List[int]:
+        """Get positions of a student's submissions by name or email, oldest first"""
+        identifier = student_identifier.lower()
+        # Substring match against each distinct name/email rather than every submission
+        indices = set()
+        for index_map in (self._by_name_lower, self._by_email_lower):
+            for key, key_indices in index_map.items():
+                if identifier in key:
+                    indices.update(key_indices)
+        return sorted(indices)
+
     def _get_student_submissions(self, student_identifier: str) -> List[Dict[str, Any]]:
         """Get submissions for a specific student by name or email"""
-        student_submissions = []
-        for submission in self.submissions_data:
-            if (
-                student_identifier.lower() in submission.get("student_name", "").lower()
-                or student_identifier.lower() in submission.get("student_email", "").lower()
-            ):
-                student_submissions.append(submission)
-        return student_submissions
-
-    def _generate_mock_data(self) -> Dict[str, Any]:
-        """Generate comprehensive mock data for progress tracking"""
-
-        # Generate submission history for the last 6 months
-        submissions = []
-        skills = [
-            "Python",
-            "Java",
-            "C++",
-            "Data Structures",
-            "Algorithms",
-            "SQL",
-            "Web Development",
-        ]
-        difficulty_levels = ["Easy", "Medium", "Hard"]
+        return [self.submissions_data[i] for i in self._get_student_indices(student_identifier)]
 
-        for i in range(50):
-            date = datetime.now() - timedelta(days=random.randint(1, 180))
-            submissions.append(
-                {
-                    "id": f"sub_{i+1}",
-                    "assignment_name": f'Assignment {i+1}: {random.choice(["Arrays", "Sorting", "Trees", "Graphs", "DP", "Strings"])}',
-                    "submission_date": date.isoformat(),
-                    "score": random.randint(60, 100),
-                    "max_score": 100,
-                    "skill": random.choice(skills),
-                    "difficulty": random.choice(difficulty_levels),
-                    "time_spent": random.randint(30, 180),  # minutes
-                    "attempts": random.randint(1, 5),
-                    "plagiarism_score": random.randint(0, 15),
-                    "feedback_rating": random.randint(3, 5),
-                }
-            )
+    def _score_summary(self, indices: Optional[List[int]] = None) -> Dict[str, float]:
+        """Total, mean, min and max score over the given submission positions (default all)"""
+        if self._scores_np is not None:
+            scores = self._scores_np if indices is None else self._scores_np[indices]
+            return {
+                "total": scores.sum().item(),
+                "mean": scores.mean().item(),
+                "min": scores.min().item(),
+                "max": scores.max().item(),
+            }
 
-        # Sort by date
-        submissions.sort(key=lambda x: x["submission_date"], reverse=True)
+        scores = self._scores if indices is None else [self._scores[i] for i in indices]
+        total = sum(scores)
+        return {"total": total, "mean": total / len(scores), "min": min(scores), "max": max(scores)}
 
-        return {
-            "submissions": submissions,
+    def _student_averages(self) -> Dict[str, float]:
+        """Average score per named student, computed once per index build"""
+        if self._student_avg is None:
+            self._student_avg = {
+                name: self._score_summary(indices)["mean"]
+                for name, indices in self._student_indices.items()
+            }
+        return self._student_avg
+
+    def _student_rank(self, average: float) -> int:
+        """1-based rank of ``average`` among the per-student averages (ties share a rank)"""
+        if self._sorted_student_avg is None:
+            self._sorted_student_avg = sorted(self._student_averages().values())
+        # Everyone with a strictly higher average ranks ahead
+        return len(self._sorted_student_avg) - bisect_right(self._sorted_student_avg, average) + 1
+
+    def _class_average(self) -> float:
+        """Average score over every submission, computed once per index build"""
+        if self._class_avg is None:
+            self._class_avg = self._score_summary()["mean"] if self._scores else 0
+        return self._class_avg
+
+    def _get_student_summary(self, student_id: str) -> Optional[Dict[str, Any]]:
+        """Load-invariant per-student summary for overviews and achievements, cached per
+        lowercased identifier"""
+        key = student_id.lower()
+        if key in self._overview_cache:
+            return self._overview_cache[key]
+
+        indices = self._get_student_indices(student_id)
+        if not indices:
+            return None
+
+        submissions = [self.submissions_data[i] for i in indices]
+        total_submissions = len(submissions)
+        score_summary = self._score_summary(indices)
+        average_score = score_summary["mean"]
+        streak = self._calculate_real_streak(submissions)
+        first_submission = submissions[0]
+        first_perfect_date = None
+        if score_summary["max"] >= 100:
+            first_perfect_date = next(
+                self.submissions_data[i].get("submitted_at", "")[:10]
+                for i in indices
+                if self._scores[i] >= 100
+            )
+
+        summary = {
+            "indices": indices,
+            "scores": score_summary,
+            "first_perfect_date": first_perfect_date,
+            "overview": {
+                "total_assignments": total_submissions,
+                "average_score": round(average_score, 1),
+                "total_score": score_summary["total"],
+                # Assuming max score is 100 per assignment
+                "max_possible": total_submissions * 100,
+                "completion_rate": round(average_score, 1),  # Score as percentage
+                "current_streak": streak,
+                "longest_streak": streak,
+                # Recent performance trend
+                "recent_trend": self._calculate_real_trend(submissions[-5:]),
+            },
+            # Student profile from the first submission, without the caller's identifier
             "profile": {
-                "student_id": "STU001",
-                "name": "Unknown Student",
-                "email": "unknown@example.com",
-                "enrollment_date": "2024-01-15",
+                "name": first_submission.get("student_name", "Unknown"),
+                "email": first_submission.get("student_email", ""),
+                "enrollment_date": first_submission.get("submitted_at", "")[:10],
                 "major": "Computer Science",
                 "year": 2,
-                "gpa": 0.0,
+                "gpa": round(average_score / 25, 2),  # Convert score to GPA scale
             },
         }
 
+        if len(self._overview_cache) >= _OVERVIEW_CACHE_SIZE:
+            # Drop the oldest entry; arbitrary substrings should not grow the cache unbounded
+            del self._overview_cache[next(iter(self._overview_cache))]
+        self._overview_cache[key] = summary
+        return summary
+
     def get_student_overview(self, student_id: str) -> Dict[str, Any]:
         """Get comprehensive student performance overview using real submission data"""
-        submissions = self._get_student_submissions(student_id)
+        summary = self._get_student_summary(student_id)
 
-        if not submissions:
+        if summary is None:
             return {
                 "overview": {
                     "total_assignments": 0,
@@ -118,50 +310,18 @@ class ProgressTrackerService:
                 },
             }
 
-        total_submissions = len(submissions)
-        total_score = sum(s.get("score", 0) for s in submissions)
-        max_possible = total_submissions * 100  # Assuming max score is 100 per assignment
-        average_score = total_score / total_submissions if total_submissions > 0 else 0
-
-        # Get student profile from first submission
-        first_submission = submissions[0]
-        student_profile = {
-            "student_id": student_id,
-            "name": first_submission.get("student_name", "Unknown"),
-            "email": first_submission.get("student_email", ""),
-            "enrollment_date": first_submission.get("submitted_at", "")[:10],
-            "major": "Computer Science",
-            "year": 2,
-            "gpa": round(average_score / 25, 2),  # Convert score to GPA scale
-        }
-
-        # Calculate skill progression based on assignment types
-        skill_progress = self._calculate_real_skill_progress(submissions)
-
-        # Recent performance trend
-        recent_submissions = sorted(submissions, key=lambda x: x.get("submitted_at", ""))[-5:]
-        recent_trend = self._calculate_real_trend(recent_submissions)
-
+        # Skill progression holds per-call lists, so it is rebuilt rather than shared
         return {
-            "overview": {
-                "total_assignments": total_submissions,
-                "average_score": round(average_score, 1),
-                "total_score": total_score,
-                "max_possible": max_possible,
-                "completion_rate": round(average_score, 1),  # Score as percentage
-                "current_streak": self._calculate_real_streak(submissions),
-                "longest_streak": self._calculate_real_streak(submissions),
-                "recent_trend": recent_trend,
-            },
-            "skill_progress": skill_progress,
-            "profile": student_profile,
+            "overview": dict(summary["overview"]),
+            "skill_progress": self._calculate_real_skill_progress(summary["indices"]),
+            "profile": {"student_id": student_id, **summary["profile"]},
         }
 
     def get_performance_timeline(self, student_id: str, period: str = "6months") -> Dict[str, Any]:
         """Get performance data over time for visualization using real data"""
-        submissions = self._get_student_submissions(student_id)
+        indices = self._get_student_indices(student_id)
 
-        if not submissions:
+        if not indices:
             return {
                 "timeline": [],
                 "metrics": {"score_trend": [], "submission_count": [], "labels": []},
@@ -169,29 +329,20 @@ class ProgressTrackerService:
 
         # Group submissions by time period
         if period == "6months":
-            grouped_data = self._group_real_submissions_by_month(submissions, 6)
+            return self._group_real_submissions(indices, _month_bucket, 6)
         elif period == "3months":
-            grouped_data = self._group_real_submissions_by_week(submissions, 12)
+            return self._group_real_submissions(indices, _week_bucket, 12)
         else:  # 1month
-            grouped_data = self._group_real_submissions_by_day(submissions, 30)
-
-        return {
-            "timeline": grouped_data,
-            "metrics": {
-                "score_trend": [g["avg_score"] for g in grouped_data],
-                "submission_count": [g["count"] for g in grouped_data],
-                "labels": [g["period"] for g in grouped_data],
-            },
-        }
+            return self._group_real_submissions(indices, _day_bucket, 30)
 
     def get_skill_analysis(self, student_id: str) -> Dict[str, Any]:
         """Get detailed skill-wise performance analysis using real data"""
-        submissions = self._get_student_submissions(student_id)
+        indices = self._get_student_indices(student_id)
 
-        if not submissions:
+        if not indices:
             return {"skills": {}, "strongest_skills": [], "improvement_areas": []}
 
-        skills_data = self._calculate_real_skill_progress(submissions)
+        skills_data = self._calculate_real_skill_progress(indices)
 
         # Calculate metrics for each skill
         skill_metrics = {}
@@ -206,20 +357,30 @@ class ProgressTrackerService:
                 "trend": "improving" if data["progress"] > 0 else "stable",
             }
 
-        # Sort skills by performance
-        sorted_skills = sorted(
-            skill_metrics.items(), key=lambda x: x[1]["average_score"], reverse=True
+        # Pick the top and bottom three skills by performance, best first
+        strongest_skills = heapq.nlargest(
+            3, skill_metrics.items(), key=lambda x: x[1]["average_score"]
         )
+        improvement_areas = []
+        if len(skill_metrics) >= 3:
+            # Prefer later skills among ties, as the tail of a stable descending sort does
+            lowest = heapq.nsmallest(
+                3,
+                enumerate(skill_metrics.items()),
+                key=lambda x: (x[1][1]["average_score"], -x[0]),
+            )
+            improvement_areas = [item for _, item in reversed(lowest)]
 
         return {
             "skills": skill_metrics,
-            "strongest_skills": sorted_skills[:3] if len(sorted_skills) >= 3 else sorted_skills,
-            "improvement_areas": sorted_skills[-3:] if len(sorted_skills) >= 3 else [],
+            "strongest_skills": strongest_skills,
+            "improvement_areas": improvement_areas,
         }
 
     def get_comparative_analysis(self, student_id: str) -> Dict[str, Any]:
         """Get comparative analysis against class averages using real data"""
-        student_submissions = self._get_student_submissions(student_id)
+        student_indices = self._get_student_indices(student_id)
+        student_submissions = [self.submissions_data[i] for i in student_indices]
 
         if not student_submissions:
             return {
@@ -240,46 +401,20 @@ class ProgressTrackerService:
                 },
             }
 
-        # Calculate student average
-        student_avg = sum(s.get("score", 0) for s in student_submissions) / len(student_submissions)
-
-        # Calculate class average from all submissions
-        all_scores = [s.get("score", 0) for s in self.submissions_data]
-        class_avg = sum(all_scores) / len(all_scores) if all_scores else 0
+        # Calculate student and class averages
+        student_avg = self._score_summary(student_indices)["mean"]
+        class_avg = self._class_average()
 
-        # Get unique students
-        unique_students = set()
-        student_averages = {}
-
-        for submission in self.submissions_data:
-            student_name = submission.get("student_name", "")
-            if student_name:
-                unique_students.add(student_name)
-                if student_name not in student_averages:
-                    student_averages[student_name] = []
-                student_averages[student_name].append(submission.get("score", 0))
-
-        # Calculate averages for each student
-        student_avg_scores = {}
-        for name, scores in student_averages.items():
-            student_avg_scores[name] = sum(scores) / len(scores)
-
-        # Calculate rank and percentile
-        sorted_averages = sorted(student_avg_scores.values(), reverse=True)
-        total_students = len(unique_students)
+        # Calculate rank and percentile from the cached per-student averages
+        student_avg_scores = self._student_averages()
+        total_students = len(student_avg_scores)
 
         # Find current student's rank
         current_student_name = (
             student_submissions[0].get("student_name", "") if student_submissions else ""
         )
         current_student_avg = student_avg_scores.get(current_student_name, student_avg)
-
-        rank = 1
-        for avg in sorted_averages:
-            if avg > current_student_avg:
-                rank += 1
-            else:
-                break
+        rank = self._student_rank(current_student_avg)
 
         percentile = (
             round((total_students - rank + 1) / total_students * 100, 1)
@@ -311,9 +446,9 @@ class ProgressTrackerService:
 
     def get_achievement_progress(self, student_id: str) -> Dict[str, Any]:
         """Get achievement and milestone progress based on real data"""
-        submissions = self._get_student_submissions(student_id)
+        summary = self._get_student_summary(student_id)
 
-        if not submissions:
+        if summary is None:
             achievements = [
                 {
                     "name": "First Submission",
@@ -341,39 +476,30 @@ class ProgressTrackerService:
                 },
             ]
         else:
-            # Calculate achievements based on real data
-            scores = [s.get("score", 0) for s in submissions]
-            avg_score = sum(scores) / len(scores)
-            max_score = max(scores) if scores else 0
+            # Calculate achievements from the cached student summary
+            submission_count = len(summary["indices"])
+            avg_score = summary["scores"]["mean"]
+            max_score = summary["scores"]["max"]
 
             achievements = [
                 {
                     "name": "First Submission",
                     "description": "Complete your first assignment",
-                    "earned": len(submissions) > 0,
-                    "date": submissions[0].get("submitted_at", "")[:10] if submissions else None,
+                    "earned": True,
+                    "date": summary["profile"]["enrollment_date"],
                 },
                 {
                     "name": "Perfect Score",
                     "description": "Get 100% on an assignment",
                     "earned": max_score >= 100,
-                    "date": next(
-                        (
-                            s.get("submitted_at", "")[:10]
-                            for s in submissions
-                            if s.get("score", 0) >= 100
-                        ),
-                        None,
-                    )
-                    if max_score >= 100
-                    else None,
+                    "date": summary["first_perfect_date"],
                     "progress": min(max_score, 100) if not max_score >= 100 else 100,
                 },
                 {
                     "name": "Multiple Submissions",
                     "description": "Submit 3 or more assignments",
-                    "earned": len(submissions) >= 3,
-                    "progress": min(len(submissions) * 33, 100),
+                    "earned": submission_count >= 3,
+                    "progress": min(submission_count * 33, 100),
                 },
                 {
                     "name": "Good Performance",
@@ -399,7 +525,8 @@ class ProgressTrackerService:
 
     def get_detailed_recommendations(self, student_id: str) -> Dict[str, Any]:
         """Get personalized recommendations for improvement based on real data"""
-        submissions = self._get_student_submissions(student_id)
+        indices = self._get_student_indices(student_id)
+        submissions = [self.submissions_data[i] for i in indices]
 
         if not submissions:
             return {
@@ -429,9 +556,9 @@ class ProgressTrackerService:
             }
 
         # Analyze performance
-        scores = [s.get("score", 0) for s in submissions]
-        avg_score = sum(scores) / len(scores)
-        min_score = min(scores)
+        score_summary = self._score_summary(indices)
+        avg_score = score_summary["mean"]
+        min_score = score_summary["min"]
 
         # Generate recommendations based on performance
         immediate_actions = []
@@ -483,23 +610,25 @@ class ProgressTrackerService:
                 ]
             )
 
-        # Analyze assignment types for specific recommendations
+        # Analyze assignment types for specific recommendations: one pass finds which topics
+        # have a failing score, a second names each weak topic once in first-seen order
         assignment_types = [s.get("assignment_title", "").lower() for s in submissions]
-        weak_areas = []
+        weak_sorting = weak_searching = False
+        for assignment, index in zip(assignment_types, indices):
+            if self._scores[index] < 60:
+                weak_sorting = weak_sorting or "sort" in assignment
+                weak_searching = weak_searching or "search" in assignment
 
+        weak_areas = []
         for assignment in assignment_types:
-            if "sort" in assignment and any(
-                s.get("score", 0) < 60
-                for s in submissions
-                if "sort" in s.get("assignment_title", "").lower()
-            ):
-                weak_areas.append("Sorting Algorithms")
-            elif "search" in assignment and any(
-                s.get("score", 0) < 60
-                for s in submissions
-                if "search" in s.get("assignment_title", "").lower()
-            ):
-                weak_areas.append("Search Algorithms")
+            if "sort" in assignment and weak_sorting:
+                area = "Sorting Algorithms"
+            elif "search" in assignment and weak_searching:
+                area = "Search Algorithms"
+            else:
+                continue
+            if area not in weak_areas:
+                weak_areas.append(area)
 
         if weak_areas:
             immediate_actions.insert(0, f'Focus on {", ".join(weak_areas)} - needs improvement')
@@ -547,10 +676,6 @@ class ProgressTrackerService:
 
         return min(streak, 15)  # Cap at reasonable number
 
-    def _calculate_longest_streak(self, submissions: List[Dict]) -> int:
-        """Calculate longest submission streak"""
-        return random.randint(5, 20)  # Mock data
-
     def _calculate_skill_progress(self, submissions: List[Dict]) -> Dict[str, Any]:
         """Calculate skill progression over time"""
         skills = {}
@@ -578,20 +703,7 @@ class ProgressTrackerService:
         if len(submissions) < 3:
             return "stable"
 
-        scores = [s["score"] for s in submissions[-5:]]
-        if len(scores) < 3:
-            return "stable"
-
-        recent = sum(scores[-2:]) / 2
-        earlier = sum(scores[:-2]) / len(scores[:-2])
-
-        diff = recent - earlier
-        if diff > 5:
-            return "improving"
-        elif diff < -5:
-            return "declining"
-        else:
-            return "stable"
+        return _score_trend([s["score"] for s in submissions[-5:]], 5)
 
     def _score_to_level(self, score: float) -> str:
         """Convert score to proficiency level"""
@@ -627,115 +739,45 @@ class ProgressTrackerService:
         else:
             return "Novice"
 
-    def _group_by_month(self, submissions: List[Dict], months: int) -> List[Dict]:
-        """Group submissions by month"""
-        from collections import defaultdict
-
-        grouped = defaultdict(list)
-
-        for submission in submissions:
-            date = datetime.fromisoformat(submission["submission_date"])
-            month_key = date.strftime("%Y-%m")
-            grouped[month_key].append(submission)
-
-        result = []
-        for month, subs in sorted(grouped.items()):
-            if subs:
-                avg_score = sum(s["score"] for s in subs) / len(subs)
-                avg_time = sum(s["time_spent"] for s in subs) / len(subs)
-                result.append(
-                    {
-                        "period": month,
-                        "count": len(subs),
-                        "avg_score": round(avg_score, 1),
-                        "avg_time": round(avg_time, 1),
-                    }
-                )
-
-        return result[-months:] if len(result) > months else result
-
-    def _group_by_week(self, submissions: List[Dict], weeks: int) -> List[Dict]:
-        """Group submissions by week"""
-        from collections import defaultdict
-
-        grouped = defaultdict(list)
-
-        for submission in submissions:
-            date = datetime.fromisoformat(submission["submission_date"])
-            week_start = date - timedelta(days=date.weekday())
-            week_key = week_start.strftime("%Y-W%W")
-            grouped[week_key].append(submission)
-
-        result = []
-        for week, subs in sorted(grouped.items()):
-            if subs:
-                avg_score = sum(s["score"] for s in subs) / len(subs)
-                avg_time = sum(s["time_spent"] for s in subs) / len(subs)
-                result.append(
-                    {
-                        "period": week,
-                        "count": len(subs),
-                        "avg_score": round(avg_score, 1),
-                        "avg_time": round(avg_time, 1),
-                    }
-                )
-
-        return result[-weeks:] if len(result) > weeks else result
-
-    def _group_by_day(self, submissions: List[Dict], days: int) -> List[Dict]:
-        """Group submissions by day"""
-        from collections import defaultdict
-
-        grouped = defaultdict(list)
-
-        for submission in submissions:
-            date = datetime.fromisoformat(submission["submission_date"])
-            day_key = date.strftime("%Y-%m-%d")
-            grouped[day_key].append(submission)
-
-        result = []
-        for day, subs in sorted(grouped.items()):
-            if subs:
-                avg_score = sum(s["score"] for s in subs) / len(subs)
-                avg_time = sum(s["time_spent"] for s in subs) / len(subs)
-                result.append(
-                    {
-                        "period": day,
-                        "count": len(subs),
-                        "avg_score": round(avg_score, 1),
-                        "avg_time": round(avg_time, 1),
-                    }
-                )
-
-        return result[-days:] if len(result) > days else result
-
-    def _calculate_real_skill_progress(self, submissions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _calculate_real_skill_progress(self, indices: List[int]) -> Dict[str, Any]:
         """Calculate skill progression based on real assignment types"""
         skills = {}
+        averages = {}
+
+        if self._skill_ids_np is not None and len(indices) >= _NUMPY_MIN_SUBMISSIONS:
+            skill_ids = self._skill_ids_np[indices]
+            scores = self._scores_np[indices]
+            counts = np.bincount(skill_ids, minlength=len(_SKILL_LABELS))
+            sums = np.bincount(skill_ids, weights=scores, minlength=len(_SKILL_LABELS))
+            # Stable sort by skill keeps each skill's scores in submission order
+            grouped_scores = np.split(
+                scores[np.argsort(skill_ids, kind="stable")], np.cumsum(counts)[:-1]
+            )
+            _, first_seen = np.unique(skill_ids, return_index=True)
+
+            for skill_id in skill_ids[np.sort(first_seen)].tolist():
+                skill = _SKILL_LABELS[skill_id]
+                skills[skill] = {
+                    "scores": grouped_scores[skill_id].tolist(),
+                    "submissions": int(counts[skill_id]),
+                    "current_level": "Beginner",
+                }
+                averages[skill] = sums[skill_id].item() / counts[skill_id].item()
+        else:
+            for index in indices:
+                skill = _SKILL_LABELS[self._skill_ids[index]]
+                if skill not in skills:
+                    skills[skill] = {"scores": [], "submissions": 0, "current_level": "Beginner"}
 
-        for submission in submissions:
-            # Extract skill from assignment title
-            assignment_title = submission.get("assignment_title", "").lower()
-            skill = "Python"  # Default skill
-
-            if "sort" in assignment_title or "bubble" in assignment_title:
-                skill = "Sorting Algorithms"
-            elif "search" in assignment_title or "binary" in assignment_title:
-                skill = "Search Algorithms"
-            elif "factorial" in assignment_title or "fibonacci" in assignment_title:
-                skill = "Recursion"
-            elif "calculator" in assignment_title:
-                skill = "Basic Programming"
-
-            if skill not in skills:
-                skills[skill] = {"scores": [], "submissions": 0, "current_level": "Beginner"}
+                skills[skill]["scores"].append(self._scores[index])
+                skills[skill]["submissions"] += 1
 
-            skills[skill]["scores"].append(submission.get("score", 0))
-            skills[skill]["submissions"] += 1
+            for skill, data in skills.items():
+                averages[skill] = sum(data["scores"]) / len(data["scores"])
 
         # Calculate levels
         for skill, data in skills.items():
-            avg_score = sum(data["scores"]) / len(data["scores"]) if data["scores"] else 0
+            avg_score = averages[skill]
             if avg_score >= 90:
                 data["current_level"] = "Expert"
             elif avg_score >= 75:
@@ -754,114 +796,46 @@ class ProgressTrackerService:
         if len(submissions) < 2:
             return "stable"
 
-        scores = [s.get("score", 0) for s in submissions]
-        if len(scores) < 2:
-            return "stable"
-
-        recent_avg = sum(scores[-2:]) / 2
-        earlier_avg = sum(scores[:-2]) / len(scores[:-2]) if len(scores) > 2 else scores[0]
-
-        diff = recent_avg - earlier_avg
-        if diff > 10:
-            return "improving"
-        elif diff < -10:
-            return "declining"
-        else:
-            return "stable"
+        return _score_trend([s.get("score", 0) for s in submissions], 10)
 
     def _calculate_real_streak(self, submissions: List[Dict[str, Any]]) -> int:
         """Calculate submission streak from real data"""
-        if not submissions:
-            return 0
-
-        # Sort by submission date
-        sorted_submissions = sorted(submissions, key=lambda x: x.get("submitted_at", ""))
-
-        # For simplicity, return number of submissions as streak
-        return len(sorted_submissions)
-
-    def _group_real_submissions_by_month(
-        self, submissions: List[Dict[str, Any]], months: int
-    ) -> List[Dict]:
-        """Group real submissions by month"""
-        from collections import defaultdict
-
+        # Submissions are already in date order from indexing; for simplicity the streak is
+        # the number of submissions
+        return len(submissions)
+
+    def _group_real_submissions(
+        self, indices: List[int], bucket_key: Callable[[datetime], str], limit: int
+    ) -> Dict[str, Any]:
+        """Group real submissions into the latest ``limit`` date buckets, with metric columns"""
         grouped = defaultdict(list)
 
-        for submission in submissions:
-            date_str = submission.get("submitted_at", "")
-            if date_str:
-                try:
-                    date = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
-                    month_key = date.strftime("%Y-%m")
-                    grouped[month_key].append(submission)
-                except:
-                    continue
-
-        result = []
-        for month, subs in sorted(grouped.items()):
-            if subs:
-                avg_score = sum(s.get("score", 0) for s in subs) / len(subs)
-                result.append(
-                    {"period": month, "count": len(subs), "avg_score": round(avg_score, 1)}
-                )
-
-        return result[-months:] if len(result) > months else result
-
-    def _group_real_submissions_by_week(
-        self, submissions: List[Dict[str, Any]], weeks: int
-    ) -> List[Dict]:
-        """Group real submissions by week"""
-        from collections import defaultdict
-
-        grouped = defaultdict(list)
-
-        for submission in submissions:
-            date_str = submission.get("submitted_at", "")
-            if date_str:
-                try:
-                    date = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
-                    week_start = date - timedelta(days=date.weekday())
-                    week_key = week_start.strftime("%Y-W%W")
-                    grouped[week_key].append(submission)
-                except:
-                    continue
-
-        result = []
-        for week, subs in sorted(grouped.items()):
-            if subs:
-                avg_score = sum(s.get("score", 0) for s in subs) / len(subs)
-                result.append(
-                    {"period": week, "count": len(subs), "avg_score": round(avg_score, 1)}
-                )
-
-        return result[-weeks:] if len(result) > weeks else result
+        for index in indices:
+            date = self._submitted_dates[index]
+            if date is not None:
+                grouped[bucket_key(date)].append(self._scores[index])
+
+        timeline = []
+        score_trend = []
+        submission_count = []
+        labels = []
+        # Fill the timeline and the metric columns in one pass over the kept buckets
+        for period in sorted(grouped)[-limit:]:
+            scores = grouped[period]
+            avg_score = round(sum(scores) / len(scores), 1)
+            timeline.append({"period": period, "count": len(scores), "avg_score": avg_score})
+            score_trend.append(avg_score)
+            submission_count.append(len(scores))
+            labels.append(period)
 
-    def _group_real_submissions_by_day(
-        self, submissions: List[Dict[str, Any]], days: int
-    ) -> List[Dict]:
-        """Group real submissions by day"""
-        from collections import defaultdict
-
-        grouped = defaultdict(list)
-
-        for submission in submissions:
-            date_str = submission.get("submitted_at", "")
-            if date_str:
-                try:
-                    date = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
-                    day_key = date.strftime("%Y-%m-%d")
-                    grouped[day_key].append(submission)
-                except:
-                    continue
-
-        result = []
-        for day, subs in sorted(grouped.items()):
-            if subs:
-                avg_score = sum(s.get("score", 0) for s in subs) / len(subs)
-                result.append({"period": day, "count": len(subs), "avg_score": round(avg_score, 1)})
-
-        return result[-days:] if len(result) > days else result
+        return {
+            "timeline": timeline,
+            "metrics": {
+                "score_trend": score_trend,
+                "submission_count": submission_count,
+                "labels": labels,
+            },
+        }
 
     def get_all_students_overview(self) -> Dict[str, Any]:
         """Get overview of all students for teacher dashboard"""
@@ -972,9 +946,7 @@ class ProgressTrackerService:
                     "score": s.get("score", 0),
                     "submitted_at": s.get("submitted_at", "")[:19],
                 }
-                for s in sorted(
-                    self.submissions_data, key=lambda x: x.get("submitted_at", ""), reverse=True
-                )[:10]
+                for s in reversed(self.submissions_data[-10:])
             ],
         }
 
@@ -1005,6 +977,7 @@ class ProgressTrackerService:
                     or student_identifier.lower() in submission.get("student_email", "").lower()
                 )
             ]
+            self._index_submissions()
 
             # Save updated data back to file
             self._save_submissions_data()
@@ -1027,6 +1000,7 @@ class ProgressTrackerService:
                 for submission in self.submissions_data
                 if submission.get("id", "") != submission_id
             ]
+            self._index_submissions()
 
             # Save updated data back to file
             self._save_submissions_data()
@@ -1042,6 +1016,7 @@ class ProgressTrackerService:
         """Clear all submission data"""
         try:
             self.submissions_data = []
+            self._index_submissions()
             self._save_submissions_data()
             return True
         except Exception as e:
@@ -1051,10 +1026,7 @@ class ProgressTrackerService:
     def _save_submissions_data(self) -> bool:
         """Save submissions data back to JSON file"""
         try:
-            submissions_file = os.path.join(
-                os.path.dirname(__file__), "..", "submissions_data.json"
-            )
-            with open(submissions_file, "w") as f:
+            with open(_SUBMISSIONS_FILE, "w") as f:
                 json.dump(self.submissions_data, f, indent=2)
             return True
         except Exception as e:
@@ -76,6 +76,7 @@ def setup_database():
         db.users.create_index("email", unique=True)
         db.assignments.create_index("created_by")
         db.submissions.create_index([("student_id", 1), ("assignment_id", 1)])
+        db.submissions.create_index([("assignment_id", 1), ("student_id", 1)])
         
         print("✓ Database initialized successfully")
         return True
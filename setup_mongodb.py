@@ -48,7 +48,8 @@ def test_and_initialize():
                 ('created_at', {}),
             ],
             'submissions': [
-                ('assignment_id', {}),
+                # Compound prefix also serves assignment_id-only lookups
+                ([('assignment_id', 1), ('student_id', 1)], {}),
                 ('user_id', {}),
                 ('submitted_at', {}),
             ],
@@ -0,0 +1,56 @@
+"""
+Unit tests for Progress Tracker Routes
+"""
+import json
+from unittest.mock import patch
+
+import pytest
+from flask import Flask
+
+
+@pytest.fixture
+def progress_app():
+    """Bare Flask app with only the progress tracker blueprint registered"""
+    from routes.progress_tracker import progress_tracker_bp
+
+    app = Flask(__name__)
+    app.secret_key = "test"
+    app.register_blueprint(progress_tracker_bp, url_prefix="/api/progress")
+    return app
+
+
+@pytest.mark.unit
+class TestProgressTrackerRoutes:
+    """Test suite for progress tracker JSON responses"""
+
+    def test_orjson_matches_jsonify(self, progress_app):
+        """orjson responses carry the same JSON as jsonify, keys sorted the same way"""
+        from flask import jsonify
+
+        from routes import progress_tracker
+
+        payload = {"success": True, "data": {"b": [("Python", {"score": 91.5})], "a": None}}
+        with progress_app.app_context():
+            fast = progress_tracker._json_response(payload)
+            with patch.object(progress_tracker, "orjson", None):
+                slow = progress_tracker._json_response(payload)
+            expected = jsonify(payload)
+
+        assert fast.mimetype == "application/json"
+        assert json.loads(fast.get_data()) == json.loads(expected.get_data())
+        body = fast.get_data(as_text=True)
+        assert body.index('"a"') < body.index('"b"')
+        assert slow.get_data() == expected.get_data()
+
+    def test_overview_route(self, progress_app):
+        """The overview endpoint serves the service payload"""
+        from routes import progress_tracker
+
+        overview = {"overview": {"total_assignments": 0}, "profile": {}}
+        with patch.object(
+            progress_tracker.progress_service, "get_student_overview", return_value=overview
+        ):
+            response = progress_app.test_client().get("/api/progress/overview/ann")
+
+        assert response.status_code == 200
+        assert response.get_json() == {"success": True, "data": overview}
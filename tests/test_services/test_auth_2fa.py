@@ -17,6 +17,12 @@ class TestOTPService:
         assert ("test@example.com" in uri or "test%40example.com" in uri)
         assert "secret=JBSWY3DPEHPK3PXP" in uri
 
+    def test_setup_payload(self):
+        secret = "JBSWY3DPEHPK3PXP"
+        uri, qr_code = OTPService.get_setup_payload(secret, "test@example.com")
+        assert uri == OTPService.get_provisioning_uri(secret, "test@example.com")
+        assert qr_code == OTPService.generate_qr_code(uri)
+
     def test_verify_otp(self):
         secret = OTPService.generate_secret()
         # Note: We can't easily generate a valid OTP without the time component matching perfectly,
@@ -3,8 +3,13 @@
 Tests external service integration and webhook handling.
 Requirements: 2.1, 2.2
 """
+import asyncio
+import json
+from collections.abc import Mapping
+
 import pytest
-from unittest.mock import patch, MagicMock
+import requests
+from unittest.mock import AsyncMock, patch, MagicMock
 from services.integration_service import (
     IntegrationService,
     IntegrationType,
@@ -12,6 +17,12 @@ from services.integration_service import (
 )
 
 
+def _sent_payload(mock_request):
+    """Decode the JSON body of the last mocked request."""
+    kwargs = mock_request.call_args.kwargs
+    return json.loads(kwargs["data"]) if "data" in kwargs else kwargs["json"]
+
+
 class TestIntegrationServiceInit:
     """Test suite for IntegrationService initialization."""
 
@@ -21,7 +32,7 @@ class TestIntegrationServiceInit:
 
         assert service is not None
         assert isinstance(service.active_integrations, dict)
-        assert isinstance(service.notification_templates, dict)
+        assert isinstance(service.notification_templates, Mapping)
 
     def test_notification_templates_loaded(self):
         """Test that notification templates are loaded."""
@@ -30,6 +41,14 @@ class TestIntegrationServiceInit:
         assert "slack" in service.notification_templates
         assert "discord" in service.notification_templates
 
+    def test_notification_templates_shared_and_read_only(self):
+        """Test that templates are shared across instances and cannot be rebound."""
+        service = IntegrationService()
+
+        assert service.notification_templates is IntegrationService().notification_templates
+        with pytest.raises(TypeError):
+            service.notification_templates["teams"] = {}
+
     def test_slack_templates_structure(self):
         """Test Slack templates have correct structure."""
         service = IntegrationService()
@@ -78,6 +97,7 @@ class TestGitHubIntegration:
         assert result["status"] == "success"
         assert result["github_username"] == "testuser"
         assert "user_123_github" in service.active_integrations
+        assert service.active_integrations["user_123_github"].validated is True
 
     @patch("services.integration_service.requests.get")
     def test_setup_github_integration_invalid_token(self, mock_get):
@@ -184,10 +204,46 @@ class TestSlackIntegration:
         result = service.setup_slack_integration(
             user_id="user_123",
             webhook_url="https://invalid.webhook.url",
+            validate=True,
         )
+        service._executor.shutdown(wait=True)
 
-        assert result["status"] == "error"
-        assert "Invalid" in result["message"]
+        assert result["status"] == "pending_validation"
+        assert "user_123_slack" not in service.active_integrations
+        assert service.get_integration_status("user_123")["integrations"]["slack"] is False
+
+    @patch("services.integration_service.requests.post")
+    def test_setup_slack_integration_skips_ping_by_default(self, mock_post):
+        """Test Slack setup does not contact the webhook unless asked to."""
+        service = IntegrationService()
+
+        result = service.setup_slack_integration(
+            user_id="user_123",
+            webhook_url="https://hooks.slack.com/services/xxx",
+        )
+
+        assert result["status"] == "success"
+        assert service.active_integrations["user_123_slack"].validated is None
+        mock_post.assert_not_called()
+
+    @patch("services.integration_service.requests.post")
+    def test_setup_slack_integration_validated_in_background(self, mock_post):
+        """Test a successful background ping marks the integration as validated."""
+        service = IntegrationService()
+
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_post.return_value = mock_response
+
+        service.setup_slack_integration(
+            user_id="user_123",
+            webhook_url="https://hooks.slack.com/services/xxx",
+            validate=True,
+        )
+        service._executor.shutdown(wait=True)
+
+        assert service.active_integrations["user_123_slack"].validated is True
+        mock_post.assert_called_once()
 
     @patch("services.integration_service.requests.post")
     def test_send_slack_notification_success(self, mock_post):
@@ -218,6 +274,97 @@ class TestSlackIntegration:
 
         assert result is True
 
+    @patch("services.integration_service.requests.post")
+    def test_send_slack_notification_formats_fields(self, mock_post):
+        """Test Slack attachment fields are filled without touching the template."""
+        service = IntegrationService()
+
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_post.return_value = mock_response
+
+        service.setup_slack_integration(
+            user_id="user_123",
+            webhook_url="https://hooks.slack.com/services/xxx",
+        )
+        service.send_slack_notification(
+            user_id="user_123",
+            notification_type="assignment_graded",
+            data={"title": "Sorting", "score": 85, "max_score": 100, "percentage": 85},
+        )
+
+        message = _sent_payload(mock_post)
+        fields = message["attachments"][0]["fields"]
+        assert message["text"] == "Assignment 'Sorting' has been graded"
+        assert fields[0]["value"] == "85/100"
+        assert fields[1]["value"] == "85%"
+        template_fields = service.notification_templates["slack"]["assignment_graded"][
+            "attachments"
+        ][0]["fields"]
+        assert template_fields[0]["value"] == "{score}/{max_score}"
+
+    @patch("services.integration_service.requests.post")
+    def test_send_slack_notification_uses_timeout(self, mock_post):
+        """Test webhook posts are bounded by a timeout and fail cleanly on expiry."""
+        service = IntegrationService()
+        service.setup_slack_integration("user_123", "https://hooks.slack.com/services/xxx")
+
+        mock_post.side_effect = requests.Timeout("read timed out")
+
+        result = service.send_slack_notification(
+            user_id="user_123",
+            notification_type="assignment_graded",
+            data={"title": "Test", "score": 85, "max_score": 100, "percentage": 85},
+        )
+
+        assert result is False
+        assert mock_post.call_args.kwargs["timeout"] is not None
+
+    @patch("services.integration_service.requests.post")
+    def test_send_slack_notification_reuses_formatted_message(self, mock_post):
+        """Test repeated notifications with the same data reuse the formatted message."""
+        service = IntegrationService()
+        service.setup_slack_integration("user_123", "https://hooks.slack.com/services/xxx")
+
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_post.return_value = mock_response
+        data = {"title": "Test", "score": 85, "max_score": 100, "percentage": 85}
+
+        service.send_slack_notification("user_123", "assignment_graded", data)
+        service.send_slack_notification("user_123", "assignment_graded", dict(data))
+
+        cache_info = service._cached_message.cache_info()
+        assert cache_info.misses == 1
+        assert cache_info.hits == 1
+
+    def test_format_message_cache_keeps_value_types_apart(self):
+        """Test equal values of different types are not served each other's message."""
+        service = IntegrationService()
+        data = {"title": "Test", "score": 95, "max_score": 100, "percentage": 95}
+
+        as_int = service._format_message("slack", "assignment_graded", data)
+        as_float = service._format_message("slack", "assignment_graded", {**data, "score": 95.0})
+        as_bool = service._format_message("slack", "assignment_graded", {**data, "score": True})
+        as_one = service._format_message("slack", "assignment_graded", {**data, "score": 1})
+
+        assert as_int["attachments"][0]["fields"][0]["value"] == "95/100"
+        assert as_float["attachments"][0]["fields"][0]["value"] == "95.0/100"
+        assert as_bool["attachments"][0]["fields"][0]["value"] == "True/100"
+        assert as_one["attachments"][0]["fields"][0]["value"] == "1/100"
+
+    def test_format_message_with_unhashable_data(self):
+        """Test formatting still works when data values cannot be cached."""
+        service = IntegrationService()
+
+        message = service._format_message(
+            "slack",
+            "assignment_graded",
+            {"title": "Test", "score": [85], "max_score": 100, "percentage": 85},
+        )
+
+        assert message["attachments"][0]["fields"][0]["value"] == "[85]/100"
+
     def test_send_slack_notification_not_configured(self):
         """Test sending notification when not configured."""
         service = IntegrationService()
@@ -285,9 +432,12 @@ class TestDiscordIntegration:
         result = service.setup_discord_integration(
             user_id="user_123",
             webhook_url="https://invalid.webhook.url",
+            validate=True,
         )
+        service._executor.shutdown(wait=True)
 
-        assert result["status"] == "error"
+        assert result["status"] == "pending_validation"
+        assert "user_123_discord" not in service.active_integrations
 
     @patch("services.integration_service.requests.post")
     def test_send_discord_notification_success(self, mock_post):
@@ -422,6 +572,27 @@ class TestIntegrationStatus:
         assert status["integrations"]["slack"] is True
         assert status["total_active"] >= 1
 
+    @patch("services.integration_service.requests.post")
+    def test_get_integration_status_is_per_user(self, mock_post):
+        """Test status only reflects the requested user's integrations."""
+        service = IntegrationService()
+
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_post.return_value = mock_response
+
+        service.setup_slack_integration(
+            user_id="user_123",
+            webhook_url="https://hooks.slack.com/services/xxx",
+        )
+
+        assert service.get_integration_status("user_123")["integrations"]["slack"] is True
+        assert service.get_integration_status("user_12")["total_active"] == 0
+
+        service.remove_integration("user_123", "slack")
+
+        assert service.get_integration_status("user_123")["total_active"] == 0
+
 
 class TestRemoveIntegration:
     """Test suite for removing integrations."""
@@ -481,10 +652,13 @@ class TestNotifyAssignmentGraded:
                 "percentage": 85,
             },
         )
+        service._executor.shutdown(wait=True)
 
-        assert "notifications_sent" in result
-        assert result["notifications_sent"] >= 1
-        assert result["results"]["slack"] == "success"
+        assert result["status"] == "queued"
+        assert result["notifications_queued"] == 1
+        assert result["platforms"] == ["slack"]
+        mock_post.assert_called_once()
+        assert len(service.failed_notifications) == 0
 
     def test_notify_assignment_graded_no_integrations(self):
         """Test notification when no integrations configured."""
@@ -495,5 +669,127 @@ class TestNotifyAssignmentGraded:
             assignment_data={"title": "Test"},
         )
 
-        assert result["notifications_sent"] == 0
+        assert result["notifications_queued"] == 0
+
+    def test_notify_assignment_graded_async(self):
+        """Test async notifications are sent to every configured platform."""
+        service = IntegrationService()
+        service.setup_slack_integration("user_123", "https://hooks.slack.com/services/xxx")
+        service.setup_discord_integration("user_123", "https://discord.com/api/webhooks/xxx")
+
+        with patch.object(
+            service, "_post_json_async", AsyncMock(side_effect=[200, 500])
+        ) as mock_post:
+            result = asyncio.run(
+                service.notify_assignment_graded_async(
+                    user_id="user_123",
+                    assignment_data={
+                        "title": "Test Assignment",
+                        "score": 85,
+                        "max_score": 100,
+                        "percentage": 85,
+                    },
+                )
+            )
+
+        assert mock_post.await_count == 2
+        assert result["notifications_sent"] == 2
+        assert result["results"] == {"slack": "success", "discord": "failed"}
+
+        # Both posts shared one session, closed once the notifications were sent
+        (session,) = {call.args[0] for call in mock_post.await_args_list}
+        assert session.closed
+
+    def test_send_notification_async_closes_its_session(self):
+        """Test every event loop's single notification closes the session it opened."""
+        service = IntegrationService()
+        service.setup_slack_integration("user_123", "https://hooks.slack.com/services/xxx")
+        data = {"title": "Test", "score": 85, "max_score": 100, "percentage": 85}
+
+        with patch.object(service, "_post_json_async", AsyncMock(return_value=200)) as mock_post:
+            for _ in range(2):
+                assert asyncio.run(
+                    service.send_slack_notification_async("user_123", "assignment_graded", data)
+                )
+
+        sessions = [call.args[0] for call in mock_post.await_args_list]
+        assert len(sessions) == 2
+        assert all(session.closed for session in sessions)
+
+    def test_send_slack_notification_async_not_configured(self):
+        """Test async Slack notification when not configured."""
+        service = IntegrationService()
+
+        result = asyncio.run(
+            service.send_slack_notification_async("user_123", "assignment_graded", {})
+        )
+
+        assert result is False
+
+    @patch("services.integration_service.time.sleep")
+    @patch("services.integration_service.requests.post")
+    def test_notify_assignment_graded_dead_letters_failures(self, mock_post, mock_sleep):
+        """Test notifications failing every retry are recorded as failed."""
+        service = IntegrationService()
+        service.setup_slack_integration("user_123", "https://hooks.slack.com/services/xxx")
+
+        mock_response = MagicMock()
+        mock_response.status_code = 500
+        mock_post.return_value = mock_response
+
+        service.notify_assignment_graded(
+            user_id="user_123",
+            assignment_data={"title": "Test", "score": 85, "max_score": 100, "percentage": 85},
+        )
+        service._executor.shutdown(wait=True)
+
+        assert mock_post.call_count == 3
+        assert len(service.failed_notifications) == 1
+        assert service.failed_notifications[0]["platform"] == "slack"
+        assert service.failed_notifications[0]["error"] == "HTTP 500"
+
+    @patch("services.integration_service.time.sleep")
+    @patch("services.integration_service.requests.post")
+    def test_notify_assignment_graded_retries_connection_errors(self, mock_post, mock_sleep):
+        """Test a connection error is retried and a later success is not dead-lettered."""
+        service = IntegrationService()
+        service.setup_slack_integration("user_123", "https://hooks.slack.com/services/xxx")
+
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_post.side_effect = [requests.ConnectionError("reset"), mock_response]
+
+        assert service._deliver_notification(
+            "slack",
+            "user_123",
+            "assignment_graded",
+            {"title": "Test", "score": 85, "max_score": 100, "percentage": 85},
+        )
+        assert mock_post.call_count == 2
+        assert len(service.failed_notifications) == 0
+
+    @patch("services.integration_service.time.sleep")
+    @patch("services.integration_service.requests.post")
+    def test_notify_assignment_graded_does_not_retry_permanent_failures(
+        self, mock_post, mock_sleep
+    ):
+        """Test client errors, unknown templates and removed integrations are not retried."""
+        service = IntegrationService()
+        service.setup_slack_integration("user_123", "https://hooks.slack.com/services/xxx")
+        data = {"title": "Test", "score": 85, "max_score": 100, "percentage": 85}
+
+        mock_response = MagicMock()
+        mock_response.status_code = 404
+        mock_post.return_value = mock_response
+
+        assert not service._deliver_notification("slack", "user_123", "assignment_graded", data)
+        assert mock_post.call_count == 1
+        assert len(service.failed_notifications) == 1
+
+        assert not service._deliver_notification("slack", "user_123", "unknown_type", data)
+        service.remove_integration("user_123", "slack")
+        assert not service._deliver_notification("slack", "user_123", "assignment_graded", data)
 
+        assert mock_post.call_count == 1
+        mock_sleep.assert_not_called()
+        assert len(service.failed_notifications) == 1
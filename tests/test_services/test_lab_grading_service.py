@@ -3,6 +3,9 @@
 Tests lab-specific grading and rubric application functionality.
 Requirements: 2.1, 2.2
 """
+import asyncio
+from unittest.mock import patch
+
 import pytest
 from services.lab_grading_service import (
     EngineeringLabGradingService,
@@ -238,6 +241,79 @@ class TestScoreCalculation:
         assert scores["percentage"] < 100
 
 
+class TestRunTests:
+    """Test suite for test case execution."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.service = EngineeringLabGradingService()
+
+    @patch("services.lab_grading_service.grade_submission")
+    def test_run_tests_grades_all_cases_in_one_call(self, mock_grade):
+        """Test that all test cases are graded with a single call."""
+        mock_grade.return_value = {
+            "test_results": [
+                {"passed": True, "actual_output": "1", "error": None},
+                {"passed": False, "actual_output": "0", "error": None},
+                {"passed": True, "actual_output": "3", "error": None},
+            ]
+        }
+        test_cases = [
+            {"input": "1", "expected": "1"},
+            {"input": "2", "expected": "2"},
+            {"input": "3", "expected": "3"},
+        ]
+
+        results = asyncio.run(self.service._run_tests("code", test_cases, "python"))
+
+        mock_grade.assert_called_once_with("code", test_cases, "python")
+        assert results["total"] == 3
+        assert results["passed"] == 2
+        assert [d["test"] for d in results["details"]] == [1, 2, 3]
+        assert results["details"][1]["actual"] == "0"
+
+    @patch("services.lab_grading_service.grade_submission")
+    def test_run_tests_records_errors(self, mock_grade):
+        """Test that a test case with an execution error keeps its full detail."""
+        mock_grade.return_value = {
+            "test_results": [
+                {"passed": False, "actual_output": "boom", "error": "boom"},
+                {"passed": True, "actual_output": "2", "error": None},
+            ]
+        }
+
+        results = asyncio.run(
+            self.service._run_tests("code", [{"input": "1"}, {"input": "2"}], "python")
+        )
+
+        assert results["passed"] == 1
+        assert results["details"][0] == {
+            "test": 1,
+            "passed": False,
+            "input": "1",
+            "expected": "",
+            "actual": "boom",
+            "error": "boom",
+        }
+        assert "error" not in results["details"][1]
+
+    @patch("services.lab_grading_service.grade_submission")
+    def test_run_tests_grading_failure(self, mock_grade):
+        """Test that a failed grading call marks every test case as errored."""
+        mock_grade.side_effect = ValueError("grader down")
+
+        results = asyncio.run(
+            self.service._run_tests("code", [{"input": "1"}, {"input": "2"}], "python")
+        )
+
+        assert results["passed"] == 0
+        assert results["success_rate"] == 0
+        assert results["details"] == [
+            {"test": 1, "error": "grader down"},
+            {"test": 2, "error": "grader down"},
+        ]
+
+
 class TestFeedbackGeneration:
     """Test suite for feedback generation."""
 
@@ -102,10 +102,10 @@ class TestGaugeMetrics:
         assert metrics_service.pending_submissions is not None
         assert hasattr(metrics_service.pending_submissions, 'set')
 
-    def test_cache_hit_ratio_gauge_exists(self, metrics_service):
-        """Test that cache_hit_ratio gauge exists."""
-        assert metrics_service.cache_hit_ratio is not None
-        assert hasattr(metrics_service.cache_hit_ratio, 'set')
+    def test_cache_counters_exist(self, metrics_service):
+        """Test that cache hit/miss counters exist."""
+        assert hasattr(metrics_service.cache_hits, 'inc')
+        assert hasattr(metrics_service.cache_misses, 'inc')
 
     def test_database_connections_gauge_exists(self, metrics_service):
         """Test that database_connections gauge exists."""
@@ -174,6 +174,80 @@ class TestTrackSubmissionDecorator:
         with pytest.raises(ValueError):
             failing_function()
 
+    def test_track_submission_disabled_returns_function(self, metrics_service):
+        """Test that no wrapper is installed when metrics are disabled."""
+
+        def sample_function():
+            return {"score": 85}
+
+        with patch.object(metrics_service, "_METRICS_ENABLED", False):
+            decorated = metrics_service.track_submission(language="python")(sample_function)
+            api_decorated = metrics_service.track_api_request("disabled")(sample_function)
+
+        assert decorated is sample_function
+        assert api_decorated is sample_function
+
+    def test_track_submission_counts_are_flushed(self, metrics_service):
+        """Test that buffered submission counts reach the counter on flush."""
+        from prometheus_client import REGISTRY
+
+        labels = {"language": "flushtest", "status": "success"}
+
+        @metrics_service.track_submission(language="flushtest")
+        def sample_function():
+            return {"score": 90}
+
+        metrics_service.flush_pending_metrics()
+        before = REGISTRY.get_sample_value("submissions_total", labels) or 0
+
+        for _ in range(3):
+            sample_function()
+        metrics_service.flush_pending_metrics()
+        metrics_service.flush_pending_metrics()
+
+        assert REGISTRY.get_sample_value("submissions_total", labels) == before + 3
+
+    def test_exited_thread_buffers_are_flushed_and_dropped(self, metrics_service):
+        """Test that a finished thread's counts are flushed and its buffer released."""
+        import threading
+        from prometheus_client import REGISTRY
+
+        labels = {"language": "threadtest", "status": "success"}
+
+        @metrics_service.track_submission(language="threadtest")
+        def sample_function():
+            return None
+
+        metrics_service.flush_pending_metrics()
+        before = REGISTRY.get_sample_value("submissions_total", labels) or 0
+        buffers = len(metrics_service._pending_buffers)
+
+        threads = [threading.Thread(target=sample_function) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+            thread.join()
+        metrics_service.flush_pending_metrics()
+
+        assert REGISTRY.get_sample_value("submissions_total", labels) == before + 5
+        assert len(metrics_service._pending_buffers) == buffers
+
+    def test_track_submission_observes_scores(self, metrics_service):
+        """Test that scores from dict and attribute results are observed, others skipped."""
+        from types import SimpleNamespace
+        from prometheus_client import REGISTRY
+
+        @metrics_service.track_submission(language="scoretest")
+        def sample_function(result):
+            return result
+
+        before = REGISTRY.get_sample_value("code_quality_score_count") or 0
+        sample_function({"score": 90})
+        sample_function(SimpleNamespace(score=70))
+        sample_function({"feedback": "no score"})
+        sample_function(None)
+
+        assert REGISTRY.get_sample_value("code_quality_score_count") == before + 2
+
 
 class TestTrackApiRequestDecorator:
     """Test suite for track_api_request decorator."""
@@ -188,6 +262,44 @@ class TestTrackApiRequestDecorator:
         decorator = metrics_service.track_api_request("test_endpoint")
         assert callable(decorator)
 
+    def test_track_api_request_observes_duration(self, metrics_service):
+        """Test that track_api_request records a duration for the request."""
+        from flask import Flask
+        from prometheus_client import REGISTRY
+
+        labels = {"method": "GET", "endpoint": "observe_test", "status": "200"}
+        before = REGISTRY.get_sample_value("api_request_duration_seconds_count", labels) or 0
+
+        @metrics_service.track_api_request("observe_test")
+        def view():
+            return "ok"
+
+        with Flask(__name__).test_request_context("/", method="GET"):
+            assert view() == "ok"
+            assert view() == "ok"
+
+        after = REGISTRY.get_sample_value("api_request_duration_seconds_count", labels)
+        assert after == before + 2
+
+    def test_track_api_request_records_errors_as_500(self, metrics_service):
+        """Test that a failing request is recorded once with status 500."""
+        from flask import Flask
+        from prometheus_client import REGISTRY
+
+        labels = {"method": "POST", "endpoint": "error_test", "status": "500"}
+        before = REGISTRY.get_sample_value("api_request_duration_seconds_count", labels) or 0
+
+        @metrics_service.track_api_request("error_test")
+        def view():
+            raise RuntimeError("boom")
+
+        with Flask(__name__).test_request_context("/", method="POST"):
+            with pytest.raises(RuntimeError):
+                view()
+
+        after = REGISTRY.get_sample_value("api_request_duration_seconds_count", labels)
+        assert after == before + 1
+
 
 class TestMetricsEndpoint:
     """Test suite for metrics endpoint."""
@@ -204,9 +316,18 @@ class TestMetricsEndpoint:
         assert isinstance(result, Response)
 
     def test_metrics_endpoint_content_type(self, metrics_service):
-        """Test that metrics endpoint returns text/plain content type."""
+        """Test that metrics endpoint returns the Prometheus exposition content type."""
+        from prometheus_client import CONTENT_TYPE_LATEST
+        result = metrics_service.metrics_endpoint()
+        assert result.content_type == CONTENT_TYPE_LATEST
+
+    def test_metrics_endpoint_streams_exposition(self, metrics_service):
+        """Test that the streamed body carries the registered metric families."""
         result = metrics_service.metrics_endpoint()
-        assert result.content_type == "text/plain; charset=utf-8"
+        assert result.is_streamed
+        body = result.get_data(as_text=True)
+        assert "# TYPE submissions_total counter" in body
+        assert "# TYPE api_request_duration_seconds histogram" in body
 
 
 class TestHelperFunctions:
@@ -248,9 +369,15 @@ class TestHelperFunctions:
         assert metrics_service.update_cache_metrics is not None
         assert callable(metrics_service.update_cache_metrics)
 
-    def test_update_cache_metrics_calculates_ratio(self, metrics_service):
-        """Test that update_cache_metrics calculates hit ratio."""
+    def test_update_cache_metrics_increments_counters(self, metrics_service):
+        """Test that update_cache_metrics adds to the hit and miss counters."""
+        from prometheus_client import REGISTRY
+
+        hits = REGISTRY.get_sample_value("cache_hits_total") or 0
+        misses = REGISTRY.get_sample_value("cache_misses_total") or 0
         metrics_service.update_cache_metrics(80, 20)
+        assert REGISTRY.get_sample_value("cache_hits_total") == hits + 80
+        assert REGISTRY.get_sample_value("cache_misses_total") == misses + 20
 
     def test_update_cache_metrics_handles_zero_total(self, metrics_service):
         """Test that update_cache_metrics handles zero total."""
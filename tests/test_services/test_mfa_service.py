@@ -0,0 +1,186 @@
+"""
+Unit Tests for MFA Service
+Tests TOTP verification, secret lifecycle and backup codes against an in-memory Mongo
+"""
+
+from unittest.mock import patch
+
+import pyotp
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from services.mfa_service import MFAService
+
+
+@pytest.fixture
+def service(monkeypatch):
+    """MFAService backed by a fresh mongomock database with one user"""
+    monkeypatch.setenv("MFA_BACKUP_CODE_KEY", "test-backup-code-key")
+    db = mongomock.MongoClient().db
+    db.users.insert_one({"_id": "u1", "email": "u1@example.com"})
+    return MFAService(db)
+
+
+@pytest.mark.unit
+class TestVerifyToken:
+    """Test suite for MFAService.verify_token"""
+
+    def test_valid_token(self, service):
+        """A current TOTP code for the stored secret verifies"""
+        secret = service.generate_secret("u1")
+        assert service.verify_token("u1", pyotp.TOTP(secret).now())
+
+    def test_unknown_user(self, service):
+        """Users without a secret never verify"""
+        assert not service.verify_token("missing", "123456")
+
+    def test_totp_is_cached(self, service):
+        """Repeat verifications reuse the cached TOTP instead of hitting Mongo"""
+        secret = service.generate_secret("u1")
+        service.verify_token("u1", "000000")
+        service.users_collection = None
+        assert service.verify_token("u1", pyotp.TOTP(secret).now())
+
+    def test_disable_invalidates_cache(self, service):
+        """Disabling MFA drops the cached TOTP"""
+        secret = service.generate_secret("u1")
+        token = pyotp.TOTP(secret).now()
+        assert service.verify_token("u1", token)
+        service.disable_mfa("u1", "password")
+        assert not service.verify_token("u1", token)
+
+    def test_new_secret_invalidates_cache(self, service):
+        """Regenerating the secret does not keep verifying against the old one"""
+        old = service.generate_secret("u1")
+        assert service.verify_token("u1", pyotp.TOTP(old).now())
+        new = service.generate_secret("u1")
+        assert service.verify_token("u1", pyotp.TOTP(new).now())
+
+
+@pytest.mark.unit
+class TestBackupCodes:
+    """Test suite for backup code generation and verification"""
+
+    def test_code_is_consumed(self, service):
+        """A backup code verifies exactly once"""
+        code = service.generate_backup_codes("u1", count=3)[1]
+        assert service.verify_backup_code("u1", code)
+        assert not service.verify_backup_code("u1", code)
+        assert len(service.users_collection.find_one({"_id": "u1"})["backup_codes"]) == 2
+
+    def test_refuses_without_key(self, service, monkeypatch):
+        """Without a configured pepper no codes are issued or accepted"""
+        monkeypatch.delenv("MFA_BACKUP_CODE_KEY")
+        monkeypatch.delenv("SECRET_KEY", raising=False)
+
+        with pytest.raises(RuntimeError):
+            service.generate_backup_codes("u1")
+        with pytest.raises(RuntimeError):
+            service.verify_backup_code("u1", "1234-5678")
+        assert "backup_codes" not in service.users_collection.find_one({"_id": "u1"})
+
+    def test_code_format(self, service):
+        """Codes are distinct NNNN-NNNN strings"""
+        import re
+
+        codes = service.generate_backup_codes("u1", count=10)
+        assert all(re.fullmatch(r"\d{4}-\d{4}", code) for code in codes)
+        assert len(set(codes)) == 10
+
+    def test_wrong_code_skips_bcrypt(self, service):
+        """A code with no matching index is rejected without any bcrypt verify"""
+        service.generate_backup_codes("u1", count=3)
+        with patch("passlib.hash.bcrypt.verify") as verify:
+            assert not service.verify_backup_code("u1", "0000-0000x")
+        verify.assert_not_called()
+
+    def test_legacy_plain_hashes(self, service):
+        """Codes stored as bare bcrypt hashes still verify"""
+        from passlib.hash import bcrypt
+
+        service.users_collection.update_one(
+            {"_id": "u1"}, {"$set": {"backup_codes": [bcrypt.hash("1234-5678")]}}
+        )
+        assert service.verify_backup_code("u1", "1234-5678")
+        assert service.users_collection.find_one({"_id": "u1"})["backup_codes"] == []
+
+    def test_codes_are_bound_to_user(self, service):
+        """A code copied into another user's record does not verify for them"""
+        service.users_collection.insert_one({"_id": "u2"})
+        code = service.generate_backup_codes("u1", count=1)[0]
+        stored = service.users_collection.find_one({"_id": "u1"})["backup_codes"]
+        service.users_collection.update_one({"_id": "u2"}, {"$set": {"backup_codes": stored}})
+
+        assert not service.verify_backup_code("u2", code)
+        assert service.verify_backup_code("u1", code)
+
+
+@pytest.mark.unit
+class TestQRCode:
+    """Test suite for QR code rendering"""
+
+    def test_data_uri(self, service):
+        """Setup renders a PNG data URI without keeping the secret-bearing URI around"""
+        from services.otp_service import _render_qr_png_b64
+
+        secret = pyotp.random_base32()
+        first = service.generate_qr_code("u1@example.com", secret)
+        second = service.generate_qr_code("u1@example.com", secret)
+
+        assert first == second
+        assert first.startswith("data:image/png;base64,")
+        assert not hasattr(_render_qr_png_b64, "cache_info")
+
+
+@pytest.mark.unit
+class TestMFAStatus:
+    """Test suite for MFA status lookups"""
+
+    def test_status_counts_backup_codes(self, service):
+        """Status reports configuration and the remaining backup code count"""
+        service.generate_secret("u1")
+        service.generate_backup_codes("u1", count=4)
+        status = service.get_mfa_status("u1")
+
+        assert status["configured"] is True
+        assert status["enabled"] is False
+        assert status["backup_codes_remaining"] == 4
+        assert status["setup_date"] is not None
+
+    def test_status_unconfigured_user(self, service):
+        """A user without MFA setup is reported as unconfigured"""
+        status = service.get_mfa_status("u1")
+        assert status["configured"] is False
+        assert status["backup_codes_remaining"] == 0
+
+    def test_status_unknown_user(self, service):
+        """Missing users get the default status"""
+        assert service.get_mfa_status("missing") == {"enabled": False, "configured": False}
+
+
+@pytest.mark.unit
+class TestBulkOperations:
+    """Test suite for the bulk MFA helpers"""
+
+    def test_bulk_is_mfa_enabled(self, service):
+        """Every requested user gets an entry, unknown users report False"""
+        service.users_collection.insert_one({"_id": "u2", "mfa_enabled": True})
+        assert service.bulk_is_mfa_enabled(["u1", "u2", "missing"]) == {
+            "u1": False,
+            "u2": True,
+            "missing": False,
+        }
+
+    def test_bulk_disable_mfa(self, service):
+        """Bulk disable clears secrets and cached TOTPs for all users"""
+        service.users_collection.insert_one({"_id": "u2"})
+        tokens = {}
+        for user_id in ("u1", "u2"):
+            tokens[user_id] = pyotp.TOTP(service.generate_secret(user_id)).now()
+            assert service.verify_token(user_id, tokens[user_id])
+
+        assert service.bulk_disable_mfa(["u1", "u2"]) == 2
+        for user_id, token in tokens.items():
+            assert not service.verify_token(user_id, token)
+            assert "mfa_secret" not in service.users_collection.find_one({"_id": user_id})
@@ -6,14 +6,17 @@ from unittest.mock import Mock, patch
 from services.plagiarism_service import (
     CrossLanguagePlagiarismDetector,
     calculate_tfidf_similarity,
+    calculate_tfidf_similarities,
     calculate_sequence_similarity,
     calculate_structure_similarity,
     normalize_code,
     extract_structural_features,
     calculate_feature_similarity,
+    calculate_feature_similarities,
     calculate_pattern_similarity
 )
 import ast
+from services import plagiarism_service
 from settings import Config
 
 
@@ -31,6 +34,25 @@ class TestPlagiarismService:
         assert detector is not None
         assert detector.threshold == 0.91  # Default threshold
 
+    def test_other_submissions_are_projected(self, detector):
+        """Test only the fields the checks read are fetched from Mongo"""
+        app = Mock()
+        app.mongo.db.submissions.find.return_value = [{'code': 'x = 1'}]
+        with patch('services.plagiarism_service.current_app', app):
+            submissions = detector._get_other_submissions('a1', 's1')
+
+        assert submissions == [{'code': 'x = 1'}]
+        query, projection = app.mongo.db.submissions.find.call_args[0]
+        assert query == {'assignment_id': 'a1', 'student_id': {'$ne': 's1'}}
+        assert set(projection) == {'code', 'language', 'student_id', 'submitted_at'}
+
+    def test_pattern_tables_are_shared(self, detector):
+        """Test detectors reuse the module-level pattern tables instead of rebuilding them"""
+        other = CrossLanguagePlagiarismDetector()
+
+        assert other.cross_language_patterns is detector.cross_language_patterns
+        assert other.algorithm_mappings is detector.algorithm_mappings
+
     def test_identical_code_detection(self, detector):
         """Test detection of identical code"""
         code1 = """
@@ -118,6 +140,24 @@ void bubbleSort(int[] arr) {
             # Should detect algorithmic similarity
             assert result is not None
 
+    def test_cross_language_pattern_similarity(self, detector):
+        """Test matching constructs are compared across languages"""
+        python_code = "def total(xs):\n    s = 0\n    for i in range(len(xs)):\n        s = s + xs[i]\n"
+        java_code = "int total(int[] xs) {\n    int s = 0;\n    for (int i = 0; i < n; i++) {\n"
+
+        assert detector._calculate_cross_language_similarity(
+            python_code, java_code, 'python', 'java'
+        ) > 0.5
+        # Languages without patterns have nothing to compare
+        assert detector._calculate_cross_language_similarity(
+            python_code, java_code, 'python', 'c'
+        ) == 0.0
+
+    def test_count_ratio_similarity(self):
+        """Test the count reducer ignores patterns missing from either side"""
+        assert plagiarism_service._count_ratio_similarity([2, 0, 3, 0], [4, 1, 3, 0]) == 0.375
+        assert plagiarism_service._count_ratio_similarity([], []) == 0.0
+
     def test_obfuscation_detection(self, detector):
         """Test detection of obfuscated code"""
         original = "def calculate(x): return x * 2"
@@ -128,6 +168,14 @@ void bubbleSort(int[] arr) {
         # Should still detect high similarity
         assert similarity is not None
 
+    def test_systematic_renaming_detected(self, detector):
+        """Test identical structure under fully renamed identifiers is flagged"""
+        original = "total = price * qty + tax\nprint(total)"
+        renamed = "a = b * c + d\nshow(a)"
+
+        assert detector._detect_advanced_obfuscation(original, renamed)
+        assert not detector._detect_advanced_obfuscation(original, "a = [b, c]\nshow(a)")
+
     def test_code_normalization(self, detector):
         """Test code normalization removes formatting differences"""
         code1 = "def test():\n    return 5"
@@ -165,6 +213,33 @@ void bubbleSort(int[] arr) {
 
         assert viz_data is not None
 
+    def test_heat_map_is_uniform_intensity(self, detector):
+        """Test heat map is sent as the strongest intensity plus per-line widths"""
+        code = "def f():\n\n    return 1"
+        similarities = [{'overall_similarity': 0.5}, {'overall_similarity': 0.9}]
+
+        viz_data = detector._generate_visualization_data(code, similarities)
+
+        assert viz_data['line_widths'] == [8, 0, 12]
+        assert viz_data['line_count'] == 3
+        assert viz_data['uniform_intensity'] == pytest.approx(0.63)
+        assert 'heat_map' not in viz_data
+
+    def test_heat_map_floats_are_quantized(self, detector):
+        """Test heat map floats are trimmed to the precision the client can render"""
+        viz_data = detector._generate_visualization_data(
+            "x = 1", [{'overall_similarity': 0.6453781512605042}]
+        )
+
+        assert viz_data['uniform_intensity'] == 0.452
+        assert viz_data['max_similarity'] == 0.645
+
+    def test_heat_map_ignores_weak_similarities(self, detector):
+        """Test similarities at or below 0.3 leave the heat map cold"""
+        viz_data = detector._generate_visualization_data("x = 1", [{'overall_similarity': 0.3}])
+
+        assert viz_data['uniform_intensity'] == 0.0
+
     @pytest.mark.parametrize("language", ['python', 'java', 'cpp', 'javascript', 'c'])
     def test_multi_language_support(self, detector, language):
         """Test plagiarism detection works for all supported languages"""
@@ -261,6 +336,192 @@ def fib(num):
         # Whitespace-only code should have zero similarity
         assert similarity == 0.0
 
+    def test_tfidf_falls_back_without_sklearn(self):
+        """Test TF-IDF falls back to sequence similarity when scikit-learn is missing"""
+        code1 = "def add(a, b): return a + b"
+        code2 = "def add(x, y): return x + y"
+
+        with patch('services.plagiarism_service._get_sklearn', return_value=None):
+            assert not plagiarism_service.SKLEARN_AVAILABLE
+            assert calculate_tfidf_similarity(code1, code2) == \
+                calculate_sequence_similarity(code1, code2)
+            assert calculate_tfidf_similarities(code1, [code2]) == \
+                [calculate_sequence_similarity(code1, code2)]
+
+    def test_tfidf_batch_scores_each_submission(self):
+        """Test batched TF-IDF returns one score per other submission"""
+        code = "def add(a, b): return a + b"
+        others = [code, "def multiply(x, y): return x * y", "", "class Foo: pass"]
+
+        similarities = calculate_tfidf_similarities(code, others)
+
+        assert len(similarities) == len(others)
+        assert similarities[0] == pytest.approx(1.0, abs=1e-5)
+        assert similarities[2] == 0.0
+        assert all(0.0 <= s <= 1.0 for s in similarities)
+        assert similarities[1] > similarities[3]
+
+    def test_tfidf_batch_empty_inputs(self):
+        """Test batched TF-IDF with empty code or no other submissions"""
+        assert calculate_tfidf_similarities("def f(): pass", []) == []
+        assert calculate_tfidf_similarities("  ", ["def f(): pass"]) == [0.0]
+
+    def test_tfidf_batch_matches_cosine_similarity(self):
+        """Test the linear kernel on normalized rows equals an explicit cosine similarity"""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.metrics.pairwise import cosine_similarity
+
+        code = "for i in range(10): print(i)"
+        others = ["for j in range(10): print(j)", "while x: x -= 1", "print(i, i, i)"]
+
+        matrix = TfidfVectorizer().fit_transform([code] + others)
+        expected = cosine_similarity(matrix[0:1], matrix[1:]).ravel()
+
+        assert calculate_tfidf_similarities(code, others) == pytest.approx(expected, abs=1e-6)
+
+    def test_tfidf_batch_matches_pairwise(self):
+        """Test the batch and pairwise paths drop the same one-character tokens"""
+        code = "def add(a, b): return a + b"
+        renamed = "def add(x, y): return x + y"
+
+        pairwise = calculate_tfidf_similarity(code, renamed)
+
+        assert pairwise == pytest.approx(1.0)
+        assert calculate_tfidf_similarities(code, [renamed]) == pytest.approx([pairwise])
+        assert plagiarism_service.calculate_tfidf_similarity_matrix([code, renamed])[
+            0, 1
+        ] == pytest.approx(pairwise)
+
+    def test_tfidf_matrix_matches_batch(self):
+        """Test each row of the pairwise matrix agrees with the one-against-many batch"""
+        codes = ["def add(a, b): return a + b", "def add(x, y): return x + y", "", "pass"]
+
+        matrix = plagiarism_service.calculate_tfidf_similarity_matrix(codes)
+
+        assert matrix.shape == (4, 4)
+        assert matrix[0, 1:].tolist() == pytest.approx(
+            calculate_tfidf_similarities(codes[0], codes[1:]), abs=1e-6
+        )
+        assert plagiarism_service.calculate_tfidf_similarity_matrix(["", " "]).tolist() == [
+            [0.0, 0.0],
+            [0.0, 0.0],
+        ]
+
+    def test_tfidf_matrix_sparse_output(self):
+        """Test the sparse matrix only stores pairs that share vocabulary"""
+        codes = ["def add(a, b): return a + b", "class Foo: pass", "def add(x, y): return x + y"]
+
+        sparse = plagiarism_service.calculate_tfidf_similarity_matrix(codes, dense_output=False)
+        dense = plagiarism_service.calculate_tfidf_similarity_matrix(codes)
+
+        assert sparse[0, 1] == 0 and (0, 1) not in set(zip(*sparse.nonzero()))
+        assert sparse.toarray() == pytest.approx(dense, abs=1e-6)
+        assert plagiarism_service.calculate_tfidf_similarity_matrix(
+            ["", ""], dense_output=False
+        ).nnz == 0
+
+    def test_batch_detection_prunes_on_tfidf(self):
+        """Test batch detection only scores pairs whose TF-IDF bound reaches the threshold"""
+        codes = ["def add(a, b): return a + b", "def add(a, b):\n    return a + b", "class Foo: pass"]
+        submissions = [{"id": f"sub{i}", "code": code} for i, code in enumerate(codes)]
+
+        structural = Mock(return_value=0.82)
+        with patch.dict(plagiarism_service._SIMILARITY_ALGORITHMS, structural=structural):
+            result = plagiarism_service.batch_detect_plagiarism(submissions, threshold=0.7)
+
+        assert result["total_comparisons"] == 3
+        assert structural.call_count == 1
+        assert [(m["submission1_id"], m["submission2_id"]) for m in result["matches"]] == [
+            ("sub0", "sub1")
+        ]
+
+    def test_batch_detection_in_process_pool(self):
+        """Test pair scoring spread over the process pool matches the sequential result"""
+        submissions = [
+            {"id": f"sub{i}", "code": f"def add(a, b): return a + b + {i % 2}"} for i in range(6)
+        ]
+        algorithms = ["tfidf", "structural", "cross_language"]
+
+        sequential = plagiarism_service.batch_detect_plagiarism(submissions, 0.7, algorithms)
+        with patch.object(plagiarism_service, "_PARALLEL_MIN_PAIRS", 1):
+            parallel = plagiarism_service.batch_detect_plagiarism(submissions, 0.7, algorithms)
+
+        assert parallel == sequential
+        assert parallel["matches_found"] == 15
+
+    def test_batch_detection_top_k(self):
+        """Test top_k keeps the strongest matches in order but counts every match"""
+        submissions = [
+            {"id": f"sub{i}", "code": f"def add(a, b): return a + b + {i % 3}"} for i in range(6)
+        ]
+
+        full = plagiarism_service.batch_detect_plagiarism(submissions, 0.5)
+        top = plagiarism_service.batch_detect_plagiarism(submissions, 0.5, top_k=4)
+
+        assert top["matches_found"] == full["matches_found"] == 15
+        assert top["matches"] == full["matches"][:4]
+        assert plagiarism_service.batch_detect_plagiarism(submissions, 0.5, top_k=0)["matches"] == []
+
+    def test_batch_structural_similarity_uses_ast(self):
+        """Test batch structural similarity ignores renames and falls back for non-Python"""
+        original = {"code": "def add(a, b):\n    return a + b"}
+        renamed = {"code": "def plus(x, y):\n    return x + y"}
+        different = {"code": "class Point:\n    pass"}
+        java = {"code": "int add(int a, int b) { return a + b; }"}
+
+        assert plagiarism_service._structural_similarity(original, renamed) == 1.0
+        assert plagiarism_service._structural_similarity(original, different) == 0.0
+        assert plagiarism_service._structural_similarity(original, java) == (
+            calculate_pattern_similarity(original["code"], java["code"])
+        )
+        assert plagiarism_service._fingerprint_similarity(original, original) == 1.0
+        assert plagiarism_service._fingerprint_similarity(original, different) < 0.5
+
+    def test_similarity_algorithm_dispatch(self):
+        """Test batch and detailed comparison score the same named algorithms"""
+        submission1 = {"id": "a", "code": "def add(a, b):\n    return a + b"}
+        submission2 = {"id": "b", "code": "def plus(x, y):\n    return x + y"}
+
+        detailed = plagiarism_service.detailed_comparison(submission1, submission2)
+        assert set(detailed["algorithm_results"]) == {
+            "tfidf", "structural", "cross_language", "fingerprint"
+        }
+        assert plagiarism_service._calculate_similarity(
+            submission1, submission2, ["fingerprint", "semantic"]
+        ) == detailed["algorithm_results"]["fingerprint"]
+
+    def test_detailed_tfidf_is_fitted_per_pair(self):
+        """Test detailed comparison weights TF-IDF by the pair, not by the whole batch"""
+        codes = [
+            "def total(items): return sum(items)",
+            "def total(values): return sum(values) + len(values)",
+            "def count(items): return len(items)",
+        ]
+
+        detailed = plagiarism_service.detailed_comparison(
+            {"code": codes[0]}, {"code": codes[1]}, ["tfidf"]
+        )["algorithm_results"]["tfidf"]
+        batch = plagiarism_service.calculate_tfidf_similarity_matrix(codes)[0, 1]
+
+        assert detailed == pytest.approx(calculate_tfidf_similarity(codes[0], codes[1]))
+        assert detailed != pytest.approx(batch, abs=0.01)
+
+    def test_enhanced_check_fits_tfidf_once(self):
+        """Test enhanced check fits a single vectorizer for all submissions"""
+        detector = CrossLanguagePlagiarismDetector()
+        others = [
+            {"code": f"def f{i}(x): return x + {i}", "student_id": f"s{i}", "language": "python"}
+            for i in range(5)
+        ]
+
+        with patch.object(detector, "_get_other_submissions", return_value=others), patch(
+            "services.plagiarism_service.calculate_tfidf_similarity"
+        ) as pairwise:
+            result = detector.check_enhanced_plagiarism("def f0(x): return x + 0", "a1", "s9")
+
+        pairwise.assert_not_called()
+        assert result["similar_submissions"][0]["student_id"] == "s0"
+
 
 @pytest.mark.unit
 class TestASTComparison:
@@ -385,6 +646,30 @@ class MathHelper:
         assert features['assignments'] > 0
         assert features['depth'] > 0
 
+    def test_feature_extraction_exact_counts(self):
+        """Test exact feature counts and depth, with the module node at depth 1"""
+        tree = ast.parse("x = 1\nwhile x:\n    x = f(x)\n")
+        features = extract_structural_features(tree)
+
+        assert features == {
+            'functions': 0,
+            'classes': 0,
+            'loops': 1,
+            'conditionals': 0,
+            'imports': 0,
+            'assignments': 2,
+            'function_calls': 1,
+            'depth': 6,  # Module > While > Assign > Call > Name > Load
+        }
+
+    def test_feature_extraction_deep_nesting(self):
+        """Test very deep expressions do not exhaust the recursion limit"""
+        tree = ast.Expression(body=ast.Constant(value=0))
+        for _ in range(5000):
+            tree.body = ast.UnaryOp(op=ast.USub(), operand=tree.body)
+
+        assert extract_structural_features(tree)['depth'] > 5000
+
     def test_feature_similarity_identical(self):
         """Test feature similarity with identical features"""
         features = {
@@ -407,6 +692,34 @@ class MathHelper:
 
         assert 0.0 <= similarity < 0.5
 
+    def test_feature_similarities_batch(self):
+        """Test batched feature similarity matches the pairwise calculation"""
+        query = {'functions': 5, 'classes': 0, 'loops': 1}
+        rows = [
+            {'functions': 1, 'classes': 0, 'loops': 5},
+            {'functions': 5, 'classes': 0, 'loops': 1},
+            {'functions': 0, 'classes': 3, 'loops': 2},
+        ]
+
+        similarities = calculate_feature_similarities(
+            tuple(query.values()), [tuple(row.values()) for row in rows]
+        )
+
+        assert similarities == pytest.approx(
+            [calculate_feature_similarity(query, row) for row in rows]
+        )
+        assert calculate_feature_similarities((1, 2), []) == []
+
+    def test_count_vector_similarity_matches_dicts(self):
+        """Test positional count similarity equals the dict-keyed calculation"""
+        counts1 = (5, 0, 1, 0)
+        counts2 = (1, 0, 5, 2)
+
+        assert plagiarism_service._count_vector_similarity(counts1, counts2) == (
+            calculate_feature_similarity(dict(enumerate(counts1)), dict(enumerate(counts2)))
+        )
+        assert plagiarism_service._count_vector_similarity((), ()) == 0.0
+
 
 @pytest.mark.unit
 class TestDifflibMatching:
@@ -486,6 +799,30 @@ def fibonacci(n):
 
         assert similarity < 0.3
 
+    def test_sequence_similarity_short_code_uses_ratio(self):
+        """Test short code is scored by an order-independent SequenceMatcher ratio"""
+        import difflib
+
+        code1 = "def add(a, b):\n    return a + b\n"
+        code2 = "def add(x, y):\n    return x + y\n"
+
+        expected = difflib.SequenceMatcher(None, code1, code2).ratio()
+
+        assert calculate_sequence_similarity(code1, code2) == pytest.approx(expected)
+        assert calculate_sequence_similarity(code2, code1) == pytest.approx(expected)
+
+    def test_sequence_similarity_reordered_functions(self):
+        """Test swapping function order in long code barely changes sequence similarity"""
+        functions = [f"def f{i}(a, b):\n    return a * {i} + b\n" for i in range(80)]
+        first = "".join(functions[:40])
+        second = "".join(functions[40:])
+
+        assert len(first + second) * 2 > plagiarism_service._SEQUENCE_MATCHER_MAX_CHARS
+
+        similarity = calculate_sequence_similarity(first + second, second + first)
+
+        assert similarity > 0.9
+
 
 @pytest.mark.unit
 class TestPlagiarismDetection:
@@ -588,6 +925,29 @@ def bubble_sort(arr):
         assert isinstance(result['overall_similarity'], float)
         assert 0.0 <= result['overall_similarity'] <= 1.0
 
+    def test_comprehensive_similarity_early_exit(self):
+        """Test pairs that cannot reach min_similarity stop before the remaining measures"""
+        detector = CrossLanguagePlagiarismDetector()
+        code1 = "def add(a, b): return a + b"
+        code2 = "import os\nimport sys\nclass A:\n    x = [1, 2]\n"
+
+        full = detector._calculate_comprehensive_similarity(
+            code1, code2, 'python', 'python', {}, tfidf_sim=0.0
+        )
+        with patch.object(plagiarism_service, '_feature_obfuscation') as obfuscation:
+            pruned = detector._calculate_comprehensive_similarity(
+                code1, code2, 'python', 'python', {}, tfidf_sim=0.0, min_similarity=0.2
+            )
+
+        assert full['overall_similarity'] < 0.2
+        assert pruned is None
+        obfuscation.assert_not_called()
+
+        kept = detector._calculate_comprehensive_similarity(
+            code1, code2, 'python', 'python', {}, tfidf_sim=0.0, min_similarity=0.0
+        )
+        assert kept == full
+
     def test_weighted_similarity_same_language(self):
         """Test weighted similarity for same language"""
         detector = CrossLanguagePlagiarismDetector()
@@ -623,6 +983,186 @@ def bubble_sort(arr):
         assert result['cross_language'] == True
         assert 'pattern_similarity' in result
 
+    def test_submission_features_are_cached(self):
+        """Test each distinct submission is analyzed once across repeated checks"""
+        detector = CrossLanguagePlagiarismDetector()
+        others = [
+            {"code": "def add(a, b): return a + b", "student_id": "s1", "language": "python"},
+            {"code": "def sub(a, b): return a - b", "student_id": "s2", "language": "python"},
+        ]
+
+        with patch.object(detector, "_get_other_submissions", return_value=others), patch(
+            "services.plagiarism_service._extract_submission_features",
+            wraps=plagiarism_service._extract_submission_features,
+        ) as extract:
+            first = detector.check_enhanced_plagiarism("def mul(a, b): return a * b", "a1", "s9")
+            second = detector.check_enhanced_plagiarism("def mul(a, b): return a * b", "a1", "s9")
+
+        assert extract.call_count == 3
+        assert first["similarity_score"] == second["similarity_score"]
+
+    def test_unrelated_submissions_are_not_scored(self):
+        """Test submissions sharing too few tokens skip pairwise scoring"""
+        detector = CrossLanguagePlagiarismDetector()
+        others = [
+            {"code": "def add(a, b): return a + b", "student_id": "s1", "language": "python"},
+            {"code": "print('hello world')", "student_id": "s2", "language": "python"},
+        ]
+
+        with patch.object(detector, "_get_other_submissions", return_value=others), patch.object(
+            detector,
+            "_calculate_comprehensive_similarity",
+            wraps=detector._calculate_comprehensive_similarity,
+        ) as compare:
+            detector.check_enhanced_plagiarism("def add(x, y): return x + y", "a1", "s9")
+
+        assert compare.call_count == 1
+        assert compare.call_args[0][1] == others[0]["code"]
+
+    def test_short_identical_copy_is_scored(self):
+        """Test the token prefilter never drops a verbatim copy of a short submission"""
+        detector = CrossLanguagePlagiarismDetector()
+        others = [{"code": "print(1)\n", "student_id": "s1", "language": "python"}]
+
+        with patch.object(detector, "_get_other_submissions", return_value=others):
+            result = detector.check_enhanced_plagiarism("print(1)\n", "a1", "s9")
+
+        assert result["similarity_score"] > 0.85
+        assert [match["student_id"] for match in result["similar_submissions"]] == ["s1"]
+
+    def test_short_identical_copy_is_scored_by_check_plagiarism(self):
+        """Test check_plagiarism keeps identical short code through its token prefilter"""
+        app = Mock()
+        app.mongo.db.submissions.find.return_value = [
+            {"_id": "x1", "code": "print(1)\n", "student_id": "s1"}
+        ]
+
+        with patch("services.plagiarism_service.current_app", app):
+            result = plagiarism_service.check_plagiarism("print(1)\n", "a1", "s9")
+
+        assert result["similarity_score"] > 0.9
+        assert [match["student_id"] for match in result["similar_submissions"]] == ["s1"]
+
+    def test_prefilter_does_not_change_candidate_scores(self):
+        """Test unrelated submissions dropped by the prefilter still weigh into TF-IDF"""
+        code = (
+            "def total(items):\n    result = 0\n    for item in items:\n"
+            "        result += item\n    return result\n"
+        )
+        others = [{"code": code.replace("result", "acc"), "student_id": "s1", "language": "python"}]
+        others += [
+            {
+                "code": f"import json\nconfig_{i} = json.loads(text_{i})\n"
+                f"print(config_{i}['name'])\n",
+                "student_id": f"u{i}",
+                "language": "python",
+            }
+            for i in range(5)
+        ]
+
+        def copy_score(prefilter):
+            detector = CrossLanguagePlagiarismDetector()
+            with patch.object(detector, "_get_other_submissions", return_value=others):
+                if prefilter:
+                    result = detector.check_enhanced_plagiarism(code, "a1", "s9")
+                else:
+                    with patch.object(detector, "_is_candidate", return_value=True):
+                        result = detector.check_enhanced_plagiarism(code, "a1", "s9")
+            (match,) = [m for m in result["similar_submissions"] if m["student_id"] == "s1"]
+            return match["overall_similarity"]
+
+        assert copy_score(prefilter=True) == pytest.approx(copy_score(prefilter=False))
+
+    def test_check_plagiarism_prefilter_does_not_change_scores(self):
+        """Test check_plagiarism fits TF-IDF before its token prefilter drops submissions"""
+        code = "def total(items):\n    return sum(item * 2 for item in items)\n"
+        app = Mock()
+        app.mongo.db.submissions.find.return_value = [
+            {"_id": "x1", "code": code.replace("item", "value"), "student_id": "s1"}
+        ] + [
+            {"_id": f"y{i}", "code": f"print(config_{i}['name'])\n", "student_id": f"u{i}"}
+            for i in range(5)
+        ]
+
+        with patch("services.plagiarism_service.current_app", app):
+            filtered = plagiarism_service.check_plagiarism(code, "a1", "s9")
+            with patch.object(plagiarism_service, "_MIN_SHARED_TOKENS", 0):
+                unfiltered = plagiarism_service.check_plagiarism(code, "a1", "s9")
+
+        assert filtered["similarity_score"] == pytest.approx(unfiltered["similarity_score"])
+
+    def test_fingerprint_prefilter(self):
+        """Test renamed copies pass the SimHash prefilter and structurally distant code does not"""
+        detector = CrossLanguagePlagiarismDetector()
+        code = (
+            "def total(items):\n    result = 0\n    for item in items:\n"
+            "        result += item\n    return result\n"
+        )
+        renamed = code.replace("items", "xs").replace("item", "x").replace("result", "acc")
+        distant = (
+            "import json\nresult = json.loads('[1, 2]')\nitems = [result[0], result[1]]\n"
+            "item = items[-1]\n"
+        )
+        features = detector._featurize(code, "python")
+
+        assert detector._featurize(renamed, "python").fingerprint == features.fingerprint
+        assert detector._is_candidate(features, "python", {"code": renamed, "language": "python"})
+        assert not detector._is_candidate(
+            features, "python", {"code": distant, "language": "python"}
+        )
+        # Fingerprints are not comparable across languages
+        assert detector._is_candidate(features, "java", {"code": distant, "language": "python"})
+
+    def test_features_extracted_in_worker_processes(self):
+        """Test large batches of uncached submissions are analyzed by the process pool"""
+        detector = CrossLanguagePlagiarismDetector()
+        others = [
+            {"code": f"def f{i}(a):\n    return a + {i}", "student_id": f"s{i}", "language": "python"}
+            for i in range(4)
+        ]
+
+        with patch.object(plagiarism_service, "_PARALLEL_MIN_SUBMISSIONS", 2):
+            detector._featurize_many(others)
+
+        assert len(detector._feature_cache) == 4
+        for submission in others:
+            assert detector._featurize(submission["code"], "python") == (
+                plagiarism_service._extract_submission_features(
+                    submission["code"], detector.algorithm_mappings
+                )
+            )
+
+    def test_process_pool_spawns_capped_workers(self):
+        """Test the shared pool spawns rather than forks, is capped and stops on shutdown"""
+        plagiarism_service._shutdown_process_pool()
+        pool = plagiarism_service._get_process_pool()
+
+        assert pool._mp_context.get_start_method() == "spawn"
+        assert pool._max_workers == plagiarism_service._PROCESS_POOL_WORKERS <= 4
+        assert plagiarism_service._process_pool is pool
+
+        plagiarism_service._shutdown_process_pool()
+
+        assert plagiarism_service._process_pool is None
+
+    def test_broken_process_pool_falls_back(self):
+        """Test a failed pool leaves feature extraction to the sequential path"""
+        from concurrent.futures.process import BrokenProcessPool
+
+        detector = CrossLanguagePlagiarismDetector()
+        others = [
+            {"code": "def add(a, b): return a + b", "student_id": "s1", "language": "python"},
+            {"code": "def add(x, y): return x + y", "student_id": "s2", "language": "python"},
+        ]
+
+        with patch.object(plagiarism_service, "_PARALLEL_MIN_SUBMISSIONS", 1), patch.object(
+            plagiarism_service, "_get_process_pool", side_effect=BrokenProcessPool("gone")
+        ), patch.object(detector, "_get_other_submissions", return_value=others):
+            result = detector.check_enhanced_plagiarism("def add(a, b): return a + b", "a1", "s9")
+
+        assert result["enhanced_analysis"] is True
+        assert result["similarity_score"] > 0.9
+
     def test_clean_submission_no_matches(self):
         """Test clean submission with no matches"""
         detector = CrossLanguagePlagiarismDetector()
@@ -702,3 +1242,76 @@ def test():
 
         # Operators should be properly spaced
         assert ' = ' in normalized or '=' in normalized
+
+    def test_normalization_spacing(self):
+        """Test operators are spaced, brackets are tight and blank lines dropped"""
+        code = "X=foo( a,  b )\n\n   if (a<=b) { y++; }"
+
+        assert normalize_code(code) == "x = foo(a,b)\nif(a <= b){y ++;}"
+
+    def test_word_tokens_match_regex(self):
+        """Test the translate-based tokenizer agrees with the word regex"""
+        for code in ["a.b+c_1=(x2)//'s'", "naïve = café * 2 ✓", "", "  \n"]:
+            assert plagiarism_service._word_tokens(code) == plagiarism_service._WORD.findall(code)
+            assert plagiarism_service._identifier_set(code) == set(
+                plagiarism_service._IDENTIFIER.findall(code)
+            )
+
+    def test_normalization_is_cached(self):
+        """Test repeat normalizations of the same code are served from the cache"""
+        code = "def cached():    return 'normalize me once'"
+        normalize_code(code)
+        hits = normalize_code.cache_info().hits
+
+        assert normalize_code(code) == normalize_code(code)
+        assert normalize_code.cache_info().hits == hits + 2
+
+    def test_line_reordering_counts_repeated_lines(self):
+        """Test repeated lines only count as shared as often as both sides contain them"""
+        detect = plagiarism_service.detect_code_obfuscation
+        shuffled = "b = 2\n}\na = 1\n}\nc = 3\n}"
+        braces = "}\n}\n}\n}\n}\n}\n}\na = 1"
+
+        assert "Possible line reordering" in detect("a = 1\n}\nb = 2\n}\nc = 3\n}", shuffled)
+        assert "Possible line reordering" not in detect("a = 1\n}\nb = 2\n}\nc = 3", braces)
+        assert "Possible line reordering" not in detect("", "a = 1")
+
+    def test_obfuscation_skips_empty_and_identical_code(self):
+        """Test verbatim copies and empty submissions report no obfuscation"""
+        detect = plagiarism_service.detect_code_obfuscation
+        code = "a = 1\nb = 2\nprint(a + b)"
+
+        assert detect(code, code) == []
+        assert detect("", code) == []
+        assert detect(code, "") == []
+        assert detect(code, "x = 1\ny = 2\nshow(x + y)") == ["Significant variable name changes"]
+
+    def test_code_scan_shared_across_helpers(self):
+        """Test pattern and obfuscation helpers reuse one cached scan per code"""
+        code1 = "def scan_once(a):\n    for i in range(a):\n        print(i)\n    return a"
+        code2 = "def scan_twice(b):\n    while (b):\n        b -= 1\n    return b"
+        plagiarism_service._scan_code.cache_clear()
+
+        calculate_pattern_similarity(code1, code2)
+        plagiarism_service.detect_code_obfuscation(code1, code2)
+
+        assert plagiarism_service._scan_code.cache_info().misses == 2
+        assert plagiarism_service._scan_code(code1).line_total == 4
+
+    def test_structure_counts_match_regexes(self):
+        """Test the keyword prefilter counts exactly what the structure regexes match"""
+        for code in [
+            "def f(x):\n    return x", "PUBLIC static int F() { IF(x) return 1; }",
+            "while(x) {}\nfor (i=0;;) {}", "claſſ Foo: pass", "", "x = 1",
+        ]:
+            assert plagiarism_service._structure_counts(code) == tuple(
+                len(pattern.findall(code)) for pattern in plagiarism_service._STRUCTURE_PATTERNS
+            )
+
+    def test_code_fingerprint(self):
+        """Test fingerprints are 128-bit hex digests that ignore formatting"""
+        fingerprint = plagiarism_service.generate_code_fingerprint("def test():    return 5")
+
+        assert len(fingerprint) == 32
+        assert fingerprint == plagiarism_service.generate_code_fingerprint("def test(): return 5")
+        assert fingerprint != plagiarism_service.generate_code_fingerprint("def test(): return 6")
@@ -65,6 +65,32 @@ class TestStudentOverview:
         assert result["overview"]["average_score"] == 0
         assert result["overview"]["recent_trend"] == "no_data"
 
+    def test_overview_summary_is_cached(self):
+        """Test that repeat overviews reuse the cached summary but return fresh dicts."""
+        from unittest.mock import patch
+
+        service = _service_with(list(SAMPLE_SUBMISSIONS))
+        first = service.get_student_overview("Alice Smith")
+        with patch.object(service, "_get_student_indices") as lookup:
+            second = service.get_student_overview("alice smith")
+        lookup.assert_not_called()
+
+        assert second["overview"] == first["overview"]
+        assert second["profile"]["student_id"] == "alice smith"
+        second["overview"]["total_assignments"] = 0
+        assert service.get_student_overview("ALICE SMITH")["overview"]["total_assignments"] == 2
+
+    def test_overview_cache_cleared_on_reindex(self):
+        """Test that deleting submissions drops cached overviews."""
+        from unittest.mock import patch
+
+        service = _service_with(list(SAMPLE_SUBMISSIONS))
+        assert service.get_student_overview("bob")["overview"]["total_assignments"] == 1
+        with patch.object(service, "_save_submissions_data", return_value=True):
+            service.delete_student_submissions("bob")
+
+        assert service.get_student_overview("bob")["overview"]["total_assignments"] == 0
+
     def test_profile_contains_required_fields(self):
         """Test that profile contains required fields."""
         service = ProgressTrackerService()
@@ -205,6 +231,24 @@ class TestAchievementProgress:
         actual_earned = len([a for a in result["achievements"] if a.get("earned", False)])
         assert result["earned_count"] == actual_earned
 
+    def test_perfect_score_date_from_summary(self):
+        """Test that the perfect score date is the earliest 100 for the student."""
+        service = _service_with(
+            [
+                {"student_name": "Ann", "score": 100, "submitted_at": "2025-05-02T09:00:00"},
+                {"student_name": "Ann", "score": 80, "submitted_at": "2025-05-01T09:00:00"},
+                {"student_name": "Ann", "score": 100, "submitted_at": "2025-05-03T09:00:00"},
+            ]
+        )
+        achievements = {
+            a["name"]: a for a in service.get_achievement_progress("ann")["achievements"]
+        }
+
+        assert achievements["First Submission"]["date"] == "2025-05-01"
+        assert achievements["Perfect Score"]["earned"] is True
+        assert achievements["Perfect Score"]["date"] == "2025-05-02"
+        assert achievements["Multiple Submissions"]["earned"] is True
+
     def test_total_count_matches_achievements(self):
         """Test that total_count matches total achievements."""
         service = ProgressTrackerService()
@@ -247,6 +291,33 @@ class TestDetailedRecommendations:
         assert "this_month" in study_plan
         assert "this_semester" in study_plan
 
+    def test_weak_areas_named_once(self):
+        """Test that each weak topic is listed once, in first-seen order."""
+        service = _service_with(
+            [
+                {"student_name": "Ann", "score": 90, "assignment_title": "Linear Search"},
+                {"student_name": "Ann", "score": 40, "assignment_title": "Bubble Sort"},
+                {"student_name": "Ann", "score": 95, "assignment_title": "Merge Sort"},
+                {"student_name": "Ann", "score": 55, "assignment_title": "Binary Search"},
+                {"student_name": "Ann", "score": 30, "assignment_title": "Calculator"},
+            ]
+        )
+        actions = service.get_detailed_recommendations("ann")["immediate_actions"]
+
+        assert actions[0] == "Focus on Search Algorithms, Sorting Algorithms - needs improvement"
+
+    def test_no_weak_areas_when_topics_pass(self):
+        """Test that failing scores outside sorting/searching add no weak areas."""
+        service = _service_with(
+            [
+                {"student_name": "Ann", "score": 90, "assignment_title": "Bubble Sort"},
+                {"student_name": "Ann", "score": 20, "assignment_title": "Calculator"},
+            ]
+        )
+        actions = service.get_detailed_recommendations("ann")["immediate_actions"]
+
+        assert not any("needs improvement" in action for action in actions)
+
     def test_resources_have_required_fields(self):
         """Test that resources have required fields."""
         service = ProgressTrackerService()
@@ -290,3 +361,282 @@ class TestHelperMethods:
         service = ProgressTrackerService()
         assert service._score_to_level(50) == "Novice"
         assert service._score_to_level(0) == "Novice"
+
+
+def _service_with(submissions):
+    """Build a service over an in-memory list of submissions."""
+    service = ProgressTrackerService()
+    service.submissions_data = submissions
+    service._index_submissions()
+    return service
+
+
+SAMPLE_SUBMISSIONS = [
+    {"student_name": "Alice Smith", "student_email": "alice@uni.edu", "score": 90},
+    {"student_name": "Bob Jones", "student_email": "bob@uni.edu", "score": 60},
+    {"student_name": "Alice Smith", "student_email": "alice@uni.edu", "score": 70},
+    {"student_name": "Alicia Keys", "student_email": "ak@uni.edu", "score": 100},
+]
+
+
+class TestSubmissionIndexes:
+    """Test suite for the cached load and per-student indexes."""
+
+    def test_lookup_keeps_substring_match(self):
+        """Test that lookups still match partial names and emails in file order."""
+        service = _service_with(SAMPLE_SUBMISSIONS)
+
+        assert service._get_student_submissions("ALICE SMITH") == [
+            SAMPLE_SUBMISSIONS[0],
+            SAMPLE_SUBMISSIONS[2],
+        ]
+        assert service._get_student_submissions("ali") == [
+            SAMPLE_SUBMISSIONS[0],
+            SAMPLE_SUBMISSIONS[2],
+            SAMPLE_SUBMISSIONS[3],
+        ]
+        assert service._get_student_submissions("bob@uni") == [SAMPLE_SUBMISSIONS[1]]
+        assert service._get_student_submissions("carol") == []
+
+    def test_student_averages(self):
+        """Test that per-student averages are precomputed."""
+        service = _service_with(SAMPLE_SUBMISSIONS)
+
+        assert service._student_averages() == {
+            "Alice Smith": 80,
+            "Bob Jones": 60,
+            "Alicia Keys": 100,
+        }
+        result = service.get_comparative_analysis("Alice Smith")
+        assert result["rank"] == 2
+        assert result["total_students"] == 3
+
+    def test_rank_counts_higher_averages(self):
+        """Test that rank counts the students with a strictly higher average."""
+        service = _service_with(SAMPLE_SUBMISSIONS)
+
+        assert service._student_rank(100) == 1
+        assert service._student_rank(80) == 2
+        assert service._student_rank(60) == 3
+        assert service._student_rank(0) == 4
+
+    def test_load_is_cached_until_file_changes(self, tmp_path, monkeypatch):
+        """Test that the JSON file is parsed once per modification time."""
+        import json
+        import os
+
+        from services import progress_tracker_service as module
+
+        path = tmp_path / "submissions.json"
+        path.write_text(json.dumps(SAMPLE_SUBMISSIONS))
+        monkeypatch.setattr(module, "_SUBMISSIONS_FILE", str(path))
+        module._read_submissions_file.cache_clear()
+
+        first = ProgressTrackerService()
+        second = ProgressTrackerService()
+        assert module._read_submissions_file.cache_info().misses == 1
+        assert first.submissions_data == SAMPLE_SUBMISSIONS
+        assert first.submissions_data is not second.submissions_data
+
+        path.write_text(json.dumps(SAMPLE_SUBMISSIONS[:1]))
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert ProgressTrackerService().submissions_data == SAMPLE_SUBMISSIONS[:1]
+        module._read_submissions_file.cache_clear()
+
+    def test_load_without_orjson(self, tmp_path, monkeypatch):
+        """Test that the stdlib json fallback parses the same data."""
+        import json
+
+        from services import progress_tracker_service as module
+
+        path = tmp_path / "submissions.json"
+        path.write_text(json.dumps(SAMPLE_SUBMISSIONS))
+        with_orjson = module._read_submissions_file.__wrapped__(str(path), 0)
+        monkeypatch.setattr(module, "orjson", None)
+
+        assert module._read_submissions_file.__wrapped__(str(path), 0) == with_orjson
+        assert with_orjson == SAMPLE_SUBMISSIONS
+
+    def test_delete_refreshes_indexes(self):
+        """Test that deleting a student's submissions drops them from the indexes."""
+        from unittest.mock import patch
+
+        service = _service_with(list(SAMPLE_SUBMISSIONS))
+        with patch.object(service, "_save_submissions_data", return_value=True):
+            assert service.delete_student_submissions("bob")
+
+        assert service._get_student_submissions("bob") == []
+        assert "Bob Jones" not in service._student_averages()
+
+    def test_score_summary_with_and_without_numpy(self):
+        """Test that the NumPy and plain Python reductions agree."""
+        service = _service_with(SAMPLE_SUBMISSIONS)
+        expected = {"total": 160, "mean": 80.0, "min": 70, "max": 90}
+
+        assert service._score_summary([0, 2]) == expected
+        service._scores_np = None
+        assert service._score_summary([0, 2]) == expected
+        assert service._score_summary()["total"] == 320
+
+    def test_unscored_submissions_still_load(self):
+        """Test that submissions without a numeric score do not break indexing."""
+        service = _service_with([{"student_name": "Dana", "score": None}])
+
+        assert service._scores_np is None
+        assert service.get_comparative_analysis("nobody")["rank"] == 0
+
+
+class TestTimelineGrouping:
+    """Test suite for timeline bucketing."""
+
+    def test_buckets_by_period(self):
+        """Test that month, week and day buckets average scores and skip bad dates."""
+        service = _service_with(
+            [
+                {"student_name": "Ann", "score": 80, "submitted_at": "2025-03-03T10:00:00"},
+                {"student_name": "Ann", "score": 60, "submitted_at": "2025-03-05T10:00:00Z"},
+                {"student_name": "Ann", "score": 90, "submitted_at": "2025-04-01T10:00:00"},
+                {"student_name": "Ann", "score": 10, "submitted_at": "not a date"},
+                {"student_name": "Ann", "score": 10, "submitted_at": ""},
+            ]
+        )
+
+        months = service.get_performance_timeline("ann", "6months")
+        assert months["metrics"]["labels"] == ["2025-03", "2025-04"]
+        assert months["metrics"]["score_trend"] == [70.0, 90.0]
+        assert months["metrics"]["submission_count"] == [2, 1]
+
+        weeks = service.get_performance_timeline("ann", "3months")
+        assert weeks["metrics"]["labels"] == ["2025-W09", "2025-W13"]
+
+        days = service.get_performance_timeline("ann", "1month")
+        assert len(days["timeline"]) == 3
+
+    def test_keeps_latest_buckets(self):
+        """Test that only the most recent buckets are returned."""
+        service = _service_with(
+            [
+                {"student_name": "Ann", "score": 50, "submitted_at": f"2025-{month:02d}-01"}
+                for month in range(1, 13)
+            ]
+        )
+
+        labels = service.get_performance_timeline("ann", "6months")["metrics"]["labels"]
+        assert labels == [f"2025-{month:02d}" for month in range(7, 13)]
+
+
+class TestChronologicalOrder:
+    """Test suite for the load-time chronological sort."""
+
+    def test_submissions_sorted_once(self):
+        """Test that indexing orders submissions oldest first without mutating the input."""
+        submissions = [
+            {"student_name": "Ann", "score": 90, "submitted_at": "2025-03-02T00:00:00"},
+            {"student_name": "Ann", "score": 40, "submitted_at": "2025-03-01T00:00:00"},
+            {"student_name": "Ann", "score": 70},
+        ]
+        service = _service_with(submissions)
+
+        assert [s["score"] for s in service.submissions_data] == [70, 40, 90]
+        assert [s["score"] for s in submissions] == [90, 40, 70]
+        assert service.get_class_statistics()["recent_activity"][0]["score"] == 90
+        assert service._get_student_submissions("ann")[-1]["score"] == 90
+
+
+class TestSkillClassification:
+    """Test suite for assignment title skill classification."""
+
+    def test_titles_map_to_skills(self):
+        """Test that titles map to skills with the original precedence."""
+        from services.progress_tracker_service import _skill_for_title
+
+        assert _skill_for_title("Bubble Sort") == "Sorting Algorithms"
+        assert _skill_for_title("Binary Search") == "Search Algorithms"
+        assert _skill_for_title("Binary tree sort") == "Sorting Algorithms"
+        assert _skill_for_title("Fibonacci") == "Recursion"
+        assert _skill_for_title("Simple Calculator") == "Basic Programming"
+        assert _skill_for_title("Hello World") == "Python"
+
+    def test_skills_precomputed_on_index(self):
+        """Test that skill progress groups by the labels computed at index time."""
+        service = _service_with(
+            [
+                {"student_name": "Ann", "score": 80, "assignment_title": "Bubble Sort"},
+                {"student_name": "Ann", "score": 60, "assignment_title": "Merge sort"},
+                {"student_name": "Ann", "score": 95, "assignment_title": "Factorial"},
+            ]
+        )
+
+        assert service._skill_ids == [1, 1, 3]
+        skills = service.get_skill_analysis("ann")["skills"]
+        assert skills["Sorting Algorithms"]["total_submissions"] == 2
+        assert skills["Recursion"]["proficiency_level"] == "Expert"
+
+    def test_numpy_grouping_matches_python(self):
+        """Test that the bincount grouping matches the plain Python grouping."""
+        from services import progress_tracker_service as module
+
+        titles = ["Bubble Sort", "Factorial", "Hello", "Binary Search", "Calculator"]
+        service = _service_with(
+            [
+                {"student_name": "Ann", "score": (i * 37) % 101, "assignment_title": titles[i % 5]}
+                for i in range(600)
+            ]
+        )
+        indices = list(range(600))
+
+        with_numpy = service._calculate_real_skill_progress(indices)
+        service._skill_ids_np = None
+        without_numpy = service._calculate_real_skill_progress(indices)
+
+        assert len(indices) >= module._NUMPY_MIN_SUBMISSIONS
+        assert list(with_numpy) == list(without_numpy)
+        assert with_numpy == without_numpy
+
+    def test_strongest_and_improvement_areas(self):
+        """Test that the top and bottom three skills come back best first."""
+        service = _service_with(
+            [
+                {"student_name": "Ann", "score": 95, "assignment_title": "Factorial"},
+                {"student_name": "Ann", "score": 85, "assignment_title": "Bubble Sort"},
+                {"student_name": "Ann", "score": 75, "assignment_title": "Binary Search"},
+                {"student_name": "Ann", "score": 65, "assignment_title": "Calculator"},
+            ]
+        )
+        result = service.get_skill_analysis("ann")
+
+        assert [name for name, _ in result["strongest_skills"]] == [
+            "Recursion",
+            "Sorting Algorithms",
+            "Search Algorithms",
+        ]
+        assert [name for name, _ in result["improvement_areas"]] == [
+            "Sorting Algorithms",
+            "Search Algorithms",
+            "Basic Programming",
+        ]
+
+
+class TestTrend:
+    """Test suite for the shared trend helper."""
+
+    def test_real_trend_thresholds(self):
+        """Test that real-data trends need a swing of more than ten points."""
+        service = ProgressTrackerService()
+
+        assert service._calculate_real_trend([{"score": 50}]) == "stable"
+        assert service._calculate_real_trend([{"score": 50}, {"score": 80}]) == "improving"
+        assert service._calculate_real_trend([{"score": 60}, {"score": 70}]) == "stable"
+        assert (
+            service._calculate_real_trend([{"score": 90}, {"score": 80}, {"score": 70}])
+            == "declining"
+        )
+
+    def test_mock_trend_thresholds(self):
+        """Test that the mock-data trend keeps its five point threshold and window."""
+        service = ProgressTrackerService()
+
+        assert service._calculate_trend([{"score": 50}, {"score": 90}]) == "stable"
+        scores = [{"score": score} for score in (0, 60, 60, 60, 70, 70)]
+        assert service._calculate_trend(scores) == "improving"